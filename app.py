@@ -1,100 +1,381 @@
-import cv2
-import base64
+import atexit
+import os
+import sys
 import time
 import threading
-from flask import Flask, render_template, Response, jsonify
+from functools import partial
+from typing import Optional
+import cv2
+import numpy as np
+from flask import Flask, render_template, Response, jsonify, request, send_file
 from flask_socketio import SocketIO, emit
-from detector import CameraStream, WeaponDetector, AlertManager
+from detector import CameraStream, Detections, AlertManager, CameraPipeline
+from detector.alert import Alert
+from detector.alert_store import AlertStore
+from detector.cluster import ClusterCoordinator
+from detector.dispatch import AlertDispatcher, CallbackSink, WebhookSink
+from detector.pipeline import frame_meta
+from detector.recorder import AlertRecorder, ClipBuffer
+from detector.streaming import QUALITY_TIERS, SubscriptionRegistry, FrameCache, FrameDelivery
+from detector import metrics
+from builders import build_camera, build_inference, build_motion_gate, build_tracker
 import config
 
+app_started = time.monotonic()  # Cold-start time is measured from here
+cold_start_seconds = None  # Set once the model is warm and every camera has a frame (or timed out)
+
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "intelligence-lair-secret"
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
 
 # Initialize components
-detector = WeaponDetector(model_path="yolov8s.pt", confidence_threshold=config.DETECTION_CONFIDENCE)
-alert_manager = AlertManager(cooldown_seconds=config.ALERT_COOLDOWN)
-cameras: dict[str, CameraStream] = {}
+# In cluster mode cameras and models live on detection nodes (see coordinator below);
+# otherwise the model loads and warms up in the background, so the server starts immediately
+inference = None if config.CLUSTER_ENABLED else build_inference()
+alert_store = AlertStore(config.ALERT_DB_PATH)
+atexit.register(alert_store.close)  # Flush alerts still queued for the database
+alert_manager = AlertManager(cooldown_seconds=config.ALERT_COOLDOWN, store=alert_store)
+# Snapshots and pre/post-event clips are written off the detection threads
+recorder = AlertRecorder(
+    output_dir=config.RECORDINGS_DIR,
+    pre_seconds=config.CLIP_PRE_SECONDS,
+    post_seconds=config.CLIP_POST_SECONDS,
+    max_bytes=config.RECORDINGS_MAX_MB * 1024 * 1024
+) if config.CLIP_RECORDING_ENABLED else None
+# Alert notifications run on dispatcher threads, never on a camera's processing thread
+alert_dispatcher = AlertDispatcher(
+    [CallbackSink("socketio", lambda alert: socketio.emit("new_alert", alert))]
+    + [WebhookSink(url) for url in config.ALERT_WEBHOOK_URLS],
+    workers=config.ALERT_DISPATCH_WORKERS,
+    queue_size=config.ALERT_DISPATCH_QUEUE_SIZE,
+    max_retries=config.ALERT_DISPATCH_RETRIES
+)
+camera_ids = {cam["id"] for cam in config.CAMERAS}
+# Alert cooldown scope per camera: its site, or None to keep cameras independent
+camera_sites = {
+    cam["id"]: cam.get("site", config.ALERT_DEFAULT_SITE) if config.ALERT_SITE_CORRELATION else None
+    for cam in config.CAMERAS
+}
+cameras: dict[str, CameraStream] = {}  # Local streams (empty in cluster mode)
+pipelines: dict[str, CameraPipeline] = {}  # Detection, gating and threat tracking per local camera
+subscriptions = SubscriptionRegistry()  # Frames are only annotated/encoded for watched cameras
+frame_cache = FrameCache()  # One JPEG per camera frame and encoding, shared by every viewer
+delivery = FrameDelivery(
+    socketio,
+    subscriptions,
+    frame_cache,
+    max_pending_bytes=config.STREAM_MAX_PENDING_MB * 1024 * 1024,
+    ack_timeout=config.STREAM_ACK_TIMEOUT
+)
 
 
 def init_cameras():
     """Initialize all camera streams."""
     for cam_config in config.CAMERAS:
-        camera = CameraStream(
-            camera_id=cam_config["id"],
-            name=cam_config["name"],
-            url=cam_config["url"]
+        camera = cameras[cam_config["id"]] = build_camera(cam_config)
+        pipelines[cam_config["id"]] = CameraPipeline(
+            camera,
+            inference,
+            on_threat=partial(raise_alert, camera),
+            on_frame=partial(emit_frame, camera),
+            gate=build_motion_gate(cam_config),
+            tracker=build_tracker(),
+            max_fps=config.MAX_PROCESSING_FPS
         )
-        cameras[cam_config["id"]] = camera
         camera.start()
     print(f"Initialized {len(cameras)} cameras")
 
 
-def process_camera(camera_id: str):
-    """Process frames from a camera and emit to clients."""
-    camera = cameras.get(camera_id)
-    if not camera:
+def emit_frame(camera: CameraStream, seq: int, frame, detections: Detections, render):
+    """Stream one processed frame to Socket.IO clients and MJPEG viewers."""
+    # Nobody is watching: skip the annotation copy and the encode entirely
+    mjpeg_viewers = frame_cache.viewer_count(camera.camera_id)
+    if subscriptions.count(camera.camera_id) == 0 and mjpeg_viewers == 0:
         return
 
-    while True:
-        frame = camera.get_frame()
+    meta = frame_meta(camera.camera_id, frame, detections, config.CLIENT_OVERLAY)
+    if config.CLIENT_OVERLAY:
+        # The dashboard draws the boxes itself: send the raw frame (no copy, no
+        # drawing) with the detections packed alongside
+        delivery.publish(camera.camera_id, seq, lambda: frame, meta,
+                         event=f"frame_{camera.camera_id}", variant="raw")
+    else:
+        # Annotate and encode lazily, once per quality tier, for clients ready for a frame
+        delivery.publish(camera.camera_id, seq, render, meta, event=f"frame_{camera.camera_id}")
+
+    # The annotated copy outlives the frame lease, so MJPEG viewers can encode it later
+    if mjpeg_viewers:
+        frame_cache.publish(camera.camera_id, seq, render())
+
+
+def raise_alert(
+    camera: CameraStream,
+    render,
+    threat_type: str,
+    confidence: float,
+    track_id=None
+) -> Optional[Alert]:
+    """Create an alert (subject to the cooldown); the dispatcher notifies clients and webhooks."""
+    alert = alert_manager.check_and_alert(
+        camera_id=camera.camera_id,
+        camera_name=camera.name,
+        threat_type=threat_type,
+        confidence=confidence,
+        track_id=track_id,
+        site=camera_sites[camera.camera_id]
+    )
+    if alert and recorder is not None:
+        # The annotated copy outlives the frame lease; encoding happens on the recorder thread
+        recorder.record(alert.id, alert.timestamp, render(), camera.clip_buffer)
+    return alert
+
+
+def jpeg_decoder(jpeg: bytes):
+    """Render callable that decodes a JPEG on first use (cluster frames arrive encoded)."""
+    frame = None
+
+    def render():
+        nonlocal frame
         if frame is None:
-            time.sleep(0.1)
-            continue
-
-        # Run detection
-        annotated_frame, detections = detector.detect(frame)
-
-        # Check for threats
-        threats = detector.get_threats(detections)
-        for threat in threats:
-            alert = alert_manager.check_and_alert(
-                camera_id=camera_id,
-                camera_name=camera.name,
-                threat_type=threat.class_name,
-                confidence=threat.confidence
+            frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return frame
+    return render
+
+
+def publish_node_frame(camera_id: str, seq: int, jpegs: dict, meta: dict):
+    """Relay a frame encoded by a detection node to Socket.IO clients and MJPEG viewers."""
+    renders = {variant: jpeg_decoder(jpeg) for variant, jpeg in jpegs.items()}
+    for variant, jpeg in jpegs.items():
+        # Best-tier clients and MJPEG viewers get the node's bytes; other tiers decode and re-encode
+        frame_cache.put(camera_id, seq, jpeg, renders[variant], QUALITY_TIERS[0][1], variant)
+    variant = "raw" if config.CLIENT_OVERLAY else "annotated"
+    if variant in renders:
+        delivery.publish(camera_id, seq, renders[variant], meta, event=f"frame_{camera_id}", variant=variant)
+
+
+def raise_node_alert(
+    cam_config: dict,
+    threat_type: str,
+    confidence: float,
+    track_id,
+    timestamp: float,
+    snapshot
+) -> Optional[Alert]:
+    """Alert on a threat a detection node confirmed; its clip is fetched from the node afterwards."""
+    alert = alert_manager.check_and_alert(
+        camera_id=cam_config["id"],
+        camera_name=cam_config["name"],
+        threat_type=threat_type,
+        confidence=confidence,
+        track_id=track_id,
+        timestamp=timestamp,
+        site=camera_sites[cam_config["id"]]
+    )
+    if alert and recorder is not None:
+        recorder.record(alert.id, alert.timestamp, jpeg_decoder(snapshot)(), None)
+        coordinator.request_clip(cam_config["id"], alert.id, alert.timestamp)
+    return alert
+
+
+def record_node_clip(camera_id: str, alert_id: str, alert_time: float, frames: list):
+    """Write the pre/post-event clip a detection node sent for an alert."""
+    if recorder is None:
+        return
+    clip_buffer = ClipBuffer(
+        seconds=config.CLIP_PRE_SECONDS + config.CLIP_POST_SECONDS + 1.0,
+        max_bytes=config.CLIP_BUFFER_MAX_MB * 1024 * 1024
+    )
+    for timestamp, jpeg in frames:
+        clip_buffer.add(timestamp, jpeg)
+    recorder.record(alert_id, alert_time, None, clip_buffer)
+
+
+def update_watch(camera_id: str):
+    """Tell the camera's detection node which renderings its viewers need (cluster mode only)."""
+    if coordinator is None:
+        return
+    variants = set()
+    if subscriptions.count(camera_id):
+        variants.add("raw" if config.CLIENT_OVERLAY else "annotated")
+    if frame_cache.viewer_count(camera_id):
+        variants.add("annotated")
+    coordinator.set_watch(camera_id, variants)
+
+
+def camera_statuses() -> list:
+    """Status of every camera, from the local streams or (cluster mode) the nodes' heartbeats."""
+    if coordinator is not None:
+        return coordinator.get_camera_statuses()
+    return [cam.get_status() for cam in cameras.values()]
+
+
+def mjpeg_stream(camera_id: str):
+    """Yield multipart JPEG parts for a camera until the client disconnects."""
+    frame_cache.add_viewer(camera_id)
+    update_watch(camera_id)
+    try:
+        seq = 0
+        while True:
+            seq, jpeg = frame_cache.wait_for_jpeg(camera_id, seq, timeout=5.0, quality=config.MJPEG_QUALITY)
+            if jpeg is None:
+                continue
+            yield (
+                b"--frame\r\nContent-Type: image/jpeg\r\n"
+                b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n"
             )
-            if alert:
-                # Emit alert to all clients
-                socketio.emit("new_alert", alert.to_dict())
-
-        # Count people separately
-        people_count = sum(1 for d in detections if d.class_name.lower() == "person")
-
-        # Encode frame to JPEG
-        _, buffer = cv2.imencode(".jpg", annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-        frame_base64 = base64.b64encode(buffer).decode("utf-8")
-
-        # Emit frame to clients
-        socketio.emit(f"frame_{camera_id}", {
-            "camera_id": camera_id,
-            "frame": frame_base64,
-            "detections": len(detections),
-            "people": people_count,
-            "threats": len(threats)
-        })
-
-        # Cap at ~15 FPS for WebSocket
-        time.sleep(0.066)
+    finally:
+        frame_cache.remove_viewer(camera_id)
+        update_watch(camera_id)
 
 
 @app.route("/")
 def dashboard():
     """Main dashboard page."""
-    return render_template("dashboard.html", cameras=config.CAMERAS)
+    return render_template("dashboard.html", cameras=config.CAMERAS, client_overlay=config.CLIENT_OVERLAY)
 
 
 @app.route("/api/cameras")
 def get_cameras():
-    """Get all camera statuses."""
-    statuses = [cam.get_status() for cam in cameras.values()]
+    """Get all camera statuses (aggregated from the detection nodes in cluster mode)."""
+    statuses = camera_statuses()
+    for status in statuses:
+        camera_id = status["id"]
+        status["subscribers"] = subscriptions.count(camera_id)
+        pipeline = pipelines.get(camera_id)
+        if pipeline is not None and pipeline.gate is not None:
+            status["motion_gate"] = pipeline.gate.get_stats()
+        if pipeline is not None and pipeline.tracker is not None:
+            status["tracker"] = pipeline.tracker.get_stats()
     return jsonify(statuses)
 
 
+@app.route("/stream/<camera_id>.mjpg")
+def stream_camera(camera_id):
+    """Annotated camera feed as multipart/x-mixed-replace MJPEG."""
+    if camera_id not in camera_ids:
+        return jsonify({"error": "Unknown camera"}), 404
+    return Response(mjpeg_stream(camera_id), mimetype="multipart/x-mixed-replace; boundary=frame")
+
+
+@app.route("/api/health")
+def get_health():
+    """
+    Readiness: 200 once the model is loaded and warm, 503 before (status "starting")
+    or after it failed to load (status "error"); camera connect times are reported either way.
+    """
+    readiness = (coordinator or inference).get_readiness()
+    camera_health = {}
+    for status in camera_statuses():
+        camera_health[status["id"]] = {
+            "connected": status["connected"],
+            "connect_seconds": status.get("connect_seconds"),
+            "first_frame_seconds": status.get("first_frame_seconds")
+        }
+        if "node" in status:
+            camera_health[status["id"]]["node"] = status["node"]
+    # A dead camera is reported but does not make the whole server unready
+    ready = readiness["ready"]
+    body = {
+        "status": "ready" if ready else "error" if readiness.get("failed") else "starting",
+        "uptime_seconds": round(time.monotonic() - app_started, 1),
+        "cold_start_seconds": _round_seconds(cold_start_seconds),
+        "model": readiness,
+        "cameras_connected": sum(1 for health in camera_health.values() if health["connected"]),
+        "cameras": camera_health
+    }
+    return jsonify(body), 200 if ready else 503
+
+
+def _round_seconds(seconds):
+    return round(seconds, 3) if seconds is not None else None
+
+
+@app.route("/api/inference/stats")
+def get_inference_stats():
+    """Get batch timing (in-process scheduler) or worker statistics (process pool)."""
+    if inference is None:
+        return jsonify({"error": "Inference runs on the detection nodes, see /api/cluster/stats"}), 404
+    return jsonify(inference.get_stats())
+
+
+@app.route("/api/cluster/stats")
+def get_cluster_stats():
+    """Get detection nodes, their camera assignments and membership changes (cluster mode)."""
+    if coordinator is None:
+        return jsonify({"error": "Cluster mode is off (CLUSTER_ENABLED)"}), 404
+    return jsonify(coordinator.get_stats())
+
+
+@app.route("/api/delivery/stats")
+def get_delivery_stats():
+    """Get per-client frame delivery tiers, latency and drop counts."""
+    stats = delivery.get_stats()
+    stats["frame_cache"] = frame_cache.get_stats()
+    return jsonify(stats)
+
+
+@app.route("/metrics")
+def get_metrics():
+    """
+    Stage latencies, frame counts, reconnects and alert counters in Prometheus text format.
+
+    In cluster mode the nodes' counters and histograms (from their heartbeats) are
+    added in, so stage and detector timings cover every node.
+    """
+    for status in camera_statuses():
+        camera_id = status["id"]
+        metrics.CAMERA_FPS.labels(camera=camera_id).set(status.get("fps", 0))
+        metrics.CAMERA_STREAM_LAG.labels(camera=camera_id).set(status.get("stream_lag_ms", 0) / 1000)
+        metrics.CAMERA_CONNECTED.labels(camera=camera_id).set(1 if status["connected"] else 0)
+        metrics.CAMERA_SUBSCRIBERS.labels(camera=camera_id).set(
+            subscriptions.count(camera_id) + frame_cache.viewer_count(camera_id)
+        )
+    metrics.ALERTS_UNACKNOWLEDGED.labels().set(alert_manager.get_active_alert_count())
+    snapshots = coordinator.get_metric_snapshots() if coordinator is not None else ()
+    return Response(metrics.REGISTRY.render(snapshots), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/api/alerts")
 def get_alerts():
-    """Get recent alerts."""
-    return jsonify(alert_manager.get_recent_alerts(20))
+    """
+    Get alerts, newest first.
+
+    Query parameters: since / until (Unix timestamps), before_id, camera (camera
+    id), limit (max 500). To fetch the next page pass the last alert's timestamp
+    as until and its id as before_id.
+    """
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 500)
+    return jsonify(alert_manager.query_alerts(
+        since=request.args.get("since", type=float),
+        until=request.args.get("until", type=float),
+        camera_id=request.args.get("camera"),
+        limit=limit,
+        before_id=request.args.get("before_id")
+    ))
+
+
+@app.route("/api/alerts/dispatch/stats")
+def get_dispatch_stats():
+    """Get per-sink alert delivery counts, retries and latency."""
+    return jsonify(alert_dispatcher.get_stats())
+
+
+@app.route("/api/alerts/<alert_id>/snapshot")
+def get_alert_snapshot(alert_id):
+    """Annotated frame that triggered an alert."""
+    path = recorder.path_for(alert_id, "snapshot") if recorder is not None else None
+    if path is None:
+        return jsonify({"error": "No snapshot for this alert"}), 404
+    return send_file(path, mimetype="image/jpeg")
+
+
+@app.route("/api/alerts/<alert_id>/clip")
+def get_alert_clip(alert_id):
+    """Video from CLIP_PRE_SECONDS before to CLIP_POST_SECONDS after an alert."""
+    path = recorder.path_for(alert_id, "clip") if recorder is not None else None
+    if path is None:
+        return jsonify({"error": "No clip for this alert (yet)"}), 404
+    return send_file(path, mimetype="video/mp4", conditional=True)
 
 
 @app.route("/api/alerts/<alert_id>/acknowledge", methods=["POST"])
@@ -107,30 +388,107 @@ def acknowledge_alert(alert_id):
 @socketio.on("connect")
 def handle_connect():
     """Handle client connection."""
+    delivery.add_client(request.sid)
     print("Client connected")
     # Send current camera statuses
-    emit("camera_status", [cam.get_status() for cam in cameras.values()])
+    emit("camera_status", camera_statuses())
 
 
 @socketio.on("disconnect")
 def handle_disconnect():
     """Handle client disconnection."""
+    for camera_id in subscriptions.remove_client(request.sid):
+        update_watch(camera_id)
+    delivery.remove_client(request.sid)
     print("Client disconnected")
 
 
-def start_processing():
-    """Start processing threads for all cameras."""
-    for camera_id in cameras:
-        thread = threading.Thread(target=process_camera, args=(camera_id,), daemon=True)
-        thread.start()
+@socketio.on("subscribe")
+def handle_subscribe(data):
+    """Start sending a camera's frames to this client."""
+    camera_id = (data or {}).get("camera_id")
+    if camera_id not in camera_ids:
+        return {"success": False}
+    subscriptions.subscribe(request.sid, camera_id)
+    update_watch(camera_id)
+    return {"success": True}
 
 
-# Alert callback to emit via SocketIO
-def on_alert(alert):
-    socketio.emit("new_alert", alert.to_dict())
+@socketio.on("unsubscribe")
+def handle_unsubscribe(data):
+    """Stop sending a camera's frames to this client."""
+    camera_id = (data or {}).get("camera_id")
+    if camera_id not in camera_ids:
+        return {"success": False}
+    subscriptions.unsubscribe(request.sid, camera_id)
+    update_watch(camera_id)
+    return {"success": True}
 
 
-alert_manager.register_callback(on_alert)
+def start_processing():
+    """Start processing threads for all cameras (or, in cluster mode, the coordinator)."""
+    alert_dispatcher.start()
+    if recorder is not None:
+        recorder.start()
+    if coordinator is not None:
+        coordinator.start()
+    else:
+        inference.start()
+    for pipeline in pipelines.values():
+        thread = threading.Thread(target=pipeline.run, daemon=True)
+        thread.start()
+    report_cold_start()
+
+
+def report_cold_start(timeout: float = 120.0):
+    """Log how long startup took once the model is warm and every camera has delivered a frame."""
+    global cold_start_seconds
+    deadline = time.monotonic() + timeout
+    readiness_source = coordinator or inference
+    readiness_source.wait_until_ready(timeout)
+    while time.monotonic() < deadline and any(
+        status.get("first_frame_seconds") is None for status in camera_statuses()
+    ):
+        time.sleep(0.1)
+    cold_start_seconds = time.monotonic() - app_started
+
+    readiness = readiness_source.get_readiness()
+    statuses = camera_statuses()
+    waiting = [status["id"] for status in statuses if status.get("first_frame_seconds") is None]
+    if coordinator is not None:
+        print(f"Cold start: {cold_start_seconds:.2f}s ({len(readiness['nodes'])} detection nodes)")
+    else:
+        print(f"Cold start: {cold_start_seconds:.2f}s "
+              f"(model load {readiness['load_seconds']}s, warm-up {readiness['warmup_seconds']}s)")
+    for status in statuses:
+        if status.get("first_frame_seconds") is not None:
+            print(f"  {status['id']}: connected in {status['connect_seconds']:.2f}s, "
+                  f"first frame after {status['first_frame_seconds']:.2f}s")
+    if waiting or not readiness["ready"]:
+        print(f"  Still waiting after {timeout:.0f}s: {', '.join(waiting) or 'model'}")
+
+
+# Queue each new alert for the socket clients and webhooks (returns immediately)
+alert_manager.register_callback(alert_dispatcher.dispatch)
+
+coordinator = None
+if config.CLUSTER_ENABLED:
+    # Cameras are sharded across detection nodes, which send back frames, threats and clips
+    coordinator = ClusterCoordinator(
+        config.CAMERAS,
+        address=(config.CLUSTER_HOST, config.CLUSTER_PORT),
+        authkey=config.CLUSTER_AUTHKEY.encode(),
+        heartbeat_timeout=config.CLUSTER_HEARTBEAT_TIMEOUT,
+        local_nodes=config.CLUSTER_LOCAL_NODES,
+        local_command=[
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "node.py"),
+            "--exit-on-disconnect"
+        ],
+        on_frame=publish_node_frame,
+        on_threat=raise_node_alert,
+        on_clip=record_node_clip
+    )
+    atexit.register(coordinator.stop)
 
 
 if __name__ == "__main__":
@@ -138,8 +496,9 @@ if __name__ == "__main__":
     print("Intelligence Layer - School Threat Detection")
     print("=" * 50)
 
-    # Initialize cameras
-    init_cameras()
+    # Initialize cameras (detection nodes own them in cluster mode)
+    if coordinator is None:
+        init_cameras()
 
     # Start processing in background
     socketio.start_background_task(start_processing)
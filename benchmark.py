@@ -0,0 +1,340 @@
+"""
+Headless benchmark of the capture -> detect -> alert -> annotate -> encode -> emit pipeline.
+
+Simulates 1-64 cameras from the test pattern or looping recorded clips, drives the
+real WeaponDetector/AlertManager/JPEG path without a browser, and writes JSON so
+runs can be compared across commits.
+
+Usage:
+    python benchmark.py --cameras 1 4 8 --duration 30 --output bench.json
+    python benchmark.py --source clips/ --cameras 4 16 --backend onnx --model yolov8s.onnx
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+from detector import (
+    AlertManager, CameraStream, CascadeDetector, DetectionWorkerPool, InferenceScheduler, WeaponDetector
+)
+from detector.streaming import encode_jpeg
+
+STAGES = ["wait", "inference", "alert", "annotate", "encode", "emit", "end_to_end"]
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov")
+
+
+class CameraRecorder:
+    """Per-camera stage timings, kept per thread so recording needs no locking."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.frames = 0
+        self.frames_skipped = 0
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds)
+
+
+def summarize(values: List[float]) -> dict:
+    """Latency percentiles in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ms = np.asarray(values) * 1000
+    return {
+        "count": int(ms.size),
+        "mean": round(float(ms.mean()), 3),
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p90": round(float(np.percentile(ms, 90)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+        "max": round(float(ms.max()), 3)
+    }
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Not Linux: fall back to the peak RSS (kilobytes on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def camera_sources(source: str, count: int) -> List[str]:
+    """One camera url per simulated camera, cycling through clips if a directory is given."""
+    if os.path.isdir(source):
+        clips = sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        )
+        if not clips:
+            raise SystemExit(f"No video clips found in {source}")
+        return [clips[index % len(clips)] for index in range(count)]
+    return [source] * count
+
+
+def run_camera(
+    camera: CameraStream,
+    inference,
+    alert_manager: AlertManager,
+    recorder: CameraRecorder,
+    stop: threading.Event,
+    measuring: threading.Event,
+    annotate: bool,
+    max_fps: float
+):
+    """Mirror of app.process_camera without Socket.IO, timing every stage."""
+    frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+    last_seq = 0
+    next_due = 0.0
+
+    while not stop.is_set():
+        delay = next_due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        wait_start = time.perf_counter()
+        lease = camera.lease_frame(last_seq, timeout=1.0)
+        if lease is None:
+            continue
+        wait_end = time.perf_counter()
+        skipped = lease.seq - last_seq - 1 if last_seq else 0
+        last_seq = lease.seq
+        next_due = time.monotonic() + frame_interval
+
+        with lease:
+            detections = inference.infer(camera.camera_id, lease.frame, timeout=10.0)
+            inference_end = time.perf_counter()
+            if detections is None:
+                continue
+
+            for threat in detections.threats():
+                alert_manager.check_and_alert(
+                    camera_id=camera.camera_id,
+                    camera_name=camera.name,
+                    threat_type=threat.class_name,
+                    confidence=threat.confidence
+                )
+            alert_end = time.perf_counter()
+
+            frame = WeaponDetector.annotate(lease.frame, detections) if annotate else lease.frame
+            annotate_end = time.perf_counter()
+            jpeg = encode_jpeg(frame, 1.0, 70)
+            encode_end = time.perf_counter()
+
+            # Build the same payload process_frame hands to Socket.IO
+            payload = {
+                "camera_id": camera.camera_id,
+                "frame": jpeg,
+                "detections": len(detections),
+                "people": detections.person_count,
+                "threats": int(np.count_nonzero(detections.threat_mask))
+            }
+            json.dumps({k: v for k, v in payload.items() if k != "frame"})
+            emit_end = time.perf_counter()
+            captured_at = lease.captured_at
+
+        if not measuring.is_set():
+            continue
+        recorder.frames += 1
+        recorder.frames_skipped += skipped
+        recorder.record("wait", wait_end - wait_start)
+        recorder.record("inference", inference_end - wait_end)
+        recorder.record("alert", alert_end - inference_end)
+        recorder.record("annotate", annotate_end - alert_end)
+        recorder.record("encode", encode_end - annotate_end)
+        recorder.record("emit", emit_end - encode_end)
+        recorder.record("end_to_end", time.time() - captured_at)
+
+
+def run(args, camera_count: int, detector: Optional[WeaponDetector]) -> dict:
+    """Benchmark one camera count and return its results."""
+    if args.workers > 0:
+        inference = DetectionWorkerPool(
+            model_path=args.model,
+            confidence_threshold=args.conf,
+            backend=args.backend,
+            imgsz=args.imgsz,
+            num_workers=args.workers,
+            max_batch_size=args.batch_size,
+            detector_class=detector_class(args),
+            detector_options=detector_options(args)
+        )
+        inference.start()
+    else:
+        inference = InferenceScheduler(
+            detector,
+            max_batch_size=args.batch_size,
+            max_latency=args.max_latency_ms / 1000
+        )
+        inference.start()
+    inference.wait_until_ready()
+
+    alert_manager = AlertManager(cooldown_seconds=config.ALERT_COOLDOWN)
+    cameras = [
+        CameraStream(camera_id=f"bench{index}", name=f"Bench {index}", url=url)
+        for index, url in enumerate(camera_sources(args.source, camera_count))
+    ]
+    for camera in cameras:
+        camera.start()
+
+    stop = threading.Event()
+    measuring = threading.Event()
+    recorders = [CameraRecorder() for _ in cameras]
+    threads = [
+        threading.Thread(
+            target=run_camera,
+            args=(camera, inference, alert_manager, recorder, stop, measuring, not args.no_annotate, args.max_fps),
+            daemon=True
+        )
+        for camera, recorder in zip(cameras, recorders)
+    ]
+    for thread in threads:
+        thread.start()
+
+    print(f"[{camera_count} cameras] warming up for {args.warmup}s, measuring for {args.duration}s")
+    time.sleep(args.warmup)
+    measuring.set()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+    time.sleep(args.duration)
+    measuring.clear()
+    cpu_time, wall_time = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    memory = rss_mb()
+
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=15)
+    for camera in cameras:
+        camera.stop()
+    inference_stats = inference.get_stats()
+    inference_stats.pop("recent", None)
+    inference.stop()
+    # Worker processes have exited, so their CPU time is now visible
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    worker_cpu = (children.ru_utime + children.ru_stime) - (children_start.ru_utime + children_start.ru_stime)
+
+    fps = [recorder.frames / wall_time for recorder in recorders]
+    stages = {
+        stage: summarize([value for recorder in recorders for value in recorder.samples[stage]])
+        for stage in STAGES
+    }
+    result = {
+        "cameras": camera_count,
+        "duration_s": round(wall_time, 2),
+        "frames": sum(recorder.frames for recorder in recorders),
+        "frames_skipped": sum(recorder.frames_skipped for recorder in recorders),
+        "total_fps": round(sum(fps), 2),
+        "fps_per_camera": {
+            "mean": round(float(np.mean(fps)), 2),
+            "min": round(float(np.min(fps)), 2),
+            "max": round(float(np.max(fps)), 2)
+        },
+        "stages_ms": stages,
+        "cpu_percent": round(100 * cpu_time / wall_time, 1),
+        "worker_cpu_percent": round(100 * worker_cpu / wall_time, 1) if args.workers else None,
+        "rss_mb": round(memory, 1),
+        "inference": inference_stats
+    }
+    print(
+        f"[{camera_count} cameras] {result['total_fps']} FPS total, "
+        f"{result['fps_per_camera']['mean']} FPS/camera, "
+        f"inference p50 {stages['inference'].get('p50')} ms, "
+        f"end-to-end p90 {stages['end_to_end'].get('p90')} ms, "
+        f"CPU {result['cpu_percent']}%, RSS {result['rss_mb']} MB"
+    )
+    return result
+
+
+def detector_class(args) -> type:
+    return CascadeDetector if args.mode == "cascade" else WeaponDetector
+
+
+def detector_options(args) -> dict:
+    if args.mode == "cascade":
+        return {"person_model_path": args.person_model}
+    return {"tiling": args.tiling}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the detection pipeline without a browser")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 4], help="Camera counts to run (1-64)")
+    parser.add_argument("--source", default="test", help='"test" pattern, a video file, or a directory of clips')
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per camera count")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--backend", default=config.DETECTION_BACKEND)
+    parser.add_argument("--imgsz", type=int, default=config.INFERENCE_IMGSZ)
+    parser.add_argument("--conf", type=float, default=config.DETECTION_CONFIDENCE)
+    parser.add_argument("--tiling", choices=["grid", "person"], default=config.DETECTION_TILING or None)
+    parser.add_argument("--mode", choices=["full", "cascade"], default=config.DETECTION_MODE)
+    parser.add_argument("--person-model", default=config.PERSON_MODEL_PATH, help="Person model for --mode cascade")
+    parser.add_argument("--batch-size", type=int, default=config.INFERENCE_BATCH_SIZE)
+    parser.add_argument("--max-latency-ms", type=float, default=config.INFERENCE_MAX_LATENCY_MS)
+    parser.add_argument("--workers", type=int, default=0, help="Detection worker processes (0 = in-process)")
+    parser.add_argument("--max-fps", type=float, default=config.MAX_PROCESSING_FPS, help="Per-camera cap, 0 = none")
+    parser.add_argument("--no-annotate", action="store_true", help="Encode raw frames instead of annotated ones")
+    parser.add_argument("--output", help="Write results as JSON to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    for count in args.cameras:
+        if not 1 <= count <= 64:
+            parser.error("--cameras values must be between 1 and 64")
+
+    # In-process runs share one model across camera counts so load time is not measured
+    detector = None
+    if args.workers == 0:
+        detector = detector_class(args)(
+            model_path=args.model,
+            confidence_threshold=args.conf,
+            backend=args.backend,
+            imgsz=args.imgsz,
+            **detector_options(args)
+        )
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args)
+        },
+        "runs": [run(args, count, detector) for count in args.cameras]
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Builders for the per-camera detection pipeline, shared by the web server
+(app.py) and detection nodes (node.py) so both run cameras and models
+configured identically from config.py.
+"""
+import config
+from detector import (
+    CameraStream, WeaponDetector, CascadeDetector, InferenceScheduler,
+    DetectionWorkerPool, MotionGate, ObjectTracker
+)
+from detector.camera import DecodeOptions
+from detector.recorder import ClipBuffer
+
+
+def detector_setup():
+    """Detector class and its extra constructor options for DETECTION_MODE."""
+    if config.DETECTION_MODE == "cascade":
+        return CascadeDetector, {
+            "person_model_path": config.PERSON_MODEL_PATH,
+            "person_imgsz": config.PERSON_IMGSZ,
+            "person_confidence": config.PERSON_CONFIDENCE,
+            "crop_padding": config.CASCADE_CROP_PADDING,
+            "min_crop_size": config.CASCADE_MIN_CROP_SIZE
+        }
+    return WeaponDetector, {
+        "tiling": config.DETECTION_TILING or None,
+        "tile_size": config.TILE_SIZE,
+        "tile_overlap": config.TILE_OVERLAP
+    }
+
+
+def build_inference():
+    """Worker pool (DETECTION_WORKERS > 0) or in-process batching scheduler, not yet started."""
+    detector_class, detector_options = detector_setup()
+    if config.DETECTION_WORKERS > 0:
+        # Models live in worker processes; frames reach them through shared memory
+        return DetectionWorkerPool(
+            model_path=config.MODEL_PATH,
+            confidence_threshold=config.DETECTION_CONFIDENCE,
+            backend=config.DETECTION_BACKEND,
+            imgsz=config.INFERENCE_IMGSZ,
+            num_workers=config.DETECTION_WORKERS,
+            assignment=config.WORKER_CAMERA_ASSIGNMENT,
+            max_batch_size=config.INFERENCE_BATCH_SIZE,
+            detector_class=detector_class,
+            detector_options=detector_options
+        )
+
+    def build_detector():
+        return detector_class(
+            model_path=config.MODEL_PATH,
+            confidence_threshold=config.DETECTION_CONFIDENCE,
+            backend=config.DETECTION_BACKEND,
+            imgsz=config.INFERENCE_IMGSZ,
+            **detector_options
+        )
+
+    # The model loads and warms up on the batching thread, so the caller starts immediately
+    return InferenceScheduler(
+        max_batch_size=config.INFERENCE_BATCH_SIZE,
+        max_latency=config.INFERENCE_MAX_LATENCY_MS / 1000,
+        detector_factory=build_detector,
+        warmup=config.MODEL_WARMUP
+    )
+
+
+def camera_decode_options(cam_config: dict) -> dict:
+    """CAMERA_DECODE_DEFAULTS overridden by the camera's own "decode" key."""
+    overrides = cam_config.get("decode", {})
+    options = {**config.CAMERA_DECODE_DEFAULTS, **overrides}
+    options["ffmpeg_options"] = {
+        **config.CAMERA_DECODE_DEFAULTS.get("ffmpeg_options", {}),
+        **overrides.get("ffmpeg_options", {})
+    }
+    return options
+
+
+def build_camera(cam_config: dict) -> CameraStream:
+    """CameraStream (not yet started) for one CAMERAS entry, with a clip buffer when clips are recorded."""
+    clip_buffer = None
+    if config.CLIP_RECORDING_ENABLED:
+        clip_buffer = ClipBuffer(
+            seconds=config.CLIP_PRE_SECONDS + config.CLIP_POST_SECONDS + 1.0,
+            max_bytes=config.CLIP_BUFFER_MAX_MB * 1024 * 1024
+        )
+    return CameraStream(
+        camera_id=cam_config["id"],
+        name=cam_config["name"],
+        url=cam_config["url"],
+        sub_url=cam_config.get("sub_url"),
+        decode_options=DecodeOptions.from_dict(camera_decode_options(cam_config)),
+        clip_buffer=clip_buffer,
+        clip_fps=config.CLIP_FPS,
+        clip_quality=config.CLIP_JPEG_QUALITY,
+        low_latency=cam_config.get("low_latency", config.CAPTURE_LOW_LATENCY),
+        max_latency=config.CAPTURE_MAX_LATENCY,
+        latency_grace=config.CAPTURE_LATENCY_GRACE
+    )
+
+
+def build_motion_gate(cam_config: dict):
+    """MotionGate for the camera, or None when gating is off for it."""
+    if not cam_config.get("motion_gate", config.MOTION_GATE_ENABLED):
+        return None
+    return MotionGate(
+        width=config.MOTION_GATE_WIDTH,
+        min_changed_fraction=config.MOTION_MIN_CHANGED_FRACTION,
+        max_skip_seconds=config.MOTION_FORCE_INFERENCE_SECONDS
+    )
+
+
+def build_tracker():
+    """ObjectTracker for K-of-N threat confirmation, or None when TRACKING_ENABLED is off."""
+    if not config.TRACKING_ENABLED:
+        return None
+    return ObjectTracker(
+        iou_threshold=config.TRACK_IOU_THRESHOLD,
+        confirm_hits=config.TRACK_CONFIRM_HITS,
+        confirm_window=config.TRACK_CONFIRM_WINDOW,
+        max_misses=config.TRACK_MAX_MISSES
+    )
@@ -8,6 +8,17 @@ DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
 
 # Camera configuration
 # Format: {"name": "Camera Name", "url": "rtsp://..." or "webcam" for local camera}
+# Optional per-camera keys:
+#   "motion_gate": True/False - skip YOLO while the scene is static (default MOTION_GATE_ENABLED)
+#   "sub_url": "rtsp://..." - low-resolution stream decoded instead of "url", for inference AND the
+#              dashboard/MJPEG/clips (each camera is decoded once); "url" is only the fallback when the
+#              sub stream cannot be opened. Saves most of the decode CPU, but leave it unset for cameras
+#              that need full resolution, e.g. small objects with DETECTION_TILING
+#   "low_latency": True/False - grab/retrieve capture (default CAPTURE_LOW_LATENCY)
+#   "site": "..." - group for ALERT_SITE_CORRELATION (default ALERT_DEFAULT_SITE)
+#   "decode": {...} - overrides CAMERA_DECODE_DEFAULTS for this camera, e.g.
+#              {"threads": 2, "hw_accel": True, "max_width": 1280,
+#               "ffmpeg_options": {"rtsp_transport": "udp"}}
 if DEMO_MODE:
     # Demo mode: use webcam for all feeds (simulates multiple cameras)
     CAMERAS = [
@@ -23,28 +34,138 @@ else:
         {
             "id": "cam1",
             "name": "Main Entrance",
-            "url": os.getenv("CAMERA_1_URL", "rtsp://localhost:8554/stream1")
+            "url": os.getenv("CAMERA_1_URL", "rtsp://localhost:8554/stream1"),
+            "sub_url": os.getenv("CAMERA_1_SUB_URL")
         },
         {
             "id": "cam2",
             "name": "Hallway A",
-            "url": os.getenv("CAMERA_2_URL", "rtsp://localhost:8554/stream2")
+            "url": os.getenv("CAMERA_2_URL", "rtsp://localhost:8554/stream2"),
+            "sub_url": os.getenv("CAMERA_2_SUB_URL")
         },
         {
             "id": "cam3",
             "name": "Cafeteria",
-            "url": os.getenv("CAMERA_3_URL", "rtsp://localhost:8554/stream3")
+            "url": os.getenv("CAMERA_3_URL", "rtsp://localhost:8554/stream3"),
+            "sub_url": os.getenv("CAMERA_3_SUB_URL")
         },
         {
             "id": "cam4",
             "name": "Parking Lot",
-            "url": os.getenv("CAMERA_4_URL", "rtsp://localhost:8554/stream4")
+            "url": os.getenv("CAMERA_4_URL", "rtsp://localhost:8554/stream4"),
+            "sub_url": os.getenv("CAMERA_4_SUB_URL")
         },
     ]
 
+# Decode options for network cameras (merged with each camera's "decode" key)
+CAMERA_DECODE_DEFAULTS = {
+    "threads": 2,  # FFmpeg decoder threads per camera (0 = FFmpeg's default, often one per core)
+    "hw_accel": False,  # Use a hardware decoder when OpenCV was built with one
+    "max_width": 0,  # Downscale wider frames right after decode (0 = keep full resolution); opt in per camera
+    "ffmpeg_options": {
+        "rtsp_transport": "tcp",  # Fewer corrupt frames than UDP on busy networks
+        "fflags": "nobuffer",  # Low-delay: don't buffer input before decoding
+        "flags": "low_delay"
+    }
+}
+
+# Latency-bounded capture for network cameras: every packet is grabbed so
+# FFmpeg's buffer never backs up, but only frames a consumer is waiting for
+# are retrieved (the rest count as stale drops in /api/cameras)
+CAPTURE_LOW_LATENCY = True
+CAPTURE_MAX_LATENCY = 3.0  # Reconnect a stream this many seconds behind live (0 = never)...
+CAPTURE_LATENCY_GRACE = 5.0  # ...once it has stayed that far behind for this long
+
 # Detection settings
+# Backend: "ultralytics" (PyTorch .pt), "onnx" (.onnx via ONNX Runtime) or "openvino" (exported model dir)
+# Export CPU models with: python -m detector.export --format onnx
+DETECTION_BACKEND = os.getenv("DETECTION_BACKEND", "ultralytics")
+MODEL_PATH = os.getenv("MODEL_PATH", "yolov8s.pt")
+INFERENCE_IMGSZ = 640  # Model input size (fixed by the export for onnx/openvino)
 DETECTION_CONFIDENCE = 0.20  # Very low threshold to catch scissors
+# Sliced inference for small objects on high-resolution cameras: "grid" tiles the
+# whole frame, "person" tiles only around people from the full-frame pass, "" is off
+DETECTION_TILING = os.getenv("DETECTION_TILING", "")
+TILE_SIZE = 640  # Tile side in frame pixels (matching INFERENCE_IMGSZ runs tiles unscaled)
+TILE_OVERLAP = 0.2  # Fraction of a grid tile shared with its neighbours
+
+# Detection mode: "full" runs MODEL_PATH on whole frames; "cascade" finds people with a
+# small downscaled model and runs MODEL_PATH only on padded crops around them
+DETECTION_MODE = os.getenv("DETECTION_MODE", "full")
+PERSON_MODEL_PATH = os.getenv("PERSON_MODEL_PATH", "yolov8n.pt")
+PERSON_IMGSZ = 320  # Downscaled inference size for the person pass
+PERSON_CONFIDENCE = 0.35  # Minimum confidence for a person to get a weapon check
+CASCADE_CROP_PADDING = 0.5  # Margin around each person, as a fraction of their larger side
+CASCADE_MIN_CROP_SIZE = 256  # Smallest crop side in frame pixels
 WEAPON_CLASSES = ["knife", "scissors", "fork", "baseball bat"]  # COCO classes that could be weapons
 
 # Alert settings
 ALERT_COOLDOWN = 30  # Seconds between alerts for same camera (prevents duplicate counting)
+# Apply the cooldown per site instead of per camera, so one threat seen by several cameras
+# (e.g. a knife carried down a corridor) raises one alert; tracking itself is per camera
+ALERT_SITE_CORRELATION = True
+ALERT_DEFAULT_SITE = "main"  # Site of cameras without a "site" key
+ALERT_DB_PATH = os.getenv("ALERT_DB_PATH", "alerts.db")  # SQLite alert history (":memory:" to disable)
+# Webhooks POSTed every alert as JSON (comma-separated in .env)
+ALERT_WEBHOOK_URLS = [url.strip() for url in os.getenv("ALERT_WEBHOOK_URLS", "").split(",") if url.strip()]
+ALERT_DISPATCH_WORKERS = 2  # Delivery threads per sink (Socket.IO and each webhook have their own)
+ALERT_DISPATCH_QUEUE_SIZE = 256  # Per sink; deliveries queued beyond this are dropped (and counted)
+ALERT_DISPATCH_RETRIES = 3  # Retries per sink, with exponential backoff
+
+# Alert recordings: an annotated snapshot plus a clip around each alert, served at
+# /api/alerts/<id>/snapshot and /api/alerts/<id>/clip
+CLIP_RECORDING_ENABLED = True
+CLIP_PRE_SECONDS = 5.0  # Video kept from before the alert
+CLIP_POST_SECONDS = 5.0  # Video kept from after the alert
+CLIP_FPS = 5  # Frames per second kept in each camera's rolling JPEG buffer
+CLIP_JPEG_QUALITY = 60
+CLIP_BUFFER_MAX_MB = 16  # Memory cap per camera for the rolling buffer
+RECORDINGS_DIR = os.getenv("RECORDINGS_DIR", "recordings")
+RECORDINGS_MAX_MB = 2048  # Disk budget; the oldest recordings are deleted first
+
+# Tracking settings (a threat must be seen in K of the last N inferred frames to alert)
+TRACKING_ENABLED = True
+TRACK_CONFIRM_HITS = 3  # K
+TRACK_CONFIRM_WINDOW = 5  # N
+TRACK_IOU_THRESHOLD = 0.3  # Minimum overlap for a detection to continue a track
+TRACK_MAX_MISSES = 15  # Unmatched frames before a track is dropped
+
+# Processing settings
+MAX_PROCESSING_FPS = 15  # Upper bound on frames inferred and streamed per camera
+
+# Streaming settings (each client gets latest-frame-wins delivery adapted to its ack latency)
+STREAM_MAX_PENDING_MB = 32  # Cap on encoded frame data sent but not yet acknowledged
+STREAM_ACK_TIMEOUT = 5.0  # Seconds before an unacknowledged frame is written off
+# Dashboard draws detection boxes on a canvas from data sent with each raw
+# frame, so frames are not copied and annotated per frame on the server
+# (MJPEG streams and alert snapshots are still annotated server-side)
+CLIENT_OVERLAY = True
+MJPEG_QUALITY = 70  # JPEG quality for /stream/<camera_id>.mjpg
+
+# Motion gate settings (static scenes reuse the last detections instead of running YOLO)
+MOTION_GATE_ENABLED = False  # Default for cameras without a "motion_gate" key
+MOTION_GATE_WIDTH = 160  # Width of the downscaled grayscale frame compared to the background
+MOTION_MIN_CHANGED_FRACTION = 0.002  # Fraction of changed pixels that counts as motion
+MOTION_FORCE_INFERENCE_SECONDS = 5.0  # Run a full inference at least this often regardless
+
+# Detection worker processes (0 = run the model inside the web server process)
+DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", "0"))
+WORKER_CAMERA_ASSIGNMENT = {}  # Optional camera id -> worker index, e.g. {"cam1": 0, "cam2": 1}
+
+# Horizontal scaling: the web server becomes a coordinator (dashboard, alerts, recordings)
+# and CAMERAS are sharded across detection nodes (node.py), local or on other machines
+CLUSTER_ENABLED = os.getenv("CLUSTER_ENABLED", "false").lower() == "true"
+CLUSTER_HOST = os.getenv("CLUSTER_HOST", "127.0.0.1")  # Coordinator listen address (remote nodes need CLUSTER_AUTHKEY)
+CLUSTER_PORT = int(os.getenv("CLUSTER_PORT", "6010"))
+# Secret shared by the coordinator and nodes; messages are pickled, so anyone holding it can run
+# code on the coordinator. Required when CLUSTER_HOST is not loopback; if unset, local nodes get
+# a random per-run key. Generate one with: python -c "import secrets; print(secrets.token_hex(32))"
+CLUSTER_AUTHKEY = os.getenv("CLUSTER_AUTHKEY", "")
+CLUSTER_LOCAL_NODES = int(os.getenv("CLUSTER_LOCAL_NODES", "2"))  # Node processes the coordinator starts itself
+CLUSTER_HEARTBEAT_INTERVAL = 1.0  # Seconds between node status reports
+CLUSTER_HEARTBEAT_TIMEOUT = 5.0  # Silence after which a node's cameras are moved to other nodes
+
+# Inference batching settings
+INFERENCE_BATCH_SIZE = 8  # Maximum frames (one per camera) per YOLO forward pass
+MODEL_WARMUP = True  # Run a blank batch after the (background) model load, before the first real frame
+INFERENCE_MAX_LATENCY_MS = 20  # Longest a frame waits for other cameras before the batch runs
@@ -1,3 +1,9 @@
 from .camera import CameraStream
-from .yolo_detector import WeaponDetector
+from .yolo_detector import WeaponDetector, Detection, Detections
+from .cascade import CascadeDetector
 from .alert import AlertManager
+from .scheduler import InferenceScheduler
+from .motion import MotionGate
+from .workers import DetectionWorkerPool
+from .tracker import ObjectTracker
+from .pipeline import CameraPipeline
@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 import json
 
+from .metrics import ALERTS_SUPPRESSED, ALERTS_TOTAL
+
 
 @dataclass
 class Alert:
@@ -15,6 +17,7 @@ class Alert:
     confidence: float
     timestamp: float
     acknowledged: bool = False
+    track_id: Optional[int] = None  # Tracker id of the confirmed threat, if tracking is on
 
     def to_dict(self) -> dict:
         return {
@@ -25,28 +28,41 @@ class Alert:
             "confidence": self.confidence,
             "timestamp": self.timestamp,
             "time_str": datetime.fromtimestamp(self.timestamp).strftime("%H:%M:%S"),
-            "acknowledged": self.acknowledged
+            "acknowledged": self.acknowledged,
+            "track_id": self.track_id
         }
 
 
 class AlertManager:
     """Manages threat alerts with cooldown and logging."""
 
-    def __init__(self, cooldown_seconds: float = 10.0):
+    def __init__(self, cooldown_seconds: float = 10.0, store=None, verbose: bool = True):
         """
         Initialize alert manager.
 
         Args:
             cooldown_seconds: Minimum time between alerts for same camera
+            store: AlertStore holding the alert history (default: an in-memory,
+                non-persistent store)
+            verbose: Print every alert raised
         """
+        if store is None:
+            from .alert_store import AlertStore
+
+            store = AlertStore(":memory:")
         self.cooldown_seconds = cooldown_seconds
         self.last_alert_time: Dict[str, float] = {}
-        self.alerts: List[Alert] = []
-        self.alert_counter = 0
+        self.store = store
         self.callbacks: List[callable] = []
+        self.verbose = verbose
 
     def register_callback(self, callback: callable):
-        """Register a callback to be called when new alert is triggered."""
+        """
+        Register a callback to be called when new alert is triggered.
+
+        Callbacks run on the detecting camera's thread, so they must not block
+        (hand slow work to an AlertDispatcher).
+        """
         self.callbacks.append(callback)
 
     def check_and_alert(
@@ -54,38 +70,48 @@ class AlertManager:
         camera_id: str,
         camera_name: str,
         threat_type: str,
-        confidence: float
+        confidence: float,
+        track_id: Optional[int] = None,
+        timestamp: Optional[float] = None,
+        site: Optional[str] = None
     ) -> Optional[Alert]:
         """
         Check if we should create an alert (respecting cooldown).
 
+        timestamp is when the threat was seen (default now); offline scans pass
+        the recording time so the cooldown follows the footage, not the scan.
+
+        site groups cameras that see the same people (a building, a floor):
+        the cooldown then applies per site and threat type, so a knife carried
+        past several cameras raises one alert rather than one per camera.
+
         Returns Alert if created, None if in cooldown.
         """
-        current_time = time.time()
-
-        # Check cooldown per camera+threat_type combo (same scissors won't spam)
-        cooldown_key = f"{camera_id}_{threat_type.lower()}"
-        last_time = self.last_alert_time.get(cooldown_key, 0)
-        if current_time - last_time < self.cooldown_seconds:
+        current_time = time.time() if timestamp is None else timestamp
+
+        # Check cooldown per camera (or site) + threat_type combo (same scissors won't spam)
+        scope = camera_id if site is None else f"site:{site}"
+        cooldown_key = f"{scope}_{threat_type.lower()}"
+        last_time = self.last_alert_time.get(cooldown_key)
+        if last_time is not None and current_time - last_time < self.cooldown_seconds:
+            ALERTS_SUPPRESSED.labels(camera=camera_id, threat_type=threat_type).inc()
             return None
 
-        # Create alert
-        self.alert_counter += 1
+        # Create alert (numbering continues from the stored history)
+        seq = self.store.next_sequence()
         alert = Alert(
-            id=f"alert_{self.alert_counter}",
+            id=f"alert_{seq}",
             camera_id=camera_id,
             camera_name=camera_name,
             threat_type=threat_type,
             confidence=confidence,
-            timestamp=current_time
+            timestamp=current_time,
+            track_id=track_id
         )
 
-        self.alerts.append(alert)
+        self.store.add(alert, seq)
         self.last_alert_time[cooldown_key] = current_time
-
-        # Keep only last 100 alerts
-        if len(self.alerts) > 100:
-            self.alerts = self.alerts[-100:]
+        ALERTS_TOTAL.labels(camera=camera_id, threat_type=threat_type).inc()
 
         # Trigger callbacks
         for callback in self.callbacks:
@@ -94,21 +120,33 @@ class AlertManager:
             except Exception as e:
                 print(f"Alert callback error: {e}")
 
-        print(f"🚨 ALERT: {threat_type} detected on {camera_name} (confidence: {confidence:.2f})")
+        if self.verbose:
+            print(f"🚨 ALERT: {threat_type} detected on {camera_name} (confidence: {confidence:.2f})")
         return alert
 
     def get_recent_alerts(self, count: int = 10) -> List[dict]:
         """Get the most recent alerts."""
-        return [a.to_dict() for a in reversed(self.alerts[-count:])]
+        return self.store.query(limit=count)
+
+    def query_alerts(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        camera_id: Optional[str] = None,
+        limit: int = 20,
+        before_id: Optional[str] = None
+    ) -> List[dict]:
+        """Get alerts newest first, filtered by time range and camera (see AlertStore.query)."""
+        return self.store.query(since=since, until=until, camera_id=camera_id, limit=limit, before_id=before_id)
+
+    def get_alert(self, alert_id: str) -> Optional[Alert]:
+        """Look up one alert by id."""
+        return self.store.get(alert_id)
 
     def acknowledge_alert(self, alert_id: str) -> bool:
         """Mark an alert as acknowledged."""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                alert.acknowledged = True
-                return True
-        return False
+        return self.store.acknowledge(alert_id)
 
     def get_active_alert_count(self) -> int:
         """Get count of unacknowledged alerts."""
-        return sum(1 for a in self.alerts if not a.acknowledged)
+        return self.store.unacknowledged
@@ -0,0 +1,286 @@
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from .alert import Alert
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    camera_id TEXT NOT NULL,
+    camera_name TEXT NOT NULL,
+    threat_type TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    timestamp REAL NOT NULL,
+    acknowledged INTEGER NOT NULL DEFAULT 0,
+    track_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS alerts_timestamp ON alerts (timestamp);
+CREATE INDEX IF NOT EXISTS alerts_camera_timestamp ON alerts (camera_id, timestamp);
+CREATE INDEX IF NOT EXISTS alerts_unacknowledged ON alerts (acknowledged) WHERE acknowledged = 0;
+"""
+
+_COLUMNS = "id, seq, camera_id, camera_name, threat_type, confidence, timestamp, acknowledged, track_id"
+
+
+class AlertStore:
+    """
+    Durable alert history in SQLite (WAL mode).
+
+    Writes are queued and committed in batches by a background thread, so
+    recording an alert never waits on disk. Recent and unacknowledged alerts
+    are also held in an id index, which makes acknowledgement O(1) and lets
+    queries include alerts that are not yet flushed.
+    """
+
+    def __init__(self, path: str = "alerts.db", flush_interval: float = 0.5, index_size: int = 1000):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite database file, or ":memory:" for a store that is not persisted
+            flush_interval: Longest a queued write waits before it is committed
+            index_size: Recent alerts kept in memory in addition to unacknowledged ones
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.index_size = index_size
+        self.write_queue: "queue.Queue" = queue.Queue()
+        self.lock = threading.Lock()  # Guards the index, counters and pending set
+        self.index: "OrderedDict[str, Alert]" = OrderedDict()
+        self.pending: Set[str] = set()  # Alert ids queued but not yet committed
+
+        in_memory = path == ":memory:"
+        self.write_conn = self._connect()
+        # An in-memory database exists per connection, so readers share the writer's
+        self.read_conn = self.write_conn if in_memory else self._connect()
+        self.write_lock = threading.Lock()
+        self.read_lock = self.write_lock if in_memory else threading.Lock()
+        if not in_memory:
+            self.write_conn.execute("PRAGMA journal_mode=WAL")
+            self.write_conn.execute("PRAGMA synchronous=NORMAL")
+        self.write_conn.executescript(_SCHEMA)
+
+        self.last_seq, self.unacknowledged = self.write_conn.execute(
+            "SELECT COALESCE(MAX(seq), 0), COALESCE(SUM(acknowledged = 0), 0) FROM alerts"
+        ).fetchone()
+        # Unacknowledged alerts from earlier runs can still be acknowledged without a scan
+        for row in self.write_conn.execute(
+            f"SELECT {_COLUMNS} FROM alerts WHERE acknowledged = 0 ORDER BY timestamp"
+        ):
+            alert = self._row_to_alert(row)
+            self.index[alert.id] = alert
+
+        self.batches_written = 0
+        self.running = True
+        self.writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    @staticmethod
+    def _row_to_alert(row) -> Alert:
+        alert_id, _, camera_id, camera_name, threat_type, confidence, timestamp, acknowledged, track_id = row
+        return Alert(
+            id=alert_id,
+            camera_id=camera_id,
+            camera_name=camera_name,
+            threat_type=threat_type,
+            confidence=confidence,
+            timestamp=timestamp,
+            acknowledged=bool(acknowledged),
+            track_id=track_id
+        )
+
+    def next_sequence(self) -> int:
+        """Reserve the next alert number (continues across restarts)."""
+        with self.lock:
+            self.last_seq += 1
+            return self.last_seq
+
+    def add(self, alert: Alert, seq: int):
+        """Record a new alert. Returns immediately; the write happens in the background."""
+        with self.lock:
+            self.index[alert.id] = alert
+            self.pending.add(alert.id)
+            if not alert.acknowledged:
+                self.unacknowledged += 1
+            self._trim_index()
+        self.write_queue.put(("insert", alert, seq))
+
+    def _trim_index(self):
+        """Drop the oldest acknowledged alerts beyond index_size (lock held)."""
+        excess = len(self.index) - self.index_size
+        if excess <= 0:
+            return
+        for alert_id in list(self.index):
+            if excess <= 0:
+                break
+            if self.index[alert_id].acknowledged and alert_id not in self.pending:
+                del self.index[alert_id]
+                excess -= 1
+
+    def get(self, alert_id: str) -> Optional[Alert]:
+        """Look up one alert, from memory if possible."""
+        with self.lock:
+            alert = self.index.get(alert_id)
+        if alert is not None:
+            return alert
+        with self.read_lock:
+            row = self.read_conn.execute(f"SELECT {_COLUMNS} FROM alerts WHERE id = ?", (alert_id,)).fetchone()
+        return self._row_to_alert(row) if row else None
+
+    def acknowledge(self, alert_id: str) -> bool:
+        """Mark an alert as acknowledged. Returns False if it does not exist."""
+        with self.lock:
+            alert = self.index.get(alert_id)
+            if alert is not None:
+                if not alert.acknowledged:
+                    alert.acknowledged = True
+                    self.unacknowledged -= 1
+                    self.write_queue.put(("ack", alert_id))
+                return True
+
+        # Acknowledged alerts that aged out of the index are only on disk
+        alert = self.get(alert_id)
+        return alert is not None
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        camera_id: Optional[str] = None,
+        limit: int = 20,
+        before_id: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Alerts newest first (ties broken by id), filtered by time range and camera.
+
+        Args:
+            since: Only alerts at or after this Unix timestamp
+            until: Only alerts before this Unix timestamp
+            camera_id: Only alerts from this camera
+            limit: Maximum number of alerts returned
+            before_id: With until, also include alerts at exactly until whose id
+                sorts before this one. Pass the timestamp and id of the last alert
+                of a page to get the next page without skipping alerts that
+                share its timestamp
+        """
+        conditions = []
+        params: list = []
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            if before_id is not None:
+                conditions.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+                params.extend([until, until, before_id])
+            else:
+                conditions.append("timestamp < ?")
+                params.append(until)
+        if camera_id is not None:
+            conditions.append("camera_id = ?")
+            params.append(camera_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.read_lock:
+            rows = self.read_conn.execute(
+                f"SELECT {_COLUMNS} FROM alerts {where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+        results: Dict[str, Alert] = {}
+        with self.lock:
+            for row in rows:
+                # The in-memory copy may hold an acknowledgement not yet written
+                results[row[0]] = self.index.get(row[0]) or self._row_to_alert(row)
+            for alert_id in self.pending:
+                alert = self.index.get(alert_id)
+                if alert is None or (camera_id is not None and alert.camera_id != camera_id):
+                    continue
+                if (since is None or alert.timestamp >= since) and _before(alert, until, before_id):
+                    results[alert_id] = alert
+
+        ordered = sorted(results.values(), key=lambda alert: (alert.timestamp, alert.id), reverse=True)
+        return [alert.to_dict() for alert in ordered[:limit]]
+
+    def _writer_loop(self):
+        """Commit queued inserts and acknowledgements in batches."""
+        while True:
+            try:
+                operation = self.write_queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if not self.running:
+                    break
+                continue
+            if operation is None:
+                break
+
+            batch = [operation]
+            while True:
+                try:
+                    operation = self.write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if operation is None:
+                    self.running = False
+                    break
+                batch.append(operation)
+            self._write(batch)
+            if not self.running and self.write_queue.empty():
+                break
+
+    def _write(self, batch: list):
+        inserts = [
+            (alert.id, seq, alert.camera_id, alert.camera_name, alert.threat_type, float(alert.confidence),
+             alert.timestamp, int(alert.acknowledged), alert.track_id)
+            for _, alert, seq in (op for op in batch if op[0] == "insert")
+        ]
+        acks = [(op[1],) for op in batch if op[0] == "ack"]
+        try:
+            with self.write_lock, self.write_conn:
+                if inserts:
+                    self.write_conn.executemany(
+                        f"INSERT OR REPLACE INTO alerts ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        inserts
+                    )
+                if acks:
+                    self.write_conn.executemany("UPDATE alerts SET acknowledged = 1 WHERE id = ?", acks)
+            self.batches_written += 1
+        except sqlite3.Error as e:
+            print(f"Alert store write error: {e}")
+        with self.lock:
+            for row in inserts:
+                self.pending.discard(row[0])
+
+    def close(self):
+        """Flush queued writes and close the database."""
+        if not self.running:
+            return
+        self.running = False
+        self.write_queue.put(None)
+        self.writer.join(timeout=5)
+        with self.write_lock:
+            self.write_conn.close()
+            if self.read_conn is not self.write_conn:
+                self.read_conn.close()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "indexed": len(self.index),
+                "pending_writes": self.write_queue.qsize(),
+                "unacknowledged": self.unacknowledged,
+                "batches_written": self.batches_written
+            }
+
+
+def _before(alert: Alert, until: Optional[float], before_id: Optional[str]) -> bool:
+    """Whether an alert falls before the (until, before_id) page cursor."""
+    if until is None or alert.timestamp < until:
+        return True
+    return before_id is not None and alert.timestamp == until and alert.id < before_id
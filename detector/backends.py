@@ -0,0 +1,228 @@
+import ast
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from .ops import letterbox, nms
+
+# Per-frame raw model output: (boxes (N, 4) float32 xyxy, confidences (N,), class_ids (N,))
+BackendOutput = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class InferenceBackend(ABC):
+    """Runs a detection model on batches of BGR frames."""
+
+    name = "base"
+
+    def __init__(self, model_path: str, imgsz: int = 640):
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.names: Dict[int, str] = {}
+
+    @abstractmethod
+    def predict(
+        self,
+        frames: List[np.ndarray],
+        confidence_threshold: float,
+        imgsz: Optional[int] = None
+    ) -> List[BackendOutput]:
+        """
+        Run the model on a batch of frames.
+
+        Args:
+            frames: BGR images from OpenCV (may differ in size)
+            confidence_threshold: Minimum confidence for detections
+            imgsz: Inference size override (defaults to the backend's imgsz)
+
+        Returns:
+            One (boxes, confidences, class_ids) tuple per frame, boxes in frame pixels
+        """
+
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch model run through the ultralytics YOLO wrapper."""
+
+    name = "ultralytics"
+
+    def __init__(self, model_path: str, imgsz: int = 640):
+        super().__init__(model_path, imgsz)
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def predict(self, frames, confidence_threshold, imgsz=None):
+        results = self.model(frames, verbose=False, conf=confidence_threshold, imgsz=imgsz or self.imgsz)
+        outputs = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                outputs.append(_empty_output())
+                continue
+            # One device-to-host transfer per tensor instead of one per box
+            outputs.append((
+                boxes.xyxy.cpu().numpy().astype(np.float32),
+                boxes.conf.cpu().numpy().astype(np.float32),
+                boxes.cls.cpu().numpy().astype(np.int32)
+            ))
+        return outputs
+
+
+class _ExportedBackend(InferenceBackend, ABC):
+    """Shared letterbox preprocessing and NMS postprocessing for exported YOLOv8 graphs."""
+
+    iou_threshold = 0.45
+    max_detections = 300
+
+    # Set by subclasses: whether the compiled graph accepts batches larger than one
+    dynamic_batch = False
+
+    @abstractmethod
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        """Run the graph on an (N, 3, S, S) float32 batch, returning (N, 4 + classes, anchors)."""
+
+    def _preprocess(self, frames: List[np.ndarray], size: int):
+        batch = np.empty((len(frames), 3, size, size), dtype=np.float32)
+        transforms = []
+        for index, frame in enumerate(frames):
+            padded, gain, pad = letterbox(frame, size)
+            # BGR HWC uint8 -> RGB CHW float in [0, 1]
+            batch[index] = padded[:, :, ::-1].transpose(2, 0, 1) * (1.0 / 255.0)
+            transforms.append((gain, pad, frame.shape[:2]))
+        return batch, transforms
+
+    def _postprocess(self, raw: np.ndarray, confidence_threshold: float, transform) -> BackendOutput:
+        gain, (pad_x, pad_y), (height, width) = transform
+        predictions = raw.T  # (anchors, 4 + classes)
+        class_scores = predictions[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        confidences = class_scores[np.arange(len(class_ids)), class_ids]
+        mask = confidences >= confidence_threshold
+        if not mask.any():
+            return _empty_output()
+
+        cx, cy, w, h = predictions[mask, :4].T
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        confidences = confidences[mask]
+        class_ids = class_ids[mask]
+
+        keep = nms(boxes, confidences, class_ids, self.iou_threshold, self.max_detections)
+        boxes = boxes[keep]
+        # Undo the letterbox and clip to the original frame
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_x) / gain).clip(0, width)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_y) / gain).clip(0, height)
+        return boxes.astype(np.float32), confidences[keep].astype(np.float32), class_ids[keep].astype(np.int32)
+
+    def predict(self, frames, confidence_threshold, imgsz=None):
+        if not frames:
+            return []
+        batch, transforms = self._preprocess(frames, imgsz or self.imgsz)
+        if self.dynamic_batch:
+            raw = self._run(batch)
+        else:
+            raw = np.concatenate([self._run(batch[index:index + 1]) for index in range(len(frames))])
+        return [
+            self._postprocess(raw[index], confidence_threshold, transform)
+            for index, transform in enumerate(transforms)
+        ]
+
+
+class OnnxBackend(_ExportedBackend):
+    """Exported ONNX model run with ONNX Runtime (CPU by default)."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, imgsz: int = 640, threads: int = 0):
+        super().__init__(model_path, imgsz)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx backend requires onnxruntime (pip install onnxruntime)") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=ort.get_available_providers())
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Symbolic dimensions mean the model was exported with dynamic=True
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.dynamic_size = not isinstance(model_input.shape[2], int)
+        if not self.dynamic_size:
+            self.imgsz = model_input.shape[2]
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if "names" not in metadata:
+            raise ValueError(f"{model_path} has no class names in its metadata; export it with ultralytics")
+        self.names = ast.literal_eval(metadata["names"])
+
+    def _run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def predict(self, frames, confidence_threshold, imgsz=None):
+        # Exported graphs have a fixed input size unless exported with dynamic=True
+        return super().predict(frames, confidence_threshold, imgsz if self.dynamic_size else None)
+
+
+class OpenVinoBackend(_ExportedBackend):
+    """Exported OpenVINO IR model (optionally INT8) run on the OpenVINO CPU plugin."""
+
+    name = "openvino"
+
+    def __init__(self, model_path: str, imgsz: int = 640, device: str = "CPU"):
+        super().__init__(model_path, imgsz)
+        try:
+            import openvino as ov
+        except ImportError as e:
+            raise ImportError("The openvino backend requires openvino (pip install openvino)") from e
+        import yaml
+
+        # Accept either the export directory or the .xml file inside it
+        if os.path.isdir(model_path):
+            xml_files = [name for name in os.listdir(model_path) if name.endswith(".xml")]
+            if not xml_files:
+                raise FileNotFoundError(f"No OpenVINO .xml model in {model_path}")
+            model_dir, xml_path = model_path, os.path.join(model_path, xml_files[0])
+        else:
+            model_dir, xml_path = os.path.dirname(model_path), model_path
+
+        core = ov.Core()
+        model = core.read_model(xml_path)
+        self.dynamic_batch = model.input(0).get_partial_shape()[0].is_dynamic
+        self.compiled = core.compile_model(model, device, {"PERFORMANCE_HINT": "THROUGHPUT"})
+
+        with open(os.path.join(model_dir, "metadata.yaml")) as f:
+            metadata = yaml.safe_load(f)
+        self.names = {int(k): v for k, v in metadata["names"].items()}
+        self.imgsz = int(metadata.get("imgsz", [imgsz])[0])
+
+    def _run(self, batch):
+        return self.compiled(batch)[0]
+
+    def predict(self, frames, confidence_threshold, imgsz=None):
+        return super().predict(frames, confidence_threshold, None)
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxBackend.name: OnnxBackend,
+    OpenVinoBackend.name: OpenVinoBackend,
+}
+
+
+def create_backend(name: str, model_path: str, imgsz: int = 640) -> InferenceBackend:
+    """Instantiate an inference backend by name ("ultralytics", "onnx" or "openvino")."""
+    backend_class = BACKENDS.get(name.lower())
+    if backend_class is None:
+        raise ValueError(f"Unknown detection backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return backend_class(model_path, imgsz)
+
+
+def _empty_output() -> BackendOutput:
+    return (
+        np.empty((0, 4), dtype=np.float32),
+        np.empty(0, dtype=np.float32),
+        np.empty(0, dtype=np.int32)
+    )
@@ -2,35 +2,228 @@ import cv2
 import threading
 import time
 import os
-from typing import Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 
+from .metrics import CAMERA_RECONNECTS, FRAMES_TOTAL, PIPELINE_STAGE_SECONDS
+from .recorder import ClipBuffer
+
 # Skip macOS camera authorization prompt (user must grant permission separately)
 os.environ["OPENCV_AVFOUNDATION_SKIP_AUTH"] = "1"
 
+# Weight of the newest frame interval in the smoothed FPS
+FPS_SMOOTHING = 0.1
+# Weight of the newest sample in the smoothed capture-to-display latency
+LATENCY_SMOOTHING = 0.1
+
+# OpenCV reads FFmpeg capture options from this process-wide variable when a
+# capture is opened
+FFMPEG_OPTIONS_ENV = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+
+
+class _CaptureOptionsGate:
+    """
+    Serialises FFmpeg capture opens that need different options.
+
+    Opening an RTSP stream blocks until the camera answers, so opens that
+    share the same options (the usual case) run concurrently and only a
+    camera with different options waits for the others to finish opening.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.options: Optional[str] = None
+        self.users = 0
+        self.previous: Optional[str] = None
+
+    @contextmanager
+    def use(self, options: str):
+        with self.condition:
+            self.condition.wait_for(lambda: self.users == 0 or self.options == options)
+            if self.users == 0:
+                self.options = options
+                self.previous = os.environ.get(FFMPEG_OPTIONS_ENV)
+                if options:
+                    os.environ[FFMPEG_OPTIONS_ENV] = options
+            self.users += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.users -= 1
+                if self.users == 0:
+                    if self.previous is None:
+                        os.environ.pop(FFMPEG_OPTIONS_ENV, None)
+                    else:
+                        os.environ[FFMPEG_OPTIONS_ENV] = self.previous
+                    self.options = None
+                    self.condition.notify_all()
+
+
+_capture_options_gate = _CaptureOptionsGate()
+
+
+@dataclass
+class DecodeOptions:
+    """How a network stream is opened and decoded."""
+    threads: int = 0  # FFmpeg decoder threads (0 = FFmpeg's default)
+    hw_accel: bool = False  # Ask OpenCV for any available hardware decoder
+    max_width: int = 0  # Downscale wider frames as they are decoded (0 = keep full size)
+    ffmpeg_options: Dict[str, str] = field(default_factory=dict)  # e.g. {"rtsp_transport": "tcp"}
+
+    @classmethod
+    def from_dict(cls, options: Optional[dict]) -> "DecodeOptions":
+        options = dict(options or {})
+        return cls(
+            threads=int(options.get("threads", 0)),
+            hw_accel=bool(options.get("hw_accel", False)),
+            max_width=int(options.get("max_width", 0)),
+            ffmpeg_options={str(k): str(v) for k, v in (options.get("ffmpeg_options") or {}).items()}
+        )
+
+    def capture_options(self) -> str:
+        """Options in OpenCV's "key;value|key;value" format."""
+        options = dict(self.ffmpeg_options)
+        if self.threads:
+            options["threads"] = str(self.threads)
+        return "|".join(f"{key};{value}" for key, value in options.items())
+
+
+class FrameLease:
+    """
+    Read-only view of a frame in a camera's ring buffer.
+
+    The capture thread will not overwrite the underlying buffer until the
+    lease is released, so hold it only as long as the frame is in use.
+    """
+
+    __slots__ = ("seq", "frame", "captured_at", "_camera", "_slot", "_released")
+
+    def __init__(self, camera: "CameraStream", slot: int, seq: int, frame: np.ndarray, captured_at: float):
+        self.seq = seq
+        self.frame = frame
+        self.captured_at = captured_at  # time.time() when the frame was grabbed from the camera
+        self._camera = camera
+        self._slot = slot
+        self._released = False
+
+    def release(self):
+        """Return the buffer to the capture thread. Safe to call more than once."""
+        if not self._released:
+            self._released = True
+            self._camera._release_slot(self._slot)
+
+    def __enter__(self) -> "FrameLease":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
 
 class CameraStream:
-    """Handles RTSP camera stream with automatic reconnection."""
+    """
+    Handles RTSP camera stream with automatic reconnection.
 
-    def __init__(self, camera_id: str, name: str, url: str):
+    The url may also be "webcam", "test" (generated test pattern) or a video
+    file path / file:// URL, which is replayed in a loop at the clip's frame rate.
+
+    In low-latency mode, network streams are drained with grab() on every
+    packet, but frames are only retrieved (converted and copied into the
+    ring) when a consumer is waiting for one, a clip frame is due, or the
+    last retrieved frame is older than idle_retrieve_interval. Frames grabbed
+    and skipped are counted as stale drops. A stream that keeps falling
+    behind live by more than max_latency is reconnected, which flushes
+    whatever FFmpeg has buffered.
+
+    The frame ring grows when every buffer is leased, up to max_ring_size;
+    past that (a consumer holding on to leases) new frames are dropped
+    rather than allocating without bound.
+    """
+
+    def __init__(
+        self,
+        camera_id: str,
+        name: str,
+        url: str,
+        ring_size: int = 4,
+        max_ring_size: int = 16,
+        sub_url: Optional[str] = None,
+        decode_options: Optional[DecodeOptions] = None,
+        clip_buffer: Optional[ClipBuffer] = None,
+        clip_fps: float = 5.0,
+        clip_quality: int = 60,
+        low_latency: bool = False,
+        max_latency: float = 0.0,
+        latency_grace: float = 5.0,
+        idle_retrieve_interval: float = 1.0
+    ):
         self.camera_id = camera_id
         self.name = name
         self.url = url
+        # Low-resolution stream decoded instead of url when set (url is the fallback)
+        self.sub_url = sub_url
+        self.active_url: Optional[str] = None
+        self.decode = decode_options or DecodeOptions()
+        self.decode_buffer: Optional[np.ndarray] = None  # Full-size frame before downscaling
         self.cap: Optional[cv2.VideoCapture] = None
         self.frame: Optional[np.ndarray] = None
+        # Preallocated frame buffers decoded into in turn; slots in use by a
+        # lease or holding the latest frame are never written
+        self.ring: List[Optional[np.ndarray]] = [None] * max(2, ring_size)
+        self.ring_refs: List[int] = [0] * len(self.ring)
+        self.ring_times: List[float] = [0.0] * len(self.ring)
+        self.latest_slot = -1
+        self.max_ring_size = max(len(self.ring), max_ring_size)
+        self.ring_full = False  # Logged once per episode of every buffer being leased
+        self.ring_full_drops = 0
         self.running = False
         self.connected = False
         self.lock = threading.Lock()
+        # Signalled whenever a new frame is stored; shares the frame lock
+        self.frame_ready = threading.Condition(self.lock)
+        self.frame_seq = 0  # Increments once per captured frame, never reset
         self.thread: Optional[threading.Thread] = None
         self.last_frame_time = 0
-        self.fps = 0
+        self.fps = 0  # Smoothed (EWMA of the frame interval), not the last interval alone
+        self.frame_interval = 0.0
+        self.reconnects = 0
         self.use_test_pattern = False
+        self.replay_file = False
+        self.replay_interval = 0.0
+        self.next_replay_time = 0.0
+        # Recent frames as JPEG for alert clips, sampled at clip_fps to keep encoding cheap
+        self.clip_buffer = clip_buffer
+        self.clip_interval = 1.0 / clip_fps if clip_fps > 0 else 0.0
+        self.clip_quality = clip_quality
+        self.next_clip_time = 0.0
+        # Latency bounding (network streams only)
+        self.low_latency = low_latency
+        self.max_latency = max_latency  # Reconnect when this far behind live (0 = never)
+        self.latency_grace = latency_grace  # ...for at least this many seconds
+        self.idle_retrieve_interval = idle_retrieve_interval
+        self.live_stream = False  # Set on connect: a network stream rather than test/webcam/file
+        self.waiters = 0  # Consumers blocked waiting for a new frame
+        self.last_retrieve_time = 0.0
+        self.stream_origin: Optional[float] = None  # Wall clock minus stream position at the least-lagged frame
+        self.stream_lag = 0.0  # Seconds the grabbed frame is behind live
+        self.lagging_since: Optional[float] = None
+        self.latency = 0.0  # Smoothed capture-to-display seconds, reported by the consumer
+        self.frames_grabbed = 0
+        self.stale_drops = 0
+        self.latency_reconnects = 0
+        # Startup timing, for the readiness endpoint
+        self.started_at: Optional[float] = None
+        self.connect_seconds: Optional[float] = None  # Duration of the last successful connect
+        self.first_frame_seconds: Optional[float] = None  # From start() to the first stored frame
 
     def start(self):
         """Start the camera stream in a background thread."""
         if self.running:
             return
         self.running = True
+        self.started_at = time.monotonic()
         self.thread = threading.Thread(target=self._capture_loop, daemon=True)
         self.thread.start()
 
@@ -87,15 +280,25 @@ class CameraStream:
                     self.use_test_pattern = True
                     self.connected = True
                     return True
+            elif self._file_path() is not None:
+                # Recorded clip: replay it in a loop, paced at its own frame rate
+                self.cap = cv2.VideoCapture(self._file_path())
+                self.replay_file = True
+                self.replay_interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 30.0)
+                self.next_replay_time = time.monotonic()
             else:
-                # Set RTSP transport to TCP for more reliable streaming
-                self.cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+                self.cap = self._open_stream()
+                self.live_stream = True
+            self.stream_origin = None
+            self.stream_lag = 0.0
+            self.lagging_since = None
 
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize buffer for lower latency
 
             if self.cap.isOpened():
                 self.connected = True
-                print(f"[{self.name}] Connected to camera")
+                stream = "sub stream" if self.sub_url and self.active_url == self.sub_url else "camera"
+                print(f"[{self.name}] Connected to {stream}")
                 return True
             else:
                 self.connected = False
@@ -106,14 +309,83 @@ class CameraStream:
             self.connected = False
             return False
 
+    def _open_stream(self) -> cv2.VideoCapture:
+        """Open the sub stream if configured, falling back to the main stream."""
+        cap = None
+        for url in ([self.sub_url] if self.sub_url else []) + [self.url]:
+            if cap is not None:
+                cap.release()
+                print(f"[{self.name}] Sub stream unavailable, trying main stream")
+            cap = self._open_ffmpeg(url)
+            if cap.isOpened():
+                self.active_url = url
+                break
+        return cap
+
+    def _open_ffmpeg(self, url: str) -> cv2.VideoCapture:
+        """Open a network stream with this camera's FFmpeg and hardware decode options."""
+        params = []
+        if self.decode.hw_accel and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        with _capture_options_gate.use(self.decode.capture_options()):
+            if params:
+                return cv2.VideoCapture(url, cv2.CAP_FFMPEG, params)
+            return cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+
+    def _retrieve_into(self, buffer: Optional[np.ndarray]) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Retrieve the grabbed frame, into buffer when it has the right shape.
+
+        With max_width set, frames are decoded into a scratch buffer and
+        downscaled straight into the ring, so everything downstream (motion
+        gate, letterbox, encoding, clip buffer) works on the smaller frame.
+        """
+        if not self.decode.max_width:
+            if buffer is not None:
+                return self.cap.retrieve(image=buffer)
+            return self.cap.retrieve()
+
+        if self.decode_buffer is not None:
+            ret, raw = self.cap.retrieve(image=self.decode_buffer)
+        else:
+            ret, raw = self.cap.retrieve()
+        if not ret:
+            return False, None
+        self.decode_buffer = raw
+        height, width = raw.shape[:2]
+        if width <= self.decode.max_width:
+            size = (width, height)
+        else:
+            size = (self.decode.max_width, max(1, round(height * self.decode.max_width / width)))
+        if buffer is None or buffer.shape[:2] != (size[1], size[0]) or buffer.shape[2:] != raw.shape[2:]:
+            buffer = np.empty((size[1], size[0]) + raw.shape[2:], dtype=raw.dtype)
+        if size == (width, height):
+            np.copyto(buffer, raw)
+        else:
+            cv2.resize(raw, size, dst=buffer, interpolation=cv2.INTER_AREA)
+        return True, buffer
+
+    def _file_path(self) -> Optional[str]:
+        """Local video file behind the url, if it is one."""
+        if self.url.startswith("file://"):
+            return self.url[len("file://"):]
+        if "://" not in self.url and os.path.isfile(self.url):
+            return self.url
+        return None
+
     def _capture_loop(self):
         """Main capture loop running in background thread."""
         reconnect_delay = 1
         max_reconnect_delay = 30
+        capture_seconds = PIPELINE_STAGE_SECONDS.labels(camera=self.camera_id, stage="capture")
+        stale_frames = FRAMES_TOTAL.labels(camera=self.camera_id, outcome="stale")
+        ring_full_frames = FRAMES_TOTAL.labels(camera=self.camera_id, outcome="ring_full")
 
         while self.running:
             if not self.connected:
+                connect_start = time.monotonic()
                 if self._connect():
+                    self.connect_seconds = time.monotonic() - connect_start
                     reconnect_delay = 1
                 else:
                     time.sleep(reconnect_delay)
@@ -124,32 +396,226 @@ class CameraStream:
                 # Handle test pattern mode
                 if self.use_test_pattern:
                     frame = self._generate_test_frame()
-                    with self.lock:
-                        self.frame = frame
-                        current_time = time.time()
-                        if self.last_frame_time > 0:
-                            self.fps = 1.0 / (current_time - self.last_frame_time)
-                        self.last_frame_time = current_time
+                    grabbed_at = self._record_grab()
+                    slot = self._next_write_slot()
+                    if slot is None:
+                        ring_full_frames.inc()
+                        time.sleep(0.033)
+                        continue
+                    buffer = self.ring[slot]
+                    if buffer is not None and buffer.shape == frame.shape:
+                        np.copyto(buffer, frame)
+                    else:
+                        self.ring[slot] = frame
+                    self._store_frame(slot, grabbed_at)
+                    self._buffer_clip_frame(slot)
                     time.sleep(0.033)  # ~30 FPS for test pattern
                     continue
 
-                ret, frame = self.cap.read()
+                if self.replay_file:
+                    # Simulate a live camera: deliver frames no faster than the clip's FPS
+                    delay = self.next_replay_time - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    self.next_replay_time = max(self.next_replay_time, time.monotonic()) + self.replay_interval
+
+                read_start = time.perf_counter()
+                if not self.cap.grab():
+                    if self.replay_file and self.cap.get(cv2.CAP_PROP_POS_FRAMES) > 0:
+                        # End of clip: loop back to the start
+                        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    else:
+                        print(f"[{self.name}] Lost connection, reconnecting...")
+                        self._mark_disconnected()
+                        time.sleep(0.1)
+                    continue
+                self.frames_grabbed += 1
+                grabbed_at = self._record_grab()
+
+                if self.live_stream:
+                    self._update_stream_lag()
+                    if self._latency_exceeded():
+                        print(f"[{self.name}] Stream {self.stream_lag:.1f}s behind live, reconnecting...")
+                        self.latency_reconnects += 1
+                        self._mark_disconnected()
+                        continue
+                    if self.low_latency and not self._frame_wanted():
+                        # Nobody will look at this frame before a newer one arrives
+                        self.stale_drops += 1
+                        stale_frames.inc()
+                        continue
+
+                # Decode straight into a free ring buffer; OpenCV allocates a
+                # new array instead if the buffer is missing or the wrong size
+                slot = self._next_write_slot()
+                if slot is None:
+                    ring_full_frames.inc()
+                    continue
+                buffer = self.ring[slot]
+                ret, frame = self._retrieve_into(buffer)
                 if ret:
-                    with self.lock:
-                        self.frame = frame
-                        current_time = time.time()
-                        if self.last_frame_time > 0:
-                            self.fps = 1.0 / (current_time - self.last_frame_time)
-                        self.last_frame_time = current_time
+                    capture_seconds.observe(time.perf_counter() - read_start)
+                    self.last_retrieve_time = time.monotonic()
+                    if frame is not buffer:
+                        self.ring[slot] = frame
+                    self._store_frame(slot, grabbed_at)
+                    self._buffer_clip_frame(slot)
                 else:
-                    print(f"[{self.name}] Lost connection, reconnecting...")
-                    self.connected = False
+                    print(f"[{self.name}] Failed to retrieve frame, reconnecting...")
+                    self._mark_disconnected()
                     time.sleep(0.1)
             except Exception as e:
                 print(f"[{self.name}] Capture error: {e}")
-                self.connected = False
+                self._mark_disconnected()
                 time.sleep(0.1)
 
+    def _frame_wanted(self) -> bool:
+        """Whether the grabbed frame should be retrieved in low-latency mode."""
+        if self.waiters > 0:
+            return True
+        if self.clip_buffer is not None and time.time() >= self.next_clip_time:
+            return True
+        return time.monotonic() - self.last_retrieve_time >= self.idle_retrieve_interval
+
+    def _update_stream_lag(self):
+        """
+        Estimate how far the grabbed frame is behind live.
+
+        Wall time elapsed minus stream time elapsed, measured from the frame
+        that was least behind since connecting: it grows while packets queue
+        up faster than they are grabbed and falls back as the queue drains.
+        """
+        position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if position <= 0:
+            return  # Stream without timestamps: no estimate
+        origin = time.monotonic() - position
+        if self.stream_origin is None or origin < self.stream_origin:
+            self.stream_origin = origin
+        self.stream_lag = origin - self.stream_origin
+
+    def _latency_exceeded(self) -> bool:
+        """True once the stream lag has stayed above max_latency for latency_grace seconds."""
+        if self.max_latency <= 0 or self.stream_lag <= self.max_latency:
+            self.lagging_since = None
+            return False
+        now = time.monotonic()
+        if self.lagging_since is None:
+            self.lagging_since = now
+        return now - self.lagging_since >= self.latency_grace
+
+    def record_latency(self, seconds: float):
+        """Report the capture-to-display time of a consumed frame (for status)."""
+        if self.latency > 0:
+            seconds = self.latency + LATENCY_SMOOTHING * (seconds - self.latency)
+        self.latency = seconds
+
+    def _wait_for_newer(self, after_seq: int, timeout: Optional[float]) -> bool:
+        """
+        Wait (frame lock held) for a frame newer than after_seq, counting as a waiter.
+
+        In low-latency mode a frame retrieved only for the clip buffer or the
+        idle refresh may already be old, so wait for a fresh one instead.
+        """
+        max_age = None
+        if self.low_latency and self.live_stream and self.frame_interval > 0:
+            max_age = 1.5 * self.frame_interval
+
+        def ready() -> bool:
+            if self.frame_seq <= after_seq:
+                return False
+            return max_age is None or time.time() - self.ring_times[self.latest_slot] <= max_age
+
+        self.waiters += 1
+        try:
+            return self.frame_ready.wait_for(ready, timeout=timeout)
+        finally:
+            self.waiters -= 1
+
+    def _mark_disconnected(self):
+        self.connected = False
+        self.last_frame_time = 0  # The reconnect gap is not a frame interval
+        self.reconnects += 1
+        CAMERA_RECONNECTS.labels(camera=self.camera_id).inc()
+
+    def _next_write_slot(self) -> Optional[int]:
+        """
+        Pick a ring slot the capture thread may overwrite, growing the ring if all are busy.
+
+        Returns None when every slot is leased and the ring is at max_ring_size;
+        the caller drops the frame.
+        """
+        with self.lock:
+            count = len(self.ring)
+            for offset in range(1, count + 1):
+                slot = (self.latest_slot + offset) % count
+                if slot != self.latest_slot and self.ring_refs[slot] == 0:
+                    self.ring_full = False
+                    return slot
+            if count < self.max_ring_size:
+                # Every buffer is leased; add one rather than block capture
+                self.ring.append(None)
+                self.ring_refs.append(0)
+                self.ring_times.append(0.0)
+                print(f"[{self.name}] All frame buffers leased, ring grown to {len(self.ring)}")
+                return len(self.ring) - 1
+            # Leases are not being released: drop frames instead of growing further
+            self.ring_full_drops += 1
+            if not self.ring_full:
+                self.ring_full = True
+                print(f"[{self.name}] All {count} frame buffers still leased, dropping new frames")
+            return None
+
+    def _record_grab(self) -> float:
+        """
+        Update the frame rate from the time between frames arriving from the camera.
+
+        Measured at grab() rather than when frames are stored: in low-latency
+        mode only wanted frames are retrieved, so store times follow the
+        consumers (and the 1s idle refresh) instead of the camera.
+
+        Returns:
+            The grab time (time.time()), recorded as the frame's capture time
+        """
+        now = time.time()
+        if self.last_frame_time > 0:
+            # Smooth the interval rather than the rate so one late frame cannot spike it
+            interval = now - self.last_frame_time
+            if self.frame_interval > 0:
+                interval = self.frame_interval + FPS_SMOOTHING * (interval - self.frame_interval)
+            self.frame_interval = interval
+            self.fps = 1.0 / interval if interval > 0 else 0
+        self.last_frame_time = now
+        return now
+
+    def _store_frame(self, slot: int, grabbed_at: float):
+        """Publish a newly captured frame and wake any waiting consumers."""
+        with self.frame_ready:
+            self.latest_slot = slot
+            self.frame = self.ring[slot]
+            self.frame_seq += 1
+            # Latency is measured from the grab, so it includes decoding (retrieve)
+            self.ring_times[slot] = grabbed_at
+            if self.first_frame_seconds is None:
+                self.first_frame_seconds = time.monotonic() - self.started_at
+            self.frame_ready.notify_all()
+
+    def _buffer_clip_frame(self, slot: int):
+        """Add the just-stored frame to the clip buffer if one is due."""
+        if self.clip_buffer is None:
+            return
+        now = time.time()
+        if now < self.next_clip_time:
+            return
+        self.next_clip_time = now + self.clip_interval
+        # The latest slot is never overwritten by this (the capture) thread, so no lock is needed
+        ok, jpeg = cv2.imencode(".jpg", self.ring[slot], [cv2.IMWRITE_JPEG_QUALITY, self.clip_quality])
+        if ok:
+            self.clip_buffer.add(self.ring_times[slot], jpeg.tobytes())
+
+    def _release_slot(self, slot: int):
+        with self.lock:
+            self.ring_refs[slot] -= 1
+
     def get_frame(self) -> Optional[np.ndarray]:
         """Get the latest frame from the camera."""
         with self.lock:
@@ -157,11 +623,61 @@ class CameraStream:
                 return self.frame.copy()
             return None
 
+    def wait_for_frame(self, after_seq: int, timeout: Optional[float] = None) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Block until a frame newer than after_seq is available.
+
+        Args:
+            after_seq: Sequence number of the last frame the caller has seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Tuple of (frame_seq, frame copy), or (after_seq, None) on timeout
+        """
+        with self.frame_ready:
+            if not self._wait_for_newer(after_seq, timeout):
+                return after_seq, None
+            return self.frame_seq, self.frame.copy()
+
+    def lease_frame(self, after_seq: int = 0, timeout: Optional[float] = None) -> Optional[FrameLease]:
+        """
+        Borrow the latest frame without copying it.
+
+        Args:
+            after_seq: Only return a frame newer than this sequence number
+            timeout: Maximum seconds to wait for such a frame
+
+        Returns:
+            FrameLease holding a read-only view, or None on timeout.
+            The caller must release it (or use it as a context manager).
+        """
+        with self.frame_ready:
+            if not self._wait_for_newer(after_seq, timeout):
+                return None
+            slot = self.latest_slot
+            self.ring_refs[slot] += 1
+            view = self.ring[slot].view()
+            view.flags.writeable = False
+            return FrameLease(self, slot, self.frame_seq, view, self.ring_times[slot])
+
     def get_status(self) -> dict:
         """Get camera status information."""
         return {
             "id": self.camera_id,
             "name": self.name,
             "connected": self.connected,
-            "fps": round(self.fps, 1)
+            "frame_seq": self.frame_seq,
+            "fps": round(self.fps, 1),
+            "reconnects": self.reconnects,
+            "stream": "sub" if self.sub_url and self.active_url == self.sub_url else "main",
+            "resolution": list(self.frame.shape[1::-1]) if self.frame is not None else None,
+            "low_latency": self.low_latency and self.live_stream,
+            "stream_lag_ms": round(self.stream_lag * 1000, 1),
+            "display_latency_ms": round(self.latency * 1000, 1),
+            "frames_grabbed": self.frames_grabbed,
+            "stale_drops": self.stale_drops,
+            "ring_full_drops": self.ring_full_drops,
+            "latency_reconnects": self.latency_reconnects,
+            "connect_seconds": round(self.connect_seconds, 3) if self.connect_seconds is not None else None,
+            "first_frame_seconds": round(self.first_frame_seconds, 3) if self.first_frame_seconds is not None else None
         }
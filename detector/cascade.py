@@ -0,0 +1,116 @@
+import time
+from typing import List, Optional
+import numpy as np
+
+from .backends import create_backend
+from .metrics import DETECTOR_SECONDS
+from .tiling import merge_outputs, person_tiles
+from .yolo_detector import Detections, WeaponDetector
+
+
+class CascadeDetector(WeaponDetector):
+    """
+    Two-stage detector: a cheap person pass on every frame, then the weapon
+    model only on padded crops around the people it finds.
+
+    Frames without people cost one small forward pass. Objects away from any
+    person (a fork on a cafeteria table) are never reported as threats, while
+    crops run near full model resolution, which helps with small objects.
+    Output is the same Detections as WeaponDetector: people from the person
+    model plus threats from the crops.
+    """
+
+    def __init__(
+        self,
+        model_path: str = "yolov8s.pt",
+        confidence_threshold: float = 0.5,
+        backend: str = "ultralytics",
+        imgsz: int = 640,
+        person_model_path: str = "yolov8n.pt",
+        person_backend: Optional[str] = None,
+        person_imgsz: int = 320,
+        person_confidence: float = 0.35,
+        crop_padding: float = 0.5,
+        min_crop_size: int = 256,
+        verbose: bool = True
+    ):
+        """
+        Initialize both stages.
+
+        Args:
+            model_path: Weapon model run on the person crops
+            confidence_threshold: Minimum confidence for weapon detections
+            backend: Inference backend for the weapon model
+            imgsz: Inference size for the crops
+            person_model_path: Small model used to find people (any COCO model)
+            person_backend: Backend for the person model (defaults to backend)
+            person_imgsz: Downscaled inference size for the person pass
+            person_confidence: Minimum confidence for a person to get a crop
+            crop_padding: Margin around each person as a fraction of their larger side
+            min_crop_size: Smallest crop side in frame pixels
+            verbose: Print every threat detection (off for bulk offline scans)
+        """
+        super().__init__(model_path, confidence_threshold, backend, imgsz, verbose=verbose)
+        self.person_confidence = person_confidence
+        self.person_imgsz = person_imgsz
+        self.crop_padding = crop_padding
+        self.min_crop_size = min_crop_size
+
+        print(f"Loading person model: {person_model_path} ({person_backend or backend} backend)")
+        self.person_backend = create_backend(person_backend or backend, person_model_path, person_imgsz)
+        person_ids = [idx for idx, name in self.person_backend.names.items() if name.lower() == "person"]
+        if not person_ids:
+            raise ValueError(f"{person_model_path} has no 'person' class")
+        self.person_model_class_id = person_ids[0]
+
+        # Report people under the weapon model's person id, adding one if it has none
+        self.class_names = dict(self.class_names)
+        person_class_id = next((idx for idx, name in self.class_names.items() if name.lower() == "person"), None)
+        if person_class_id is None:
+            person_class_id = max(self.class_names) + 1
+            self.class_names[person_class_id] = "person"
+        self.person_class_id = person_class_id
+        self.class_kinds = self.build_class_kinds(self.class_names)
+
+    def _warmup_backends(self, frames: List[np.ndarray]):
+        # Blank frames contain no people, so the cascade itself would never reach the weapon model
+        self.person_backend.predict(frames, self.person_confidence, imgsz=self.person_imgsz)
+        super()._warmup_backends(frames)
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        """
+        Run the cascade on several frames (typically one per camera).
+
+        Every frame shares one person forward pass, and every person crop from
+        every frame shares one weapon forward pass.
+        """
+        if not frames:
+            return []
+
+        start = time.perf_counter()
+        person_outputs = self.person_backend.predict(frames, self.person_confidence, imgsz=self.person_imgsz)
+        people = []
+        regions = []
+        for frame, (boxes, confidences, class_ids) in zip(frames, person_outputs):
+            mask = class_ids == self.person_model_class_id
+            frame_people = (
+                boxes[mask],
+                confidences[mask],
+                np.full(int(mask.sum()), self.person_class_id, dtype=np.int32)
+            )
+            people.append(frame_people)
+            height, width = frame.shape[:2]
+            regions.append(person_tiles(frame_people[0], width, height, self.min_crop_size, self.crop_padding))
+        people_found = time.perf_counter()
+
+        threats = self._detect_threats_in_regions(frames, regions, self.backend.imgsz, mode="cascade")
+        inferred = time.perf_counter()
+
+        detections = [
+            self._to_detections(*merge_outputs([frame_people] + frame_threats))
+            for frame_people, frame_threats in zip(people, threats)
+        ]
+        DETECTOR_SECONDS.labels(phase="person").observe(people_found - start)
+        DETECTOR_SECONDS.labels(phase="inference").observe(inferred - people_found)
+        DETECTOR_SECONDS.labels(phase="postprocess").observe(time.perf_counter() - inferred)
+        return detections
@@ -0,0 +1,584 @@
+"""
+Sharding cameras across detection nodes.
+
+The web server runs a ClusterCoordinator, which listens for detection nodes
+(node.py), assigns every configured camera to one of them and moves a node's
+cameras elsewhere when it disconnects or misses heartbeats. Each node runs
+CameraStream + WeaponDetector for its cameras and sends back JPEG frames for
+cameras someone is watching, threats for the coordinator's AlertManager, alert
+clips on request and a status heartbeat. Nodes may be local processes spawned
+by the coordinator or started by hand on other machines.
+
+Messages are pickled tuples over multiprocessing.connection, authenticated
+with a shared key. Unpickling runs code chosen by the sender, so the key is
+all that keeps the coordinator's port from executing anything sent to it: a
+coordinator listening beyond loopback refuses to start without one, and
+without one it generates a random key that only its local nodes are given.
+
+    node -> coordinator
+        ("hello", node_id, pid)
+        ("heartbeat", camera_statuses, readiness, metrics_snapshot)
+        ("frame", camera_id, {variant: jpeg}, meta)
+        ("threat", camera_id, threat_type, confidence, track_id, timestamp, snapshot_jpeg)
+        ("clip", camera_id, alert_id, alert_time, [(timestamp, jpeg), ...])
+    coordinator -> node
+        ("assign", camera_config, variants)
+        ("release", camera_id)
+        ("watch", camera_id, variants)
+        ("clip", camera_id, alert_id, alert_time)
+        ("alerted", camera_id, track_id)
+        ("stop",)
+
+where variants lists the renderings ("raw" and/or "annotated") currently wanted.
+A node keeps reporting a confirmed threat track until the coordinator answers
+"alerted" for it, i.e. until an alert was raised rather than suppressed by the
+cooldown.
+"""
+import ipaddress
+import multiprocessing
+import os
+import secrets
+import socket
+import subprocess
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def parse_address(address: str, default_port: int = 6010) -> Tuple[str, int]:
+    """"host:port" (or just "host") as a (host, port) tuple."""
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+    return host, int(port)
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a listen address only accepts connections from this machine."""
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+def _shutdown(conn: Connection):
+    """Close a connection, waking any thread blocked in recv() on it."""
+    try:
+        # close() alone does not interrupt a blocked recv(); shutting the socket down does
+        sock = socket.socket(fileno=os.dup(conn.fileno()))
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        finally:
+            sock.close()
+    except OSError:
+        pass
+    try:
+        conn.close()
+    except OSError:
+        pass
+
+
+class _Node:
+    """Coordinator-side state of one connected detection node."""
+
+    def __init__(self, node_id: str, conn: Connection, pid: int):
+        self.node_id = node_id
+        self.conn = conn
+        self.pid = pid
+        self.send_lock = threading.Lock()
+        self.cameras: Set[str] = set()
+        self.statuses: Dict[str, dict] = {}  # Latest heartbeat status per assigned camera
+        self.readiness: dict = {}
+        self.metrics: dict = {}  # Latest MetricsRegistry.snapshot() from the node
+        self.connected_at = time.monotonic()
+        self.last_seen = time.monotonic()  # Any message counts, not only heartbeats
+        self.frames_received = 0
+        self.alive = True
+
+    def send(self, message) -> bool:
+        try:
+            with self.send_lock:
+                self.conn.send(message)
+            return True
+        except (OSError, ValueError):
+            return False
+
+
+class ClusterCoordinator:
+    """
+    Assigns cameras to detection nodes and relays what the nodes send back.
+
+    Cameras go to the node with the fewest, so a node joining later takes
+    cameras over from the busiest ones until loads differ by at most one.
+    Frames, threats and clips are handed to the callbacks on the thread
+    reading that node's connection.
+    """
+
+    def __init__(
+        self,
+        cameras: List[dict],
+        address: Tuple[str, int] = ("127.0.0.1", 6010),
+        authkey: bytes = b"",
+        heartbeat_timeout: float = 5.0,
+        local_nodes: int = 0,
+        local_command: Optional[List[str]] = None,
+        on_frame: Optional[Callable] = None,
+        on_threat: Optional[Callable] = None,
+        on_clip: Optional[Callable] = None
+    ):
+        """
+        Initialize the coordinator.
+
+        Args:
+            cameras: CAMERAS entries to shard (dicts with at least "id" and "name")
+            address: (host, port) to listen on for nodes
+            authkey: Shared secret nodes must present. Required unless address is
+                loopback; if empty there, a random key is generated and passed
+                only to the local nodes
+            heartbeat_timeout: Seconds of silence after which a node is considered dead
+            local_nodes: Node processes to spawn (and respawn) on this machine
+            local_command: Command line starting a node; "--coordinator" and
+                "--node-id" are appended
+            on_frame: Called with (camera_id, seq, jpegs, meta) per frame received;
+                seq increases per camera across node moves
+            on_threat: Called with (camera_config, threat_type, confidence, track_id,
+                timestamp, snapshot_jpeg) per threat a node reports; returns whether
+                an alert was raised
+            on_clip: Called with (camera_id, alert_id, alert_time, frames) when a
+                node answers request_clip()
+        """
+        if not authkey:
+            if not is_loopback(address[0]):
+                raise ValueError(
+                    f"Refusing to listen on {address[0]} without a shared authkey (set CLUSTER_AUTHKEY): "
+                    "anyone who can connect could run code in this process"
+                )
+            authkey = secrets.token_hex(32).encode()
+        self.cameras = {cam["id"]: cam for cam in cameras}
+        self.address = address
+        self.authkey = authkey
+        self.heartbeat_timeout = heartbeat_timeout
+        self.local_nodes = local_nodes
+        self.local_command = local_command or []
+        self.on_frame = on_frame
+        self.on_threat = on_threat
+        self.on_clip = on_clip
+
+        self.lock = threading.Lock()
+        self.nodes: Dict[str, _Node] = {}
+        self.owners: Dict[str, str] = {}  # camera_id -> node_id
+        self.watching: Dict[str, Tuple[str, ...]] = {}  # camera_id -> variants wanted
+        self.frame_seqs: Dict[str, int] = {}
+        self.processes: Dict[str, subprocess.Popen] = {}
+        self.spawned_at: Dict[str, float] = {}
+        self.listener: Optional[Listener] = None
+        self.running = False
+        self.threads: List[threading.Thread] = []
+
+        self.nodes_joined = 0
+        self.nodes_lost = 0
+        self.cameras_moved = 0
+        self.node_respawns = 0
+
+    def start(self):
+        """Listen for nodes and spawn the local ones."""
+        if self.running:
+            return
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.address = self.listener.address  # Port 0 resolves to the one actually bound
+        self.running = True
+        for target in (self._accept_loop, self._monitor_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"Cluster coordinator listening on {self.address[0]}:{self.address[1]}")
+        for index in range(self.local_nodes):
+            self._spawn(f"local-{index + 1}")
+
+    def stop(self):
+        """Stop every node, then the listener and local processes."""
+        if not self.running:
+            return
+        self.running = False
+        with self.lock:
+            nodes = list(self.nodes.values())
+        for node in nodes:
+            node.send(("stop",))
+        try:
+            self.listener.close()
+        except OSError:
+            pass
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.terminate()
+        for node in nodes:
+            _shutdown(node.conn)
+
+    def _spawn(self, node_id: str):
+        """Start a local node process; it inherits this process's environment and config, and the authkey."""
+        host, port = self.address
+        command = self.local_command + ["--coordinator", f"{host}:{port}", "--node-id", node_id]
+        env = {**os.environ, "CLUSTER_AUTHKEY": self.authkey.decode()}
+        self.processes[node_id] = subprocess.Popen(command, env=env)
+        self.spawned_at[node_id] = time.monotonic()
+        print(f"Started local detection node {node_id} (pid {self.processes[node_id].pid})")
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except multiprocessing.AuthenticationError as e:
+                print(f"Cluster: rejected a node connection: {e}")
+                continue
+            except (OSError, EOFError):
+                if not self.running:
+                    break
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: Connection):
+        """Read one node's messages until it disconnects."""
+        try:
+            if not conn.poll(self.heartbeat_timeout):
+                raise EOFError("no hello")
+            hello = conn.recv()
+        except (OSError, EOFError):
+            _shutdown(conn)
+            return
+        if not isinstance(hello, tuple) or len(hello) != 3 or hello[0] != "hello":
+            _shutdown(conn)
+            return
+
+        node = self._register(hello[1], conn, hello[2])
+        if node is None:
+            _shutdown(conn)
+            return
+        try:
+            while self.running:
+                self._handle(node, conn.recv())
+        except (OSError, EOFError):
+            pass
+        finally:
+            self._drop(node, "disconnected")
+            _shutdown(conn)
+
+    def _register(self, node_id: str, conn: Connection, pid: int) -> Optional[_Node]:
+        with self.lock:
+            if node_id in self.nodes:
+                print(f"Cluster: rejected a second node named {node_id}")
+                return None
+            node = self.nodes[node_id] = _Node(node_id, conn, pid)
+            self.nodes_joined += 1
+            print(f"Cluster: node {node_id} joined (pid {pid})")
+            self._rebalance()
+        return node
+
+    def _drop(self, node: _Node, reason: str):
+        """Forget a node and hand its cameras to the others."""
+        with self.lock:
+            if not node.alive:
+                return
+            node.alive = False
+            self.nodes.pop(node.node_id, None)
+            for camera_id in node.cameras:
+                self.owners.pop(camera_id, None)
+            orphaned = len(node.cameras)
+            node.cameras = set()
+            if not self.running:
+                return  # Shutting down: nothing to reassign to
+            self.nodes_lost += 1
+            print(f"Cluster: node {node.node_id} {reason}; reassigning {orphaned} cameras")
+            self._rebalance()
+
+    def _rebalance(self):
+        """Give unassigned cameras to the least-loaded nodes, then even out loads. Lock held."""
+        nodes = list(self.nodes.values())
+        if not nodes:
+            return
+        for camera_id, cam_config in self.cameras.items():
+            if camera_id not in self.owners:
+                self._assign(cam_config, min(nodes, key=lambda n: len(n.cameras)))
+
+        while True:
+            busiest = max(nodes, key=lambda n: len(n.cameras))
+            idlest = min(nodes, key=lambda n: len(n.cameras))
+            if len(busiest.cameras) - len(idlest.cameras) <= 1:
+                break
+            camera_id = max(busiest.cameras)
+            self._release(busiest, camera_id)
+            self._assign(self.cameras[camera_id], idlest)
+            self.cameras_moved += 1
+
+    def _assign(self, cam_config: dict, node: _Node):
+        camera_id = cam_config["id"]
+        self.owners[camera_id] = node.node_id
+        node.cameras.add(camera_id)
+        node.send(("assign", cam_config, list(self.watching.get(camera_id, ()))))
+        print(f"Cluster: camera {camera_id} assigned to node {node.node_id}")
+
+    def _release(self, node: _Node, camera_id: str):
+        node.cameras.discard(camera_id)
+        node.statuses.pop(camera_id, None)
+        self.owners.pop(camera_id, None)
+        node.send(("release", camera_id))
+
+    def _owner(self, camera_id: str) -> Optional[_Node]:
+        with self.lock:
+            node_id = self.owners.get(camera_id)
+            return self.nodes.get(node_id) if node_id else None
+
+    def _handle(self, node: _Node, message: tuple):
+        """Dispatch one message from a node (on its reader thread)."""
+        node.last_seen = time.monotonic()
+        kind = message[0]
+        if kind == "heartbeat":
+            _, statuses, readiness, metrics_snapshot = message
+            with self.lock:
+                node.statuses = {status["id"]: status for status in statuses if status["id"] in node.cameras}
+                node.readiness = readiness
+                node.metrics = metrics_snapshot
+            return
+
+        camera_id = message[1]
+        if camera_id not in node.cameras:
+            return  # Sent before the node processed a release
+        if kind == "frame":
+            _, _, jpegs, meta = message
+            with self.lock:
+                seq = self.frame_seqs[camera_id] = self.frame_seqs.get(camera_id, 0) + 1
+            node.frames_received += 1
+            if self.on_frame:
+                self.on_frame(camera_id, seq, jpegs, meta)
+        elif kind == "threat":
+            _, _, threat_type, confidence, track_id, timestamp, snapshot = message
+            if self.on_threat and self.on_threat(
+                self.cameras[camera_id], threat_type, confidence, track_id, timestamp, snapshot
+            ) and track_id is not None:
+                node.send(("alerted", camera_id, track_id))
+        elif kind == "clip":
+            _, _, alert_id, alert_time, frames = message
+            if self.on_clip:
+                self.on_clip(camera_id, alert_id, alert_time, frames)
+
+    def _monitor_loop(self):
+        """Drop nodes that went silent and respawn local node processes that exited."""
+        interval = min(1.0, self.heartbeat_timeout / 4)
+        while self.running:
+            time.sleep(interval)
+            now = time.monotonic()
+            with self.lock:
+                silent = [node for node in self.nodes.values() if now - node.last_seen > self.heartbeat_timeout]
+            for node in silent:
+                self._drop(node, f"missed heartbeats for {self.heartbeat_timeout:.0f}s")
+                _shutdown(node.conn)
+                process = self.processes.get(node.node_id)
+                if process is not None and process.poll() is None:
+                    process.kill()  # Hung: its cameras already run elsewhere
+
+            for node_id, process in list(self.processes.items()):
+                # A node that keeps crashing is restarted at most once per heartbeat timeout
+                if (self.running and process.poll() is not None
+                        and now - self.spawned_at[node_id] >= self.heartbeat_timeout):
+                    print(f"Cluster: local node {node_id} exited with code {process.returncode}, restarting")
+                    self.node_respawns += 1
+                    self._spawn(node_id)
+
+    def set_watch(self, camera_id: str, variants: Iterable[str]):
+        """Set which renderings of a camera's frames the owning node should send (none = no frames)."""
+        variants = tuple(sorted(set(variants)))
+        with self.lock:
+            if self.watching.get(camera_id, ()) == variants:
+                return
+            self.watching[camera_id] = variants
+        node = self._owner(camera_id)
+        if node is not None:
+            node.send(("watch", camera_id, list(variants)))
+
+    def request_clip(self, camera_id: str, alert_id: str, alert_time: float) -> bool:
+        """Ask the owning node for the camera's pre/post-event clip, delivered to on_clip."""
+        node = self._owner(camera_id)
+        return node is not None and node.send(("clip", camera_id, alert_id, alert_time))
+
+    @property
+    def ready(self) -> bool:
+        """Whether at least one node is connected and every connected node's model is ready."""
+        with self.lock:
+            return bool(self.nodes) and all(node.readiness.get("ready") for node in self.nodes.values())
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.ready:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def get_readiness(self) -> dict:
+        with self.lock:
+            nodes = {node_id: node.readiness for node_id, node in self.nodes.items()}
+            unassigned = [camera_id for camera_id in self.cameras if camera_id not in self.owners]
+        return {
+            "ready": bool(nodes) and all(readiness.get("ready") for readiness in nodes.values()),
+            "failed": bool(nodes) and all(readiness.get("failed") for readiness in nodes.values()),
+            "nodes": nodes,
+            "unassigned_cameras": unassigned
+        }
+
+    def get_camera_statuses(self) -> List[dict]:
+        """Latest status of every camera from its node's heartbeat, in CAMERAS order."""
+        statuses = []
+        with self.lock:
+            for camera_id, cam_config in self.cameras.items():
+                node_id = self.owners.get(camera_id)
+                node = self.nodes.get(node_id) if node_id else None
+                status = node.statuses.get(camera_id) if node else None
+                if status is None:
+                    # Unassigned, or assigned but not yet reported
+                    status = {"id": camera_id, "name": cam_config["name"], "connected": False}
+                statuses.append(dict(status, node=node_id))
+        return statuses
+
+    def get_metric_snapshots(self) -> List[dict]:
+        """
+        Latest counter and histogram snapshot from every connected node, for /metrics.
+
+        A node's totals disappear with it, which Prometheus treats like a counter reset.
+        """
+        with self.lock:
+            return [node.metrics for node in self.nodes.values() if node.metrics]
+
+    def get_stats(self) -> dict:
+        """Per-node cameras, heartbeat age and frame counts, plus membership counters."""
+        now = time.monotonic()
+        with self.lock:
+            nodes = {
+                node_id: {
+                    "pid": node.pid,
+                    "local": node_id in self.processes,
+                    "cameras": sorted(node.cameras),
+                    "ready": bool(node.readiness.get("ready")),
+                    "last_seen_seconds": round(now - node.last_seen, 2),
+                    "uptime_seconds": round(now - node.connected_at, 1),
+                    "frames_received": node.frames_received
+                }
+                for node_id, node in self.nodes.items()
+            }
+            unassigned = [camera_id for camera_id in self.cameras if camera_id not in self.owners]
+        return {
+            "address": f"{self.address[0]}:{self.address[1]}",
+            "nodes": nodes,
+            "unassigned_cameras": unassigned,
+            "nodes_joined": self.nodes_joined,
+            "nodes_lost": self.nodes_lost,
+            "cameras_moved": self.cameras_moved,
+            "node_respawns": self.node_respawns
+        }
+
+
+class CoordinatorLink:
+    """
+    A detection node's connection to the coordinator.
+
+    run() connects (retrying until the coordinator is up), introduces the
+    node, sends heartbeats from a background thread and hands every message
+    to on_message until the coordinator sends ("stop",). If the connection
+    drops, on_disconnect is called (the coordinator will have reassigned the
+    node's cameras) and the link reconnects, unless reconnect is off.
+    """
+
+    def __init__(
+        self,
+        node_id: str,
+        address: Tuple[str, int],
+        authkey: bytes,
+        on_message: Callable[[tuple], None],
+        heartbeat: Callable[[], tuple],
+        on_disconnect: Optional[Callable[[], None]] = None,
+        heartbeat_interval: float = 1.0,
+        reconnect_delay: float = 2.0,
+        reconnect: bool = True
+    ):
+        """
+        Initialize the link.
+
+        Args:
+            node_id: Name unique among the coordinator's nodes
+            address: Coordinator (host, port)
+            authkey: Shared secret
+            on_message: Called with each coordinator message
+            heartbeat: Returns the ("heartbeat", statuses, readiness, metrics_snapshot) message to send
+            on_disconnect: Called when the connection is lost
+            heartbeat_interval: Seconds between heartbeats
+            reconnect_delay: Seconds between connection attempts
+            reconnect: Reconnect after losing the coordinator rather than return
+                (off for local nodes, which should not outlive their coordinator)
+        """
+        self.node_id = node_id
+        self.address = address
+        self.authkey = authkey
+        self.on_message = on_message
+        self.heartbeat = heartbeat
+        self.on_disconnect = on_disconnect
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_delay = reconnect_delay
+        self.reconnect = reconnect
+        self.conn: Optional[Connection] = None
+        self.send_lock = threading.Lock()
+        self.connected = threading.Event()
+        self.stopped = False
+
+    def send(self, message) -> bool:
+        """Send a message if connected; False if it could not be sent."""
+        conn = self.conn
+        if conn is None:
+            return False
+        try:
+            with self.send_lock:
+                conn.send(message)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _heartbeat_loop(self, conn: Connection):
+        while self.conn is conn and not self.stopped:
+            if not self.send(self.heartbeat()):
+                break
+            time.sleep(self.heartbeat_interval)
+
+    def run(self):
+        """Serve the coordinator until it sends ("stop",)."""
+        while not self.stopped:
+            try:
+                conn = Client(self.address, authkey=self.authkey)
+            except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+                print(f"Node {self.node_id}: cannot reach coordinator at {self.address[0]}:{self.address[1]} ({e})")
+                time.sleep(self.reconnect_delay)
+                continue
+
+            self.conn = conn
+            self.send(("hello", self.node_id, os.getpid()))
+            self.connected.set()
+            print(f"Node {self.node_id}: connected to coordinator")
+            threading.Thread(target=self._heartbeat_loop, args=(conn,), daemon=True).start()
+            try:
+                while True:
+                    message = conn.recv()
+                    if message[0] == "stop":
+                        self.stopped = True
+                        break
+                    self.on_message(message)
+            except (OSError, EOFError):
+                print(f"Node {self.node_id}: lost the coordinator")
+                if not self.reconnect:
+                    self.stopped = True
+            finally:
+                self.conn = None
+                self.connected.clear()
+                _shutdown(conn)
+                if self.on_disconnect:
+                    self.on_disconnect()
+            if not self.stopped:
+                time.sleep(self.reconnect_delay)
@@ -0,0 +1,281 @@
+"""Asynchronous alert fan-out to notification sinks."""
+import heapq
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .metrics import ALERT_DISPATCH_SECONDS, ALERT_DISPATCH_TOTAL
+
+
+class AlertSink:
+    """Destination for alerts (socket clients, webhook, SMS gateway, ...)."""
+
+    name = "sink"
+
+    def send(self, alert: dict):
+        """Deliver one alert. Raise on failure so the dispatcher can retry."""
+        raise NotImplementedError
+
+
+class CallbackSink(AlertSink):
+    """Delivers alerts by calling a function, e.g. a Socket.IO emit."""
+
+    def __init__(self, name: str, callback: Callable[[dict], None]):
+        self.name = name
+        self.callback = callback
+
+    def send(self, alert: dict):
+        self.callback(alert)
+
+
+class WebhookSink(AlertSink):
+    """POSTs each alert as JSON to a URL; any non-2xx response counts as a failure."""
+
+    def __init__(self, url: str, name: Optional[str] = None, timeout: float = 5.0, headers: Optional[dict] = None):
+        self.url = url
+        self.name = name or f"webhook:{url}"
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+
+    def send(self, alert: dict):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(alert, default=float).encode(),
+            headers=self.headers,
+            method="POST"
+        )
+        # urlopen raises HTTPError for 4xx/5xx responses
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class _SinkStats:
+    __slots__ = ("sent", "failed", "retried", "dropped", "total_latency", "max_latency")
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.total_latency = 0.0  # Seconds from dispatch to successful delivery
+        self.max_latency = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "avg_latency_ms": round(self.total_latency / self.sent * 1000, 2) if self.sent else None,
+            "max_latency_ms": round(self.max_latency * 1000, 2)
+        }
+
+
+class _SinkLane:
+    """One sink's own job queue and delivery threads."""
+
+    def __init__(self, sink: AlertSink, queue_size: int):
+        self.sink = sink
+        self.jobs: "queue.Queue[Optional[Tuple[dict, float, int]]]" = queue.Queue(maxsize=queue_size)
+        self.threads: List[threading.Thread] = []
+        self.stats = _SinkStats()
+
+
+class AlertDispatcher:
+    """
+    Delivers alerts to every sink from worker threads.
+
+    dispatch() never blocks. Each sink has its own bounded queue and worker
+    threads, so a slow or failing webhook delays neither the detection thread
+    nor the other sinks (at worst it fills its own queue, and its further
+    alerts are dropped). Failed deliveries are retried with exponential
+    backoff; an alert id is only ever dispatched once.
+    """
+
+    def __init__(
+        self,
+        sinks: List[AlertSink],
+        workers: int = 2,
+        queue_size: int = 256,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        dedupe_size: int = 1024
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            sinks: Destinations every alert is delivered to
+            workers: Delivery threads per sink
+            queue_size: Maximum queued deliveries per sink; further alerts for that sink are
+                dropped (and counted)
+            max_retries: Retries per sink after the first failed attempt
+            backoff: Delay before the first retry, doubled for each further retry
+            max_backoff: Upper bound on the retry delay
+            dedupe_size: Number of recent alert ids remembered for deduplication
+        """
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.dedupe_size = dedupe_size
+        self.lanes: Dict[str, _SinkLane] = {}
+        self.lock = threading.Lock()
+        self.retry_ready = threading.Condition()
+        self.retries: List[Tuple[float, int, _SinkLane, tuple]] = []  # Heap of (due, tiebreak, lane, job)
+        self.retry_counter = 0
+        self.seen: "OrderedDict[str, None]" = OrderedDict()
+        self.duplicates = 0
+        self.running = False
+        self.retry_thread: Optional[threading.Thread] = None
+        for sink in sinks:
+            self.add_sink(sink)
+
+    def add_sink(self, sink: AlertSink):
+        """Add a destination (call before start)."""
+        self.lanes[sink.name] = _SinkLane(sink, self.queue_size)
+
+    def start(self):
+        """Start the delivery and retry threads."""
+        if self.running:
+            return
+        self.running = True
+        for lane in self.lanes.values():
+            lane.threads = [
+                threading.Thread(target=self._worker_loop, args=(lane,), daemon=True) for _ in range(self.workers)
+            ]
+            for thread in lane.threads:
+                thread.start()
+        self.retry_thread = threading.Thread(target=self._retry_loop, daemon=True)
+        self.retry_thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop after the queued deliveries are attempted (pending retries are abandoned)."""
+        if not self.running:
+            return
+        deadline = time.monotonic() + timeout
+        with self.retry_ready:
+            self.running = False
+            self.retry_ready.notify_all()
+        for lane in self.lanes.values():
+            for _ in lane.threads:
+                try:
+                    lane.jobs.put(None, timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Full:
+                    break
+        for lane in self.lanes.values():
+            for thread in lane.threads:
+                thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self.retry_thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    def dispatch(self, alert) -> bool:
+        """
+        Queue an alert for every sink without blocking.
+
+        Args:
+            alert: Alert (or anything with .id and .to_dict())
+
+        Returns:
+            False if the alert id was already dispatched
+        """
+        with self.lock:
+            if alert.id in self.seen:
+                self.duplicates += 1
+                return False
+            self.seen[alert.id] = None
+            while len(self.seen) > self.dedupe_size:
+                self.seen.popitem(last=False)
+
+        payload = alert.to_dict()
+        now = time.monotonic()
+        for lane in self.lanes.values():
+            try:
+                lane.jobs.put_nowait((payload, now, 0))
+            except queue.Full:
+                self._record(lane, "dropped")
+                print(f"Alert dispatch queue for {lane.sink.name} full, dropped {alert.id}")
+        return True
+
+    def _record(self, lane: _SinkLane, outcome: str, latency: float = 0.0):
+        ALERT_DISPATCH_TOTAL.labels(sink=lane.sink.name, outcome=outcome).inc()
+        with self.lock:
+            stats = lane.stats
+            if outcome == "sent":
+                stats.sent += 1
+                stats.total_latency += latency
+                stats.max_latency = max(stats.max_latency, latency)
+            elif outcome == "retried":
+                stats.retried += 1
+            elif outcome == "failed":
+                stats.failed += 1
+            else:
+                stats.dropped += 1
+
+    def _worker_loop(self, lane: _SinkLane):
+        sink = lane.sink
+        while True:
+            job = lane.jobs.get()
+            if job is None:
+                break
+            payload, queued_at, attempt = job
+            start = time.perf_counter()
+            try:
+                sink.send(payload)
+            except Exception as e:
+                ALERT_DISPATCH_SECONDS.labels(sink=sink.name).observe(time.perf_counter() - start)
+                if attempt < self.max_retries:
+                    self._record(lane, "retried")
+                    self._schedule_retry(lane, (payload, queued_at, attempt + 1))
+                else:
+                    self._record(lane, "failed")
+                    print(f"Alert sink {sink.name} failed after {attempt + 1} attempts: {e}")
+                continue
+            ALERT_DISPATCH_SECONDS.labels(sink=sink.name).observe(time.perf_counter() - start)
+            self._record(lane, "sent", time.monotonic() - queued_at)
+
+    def _schedule_retry(self, lane: _SinkLane, job: tuple):
+        attempt = job[2]
+        delay = min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+        with self.retry_ready:
+            self.retry_counter += 1
+            heapq.heappush(self.retries, (time.monotonic() + delay, self.retry_counter, lane, job))
+            self.retry_ready.notify()
+
+    def _retry_loop(self):
+        """Move retries back onto their sink's queue when their backoff expires."""
+        with self.retry_ready:
+            while self.running:
+                if not self.retries:
+                    self.retry_ready.wait()
+                    continue
+                due, _, lane, job = self.retries[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self.retry_ready.wait(timeout=delay)
+                    continue
+                heapq.heappop(self.retries)
+                try:
+                    lane.jobs.put_nowait(job)
+                except queue.Full:
+                    self._record(lane, "dropped")
+
+    def get_stats(self) -> dict:
+        with self.retry_ready:
+            pending_retries = len(self.retries)
+        with self.lock:
+            sinks = {}
+            for name, lane in self.lanes.items():
+                sinks[name] = lane.stats.to_dict()
+                sinks[name]["queued"] = lane.jobs.qsize()
+            return {
+                "queued": sum(lane.jobs.qsize() for lane in self.lanes.values()),
+                "pending_retries": pending_retries,
+                "duplicates": self.duplicates,
+                "sinks": sinks
+            }
@@ -0,0 +1,155 @@
+"""
+Export the detection model for CPU backends and validate it against PyTorch.
+
+Usage:
+    python -m detector.export --model yolov8s.pt --format onnx
+    python -m detector.export --model yolov8s.pt --format onnx --int8
+    python -m detector.export --model yolov8s.pt --format openvino --int8
+    python -m detector.export --model yolov8s.pt --format onnx --skip-export \\
+        --exported yolov8s.onnx --images hallway.jpg cafeteria.jpg
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from .backends import InferenceBackend, create_backend
+from .ops import pairwise_iou
+
+
+def export_model(model_path: str, fmt: str, imgsz: int, int8: bool, dynamic: bool) -> str:
+    """Export a PyTorch model with ultralytics, returning the exported model path."""
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    if fmt == "onnx":
+        exported = model.export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True)
+        if int8:
+            exported = quantize_onnx(exported)
+    else:
+        # OpenVINO INT8 uses NNCF post-training quantization inside ultralytics
+        exported = model.export(format="openvino", imgsz=imgsz, dynamic=dynamic, int8=int8)
+    print(f"Exported {model_path} -> {exported}")
+    return str(exported)
+
+
+def quantize_onnx(onnx_path: str) -> str:
+    """Dynamic INT8 weight quantization of an ONNX model."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    root, ext = os.path.splitext(onnx_path)
+    quantized_path = f"{root}-int8{ext}"
+    quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QUInt8)
+    return quantized_path
+
+
+def load_images(paths: List[str]) -> List[np.ndarray]:
+    """Read validation images, defaulting to the sample images shipped with ultralytics."""
+    if not paths:
+        from ultralytics.utils import ASSETS
+
+        paths = [str(ASSETS / "bus.jpg"), str(ASSETS / "zidane.jpg")]
+    images = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            raise FileNotFoundError(f"Could not read image {path}")
+        images.append(image)
+    return images
+
+
+def time_backend(backend: InferenceBackend, images: List[np.ndarray], conf: float, repeats: int) -> float:
+    """Average milliseconds per frame over several single-frame runs."""
+    backend.predict(images[:1], conf)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for image in images:
+            backend.predict([image], conf)
+    return (time.perf_counter() - start) * 1000 / (repeats * len(images))
+
+
+def validate(
+    reference: InferenceBackend,
+    candidate: InferenceBackend,
+    images: List[np.ndarray],
+    conf: float,
+    iou_threshold: float = 0.5
+) -> float:
+    """
+    Compare a candidate backend's detections with the reference on the same images.
+
+    Returns:
+        Fraction of reference detections matched by a same-class candidate box
+    """
+    total = matched = 0
+    conf_errors = []
+    for index, (ref, cand) in enumerate(zip(reference.predict(images, conf), candidate.predict(images, conf))):
+        ref_boxes, ref_conf, ref_cls = ref
+        cand_boxes, cand_conf, cand_cls = cand
+        image_matched = 0
+        if len(ref_boxes) and len(cand_boxes):
+            ious = pairwise_iou(ref_boxes, cand_boxes)
+            ious[ref_cls[:, None] != cand_cls[None, :]] = 0
+            for ref_index in range(len(ref_boxes)):
+                best = int(ious[ref_index].argmax())
+                if ious[ref_index, best] >= iou_threshold:
+                    image_matched += 1
+                    conf_errors.append(abs(float(ref_conf[ref_index]) - float(cand_conf[best])))
+                    ious[:, best] = 0  # Each candidate box matches at most once
+        total += len(ref_boxes)
+        matched += image_matched
+        print(f"  image {index}: reference {len(ref_boxes)}, exported {len(cand_boxes)}, matched {image_matched}")
+
+    recall = matched / total if total else 1.0
+    mean_conf_error = float(np.mean(conf_errors)) if conf_errors else 0.0
+    print(f"Matched {matched}/{total} reference detections ({recall:.1%}), "
+          f"mean confidence difference {mean_conf_error:.3f}")
+    return recall
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export and validate the detection model for CPU inference")
+    parser.add_argument("--model", default="yolov8s.pt", help="PyTorch model to export and validate against")
+    parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--int8", action="store_true", help="Quantize weights to INT8")
+    parser.add_argument("--dynamic", action="store_true", help="Export with dynamic batch and input size")
+    parser.add_argument("--skip-export", action="store_true", help="Only validate an existing export")
+    parser.add_argument("--exported", help="Exported model to validate (required with --skip-export)")
+    parser.add_argument("--images", nargs="*", default=[], help="Validation images (default: ultralytics samples)")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--min-recall", type=float, default=0.9, help="Fail if fewer reference boxes match")
+    parser.add_argument("--repeats", type=int, default=5, help="Timing repetitions per image")
+    args = parser.parse_args(argv)
+
+    if args.skip_export:
+        if not args.exported:
+            parser.error("--skip-export requires --exported")
+        exported = args.exported
+    else:
+        exported = export_model(args.model, args.format, args.imgsz, args.int8, args.dynamic)
+
+    images = load_images(args.images)
+    reference = create_backend("ultralytics", args.model, args.imgsz)
+    candidate = create_backend(args.format, exported, args.imgsz)
+
+    print(f"Validating {exported} against {args.model} on {len(images)} images")
+    recall = validate(reference, candidate, images, args.conf)
+
+    reference_ms = time_backend(reference, images, args.conf, args.repeats)
+    candidate_ms = time_backend(candidate, images, args.conf, args.repeats)
+    print(f"Latency: PyTorch {reference_ms:.1f} ms/frame, {args.format} {candidate_ms:.1f} ms/frame")
+
+    if recall < args.min_recall:
+        print(f"FAILED: recall {recall:.1%} below {args.min_recall:.0%}")
+        return 1
+    print(f"OK: set DETECTION_BACKEND={args.format} and MODEL_PATH={exported} in .env")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond postprocessing up to slow CPU inference
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base for a metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """Get the child metric for one combination of label values."""
+        key = tuple(str(kwargs[name]) for name in self.labelnames) if kwargs else tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            children = list(self.children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+    def snapshot(self) -> dict:
+        """Current values by label values, picklable (for another process to merge)."""
+        with self.lock:
+            return {key: child.value for key, child in self.children.items()}
+
+    def render_merged(self, snapshots: List[dict]) -> List[str]:
+        """Render with the values from other processes' snapshots added to this process's own."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        merged = self.snapshot()
+        for snapshot in snapshots:
+            for key, value in snapshot.items():
+                merged[key] = merged[key] + value if key in merged else value
+        for key, value in merged.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    """A single number. Updates are not locked: a rare lost increment is an acceptable price for speed."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (use rate() in Prometheus for per-second rates)."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations (typically durations in seconds)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {key: (list(child.counts), child.sum) for key, child in self.children.items()}
+
+    def render_merged(self, snapshots: List[dict]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        merged = {}
+        for snapshot in [self.snapshot()] + snapshots:
+            for key, (counts, total) in snapshot.items():
+                child = merged.get(key)
+                if child is None:
+                    child = merged[key] = _HistogramChild(self.buckets)
+                child.counts = [a + b for a, b in zip(child.counts, counts)]
+                child.sum += total
+        for key, child in merged.items():
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {child.sum!r}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Counter and histogram values by metric name, for rendering in another process.
+
+        Gauges are left out: they describe the present, and a camera's gauges
+        would otherwise be summed across every node that ever ran it.
+        """
+        return {
+            metric.name: metric.snapshot()
+            for metric in self.metrics
+            if metric.kind in ("counter", "histogram") and metric.children
+        }
+
+    def render(self, snapshots: Sequence[Dict[str, dict]] = ()) -> str:
+        """
+        Prometheus text for every metric.
+
+        Args:
+            snapshots: snapshot() results from other processes (e.g. cluster nodes),
+                whose counters and histograms are added to this process's own
+        """
+        lines = []
+        for metric in self.metrics:
+            if snapshots and metric.kind in ("counter", "histogram"):
+                lines.extend(metric.render_merged([s[metric.name] for s in snapshots if metric.name in s]))
+            else:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Hot-path timings
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram(
+    "lair_pipeline_stage_seconds",
+    "Time spent per frame in each processing stage",
+    ["camera", "stage"]
+)
+DETECTOR_SECONDS = REGISTRY.histogram(
+    "lair_detector_seconds",
+    "WeaponDetector time per batch, split into model inference and result postprocessing",
+    ["phase"]
+)
+DETECTOR_CROPS = REGISTRY.counter(
+    "lair_detector_crops_total",
+    "Tiles or person crops run through the model in addition to full frames",
+    ["mode"]
+)
+
+# Frame accounting
+FRAMES_TOTAL = REGISTRY.counter(
+    "lair_frames_total",
+    "Frames by outcome: processed, gated, skipped, dropped, loading (model not ready) or "
+    "model_error (model failed to load) in the processing loop, "
+    "or stale (grabbed but never retrieved in low-latency capture) and ring_full (every frame buffer leased)",
+    ["camera", "outcome"]
+)
+STREAM_FRAMES_DROPPED = REGISTRY.counter(
+    "lair_stream_frames_dropped_total",
+    "Frames not sent to a client because it was busy, rate limited or over the byte budget",
+    ["camera", "reason"]
+)
+
+# Cameras
+CAMERA_RECONNECTS = REGISTRY.counter(
+    "lair_camera_reconnects_total",
+    "Times a camera connection was lost and re-established",
+    ["camera"]
+)
+CAMERA_STREAM_LAG = REGISTRY.gauge(
+    "lair_camera_stream_lag_seconds",
+    "Estimated seconds the newest grabbed frame is behind the live stream",
+    ["camera"]
+)
+FRAME_LATENCY_SECONDS = REGISTRY.histogram(
+    "lair_frame_latency_seconds",
+    "Time from a frame being captured to its processing and delivery finishing",
+    ["camera"]
+)
+CAMERA_FPS = REGISTRY.gauge("lair_camera_fps", "Smoothed capture frame rate", ["camera"])
+CAMERA_CONNECTED = REGISTRY.gauge("lair_camera_connected", "1 if the camera is connected", ["camera"])
+CAMERA_SUBSCRIBERS = REGISTRY.gauge("lair_camera_subscribers", "Clients watching the camera", ["camera"])
+
+# Alerts
+ALERTS_TOTAL = REGISTRY.counter("lair_alerts_total", "Alerts raised", ["camera", "threat_type"])
+ALERTS_SUPPRESSED = REGISTRY.counter(
+    "lair_alerts_suppressed_total",
+    "Threat detections that did not raise an alert because of the cooldown",
+    ["camera", "threat_type"]
+)
+ALERTS_UNACKNOWLEDGED = REGISTRY.gauge("lair_alerts_unacknowledged", "Alerts not yet acknowledged")
+ALERT_DISPATCH_SECONDS = REGISTRY.histogram(
+    "lair_alert_dispatch_seconds",
+    "Time for one delivery attempt to an alert sink",
+    ["sink"]
+)
+ALERT_DISPATCH_TOTAL = REGISTRY.counter(
+    "lair_alert_dispatch_total",
+    "Alert deliveries by sink and outcome (sent, retried, failed, dropped)",
+    ["sink", "outcome"]
+)
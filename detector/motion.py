@@ -0,0 +1,89 @@
+import cv2
+import time
+from typing import Optional
+import numpy as np
+
+
+class MotionGate:
+    """Frame-difference gate that lets static scenes skip YOLO inference."""
+
+    def __init__(
+        self,
+        width: int = 160,
+        learning_rate: float = 0.05,
+        pixel_threshold: int = 25,
+        min_changed_fraction: float = 0.002,
+        max_skip_seconds: float = 5.0
+    ):
+        """
+        Initialize the gate.
+
+        Args:
+            width: Width the frame is downscaled to before comparison
+            learning_rate: How quickly the background model absorbs changes (0-1)
+            pixel_threshold: Grayscale difference for a pixel to count as changed
+            min_changed_fraction: Fraction of changed pixels that counts as motion
+            max_skip_seconds: Force a full inference at least this often
+        """
+        self.width = width
+        self.learning_rate = learning_rate
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.max_skip_seconds = max_skip_seconds
+        self.background: Optional[np.ndarray] = None
+        self.last_inference_time = 0.0
+        self.last_changed_fraction = 0.0
+        self.frames_inferred = 0
+        self.frames_gated = 0
+        self.forced_inferences = 0
+
+    def _preprocess(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale and convert to a blurred grayscale image."""
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """
+        Update the background model and decide whether the frame needs inference.
+
+        Args:
+            frame: BGR image from OpenCV
+
+        Returns:
+            True if the scene changed (or a forced refresh is due), False if it is static
+        """
+        gray = self._preprocess(frame)
+        current_time = time.time()
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            motion = True
+        else:
+            diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+            self.last_changed_fraction = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+            cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+            motion = self.last_changed_fraction >= self.min_changed_fraction
+
+        if not motion and current_time - self.last_inference_time >= self.max_skip_seconds:
+            self.forced_inferences += 1
+            motion = True
+
+        if motion:
+            self.frames_inferred += 1
+            self.last_inference_time = current_time
+        else:
+            self.frames_gated += 1
+        return motion
+
+    def get_stats(self) -> dict:
+        """Get counters for gated vs inferred frames."""
+        total = self.frames_inferred + self.frames_gated
+        return {
+            "frames_inferred": self.frames_inferred,
+            "frames_gated": self.frames_gated,
+            "forced_inferences": self.forced_inferences,
+            "gated_ratio": round(self.frames_gated / total, 3) if total else 0.0,
+            "changed_fraction": round(self.last_changed_fraction, 4)
+        }
@@ -0,0 +1,184 @@
+"""
+The per-camera frame pipeline: lease, gate, infer, confirm threats, hand off.
+
+Used by the web server (app.py) in single-process mode and by detection
+nodes (node.py) in cluster mode, so both detect, confirm threats and record
+metrics identically. What happens to a confirmed threat and to the frame
+afterwards is up to the caller's callbacks.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from . import metrics
+from .camera import CameraStream
+from .motion import MotionGate
+from .tracker import ObjectTracker
+from .yolo_detector import Detections, WeaponDetector
+
+
+def frame_meta(camera_id: str, frame: np.ndarray, detections: Detections, overlay: bool) -> dict:
+    """
+    Summary sent with each streamed frame.
+
+    Args:
+        camera_id: Camera the frame came from
+        frame: The raw frame
+        detections: Its detections
+        overlay: Include the packed boxes and labels for clients drawing them on the raw frame
+    """
+    meta = {
+        "camera_id": camera_id,
+        "detections": len(detections),
+        "people": detections.person_count,
+        "threats": int(np.count_nonzero(detections.threat_mask))
+    }
+    if overlay:
+        height, width = frame.shape[:2]
+        meta.update(
+            boxes=detections.pack_overlay(),
+            labels=detections.overlay_labels(),
+            frame_size=[width, height]
+        )
+    return meta
+
+
+class CameraPipeline:
+    """
+    Runs detection on one camera's frames at up to max_fps.
+
+    Each leased frame is inferred (or, while the model loads or the motion
+    gate holds, given empty or reused detections), threats are confirmed by
+    the tracker and offered to on_threat, and the frame is passed to
+    on_frame. Annotation is lazy: the render callable both callbacks receive
+    draws the detections on a copy of the frame the first time it is called,
+    and the copy outlives the frame lease.
+    """
+
+    def __init__(
+        self,
+        camera: CameraStream,
+        inference,
+        on_threat: Callable[[Callable[[], np.ndarray], str, float, Optional[int]], bool],
+        on_frame: Callable[[int, np.ndarray, Detections, Callable[[], np.ndarray]], None],
+        gate: Optional[MotionGate] = None,
+        tracker: Optional[ObjectTracker] = None,
+        max_fps: float = 15.0
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            camera: Started CameraStream to process
+            inference: InferenceScheduler or DetectionWorkerPool shared by all cameras
+            on_threat: Called with (render, threat_type, confidence, track_id) for each
+                threat on an inferred frame; returns whether an alert was raised. With
+                a tracker only confirmed tracks are offered, again on every inferred
+                frame until one returns True; without, every threat (track_id None)
+            on_frame: Called with (seq, frame, detections, render) for every processed
+                frame; the frame is only valid during the call
+            gate: MotionGate skipping inference on static scenes
+            tracker: ObjectTracker requiring threats to persist before they are offered
+            max_fps: Upper bound on frames processed per second
+        """
+        self.camera = camera
+        self.inference = inference
+        self.on_threat = on_threat
+        self.on_frame = on_frame
+        self.gate = gate
+        self.tracker = tracker
+        self.frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.last_detections: Optional[Detections] = None  # Reused while the motion gate holds
+        self.stopped = threading.Event()
+
+        camera_id = camera.camera_id
+        self.wait_seconds = metrics.PIPELINE_STAGE_SECONDS.labels(camera=camera_id, stage="wait")
+        self.inference_seconds = metrics.PIPELINE_STAGE_SECONDS.labels(camera=camera_id, stage="inference")
+        self.annotate_seconds = metrics.PIPELINE_STAGE_SECONDS.labels(camera=camera_id, stage="annotate")
+        self.frame_latency = metrics.FRAME_LATENCY_SECONDS.labels(camera=camera_id)
+        self.frames = {
+            outcome: metrics.FRAMES_TOTAL.labels(camera=camera_id, outcome=outcome)
+            for outcome in ("processed", "loading", "model_error", "gated", "dropped", "skipped")
+        }
+
+    def run(self):
+        """Process frames until stop() (blocking; run it on the camera's own thread)."""
+        camera = self.camera
+        last_seq = 0
+        next_due = 0.0
+
+        while not self.stopped.is_set():
+            # Respect the processing rate cap, then wake as soon as a new frame arrives
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            wait_start = time.perf_counter()
+            lease = camera.lease_frame(last_seq, timeout=1.0)
+            if lease is None:
+                continue
+            self.wait_seconds.observe(time.perf_counter() - wait_start)
+            # Frames captured while the previous one was processing are never seen
+            if last_seq and lease.seq > last_seq + 1:
+                self.frames["skipped"].inc(lease.seq - last_seq - 1)
+            last_seq = lease.seq
+            next_due = time.monotonic() + self.frame_interval
+
+            with lease:
+                self.process_frame(lease.seq, lease.frame)
+            latency = time.time() - lease.captured_at
+            self.frame_latency.observe(latency)
+            camera.record_latency(latency)
+
+    def stop(self):
+        self.stopped.set()
+
+    def process_frame(self, seq: int, frame: np.ndarray):
+        """Run detection and threat confirmation for one (read-only) frame, then hand it on."""
+        inference = self.inference
+        if not inference.ready:
+            # Model still loading (or failed to load): stream the feed without detections
+            detections = Detections.empty(inference.class_names)
+            inferred = False
+            self.frames["model_error" if inference.failed else "loading"].inc()
+        elif self.gate is not None and not self.gate.should_infer(frame):
+            # Static scene: reuse the last result and skip alerting on stale detections
+            detections = self.last_detections or Detections.empty(inference.class_names)
+            inferred = False
+            self.frames["gated"].inc()
+        else:
+            # Run detection as part of the next cross-camera batch
+            inference_start = time.perf_counter()
+            detections = inference.infer(self.camera.camera_id, frame, timeout=5.0)
+            if detections is None:
+                self.frames["dropped"].inc()
+                return
+            self.inference_seconds.observe(time.perf_counter() - inference_start)
+            self.last_detections = detections
+            inferred = True
+            self.frames["processed"].inc()
+
+        annotated_frame = None
+
+        def render() -> np.ndarray:
+            nonlocal annotated_frame
+            if annotated_frame is None:
+                annotate_start = time.perf_counter()
+                annotated_frame = WeaponDetector.annotate(frame, detections)
+                self.annotate_seconds.observe(time.perf_counter() - annotate_start)
+            return annotated_frame
+
+        # Gated frames carry no new evidence
+        if inferred:
+            if self.tracker is not None:
+                # Confirmed threat tracks are re-offered until one actually alerts (not cooldown-suppressed)
+                for track in self.tracker.update(detections):
+                    if self.on_threat(render, track.class_name, track.peak_confidence, track.track_id):
+                        self.tracker.mark_alerted(track.track_id)
+            else:
+                for threat in detections.threats():
+                    self.on_threat(render, threat.class_name, threat.confidence, None)
+
+        self.on_frame(seq, frame, detections, render)
@@ -0,0 +1,251 @@
+import cv2
+import heapq
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+import numpy as np
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class ClipBuffer:
+    """
+    Rolling window of a camera's recent frames, held as JPEG bytes.
+
+    Bounded by both age and total size, so a high-resolution camera cannot
+    grow it past max_bytes whatever its frame rate.
+    """
+
+    def __init__(self, seconds: float = 10.0, max_bytes: int = 16 * 1024 * 1024):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.frames: Deque[Tuple[float, bytes]] = deque()
+        self.total_bytes = 0
+
+    def add(self, timestamp: float, jpeg: bytes):
+        with self.lock:
+            self.frames.append((timestamp, jpeg))
+            self.total_bytes += len(jpeg)
+            cutoff = timestamp - self.seconds
+            while self.frames and (self.frames[0][0] < cutoff or self.total_bytes > self.max_bytes):
+                _, dropped = self.frames.popleft()
+                self.total_bytes -= len(dropped)
+
+    def frames_between(self, start: float, end: float) -> List[Tuple[float, bytes]]:
+        """Buffered (timestamp, jpeg) pairs captured in [start, end]."""
+        with self.lock:
+            return [(timestamp, jpeg) for timestamp, jpeg in self.frames if start <= timestamp <= end]
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "frames": len(self.frames),
+                "bytes": self.total_bytes,
+                "seconds": round(self.frames[-1][0] - self.frames[0][0], 2) if self.frames else 0.0
+            }
+
+
+class AlertRecorder:
+    """
+    Saves an annotated snapshot and a pre/post-event clip for each alert.
+
+    record() only queues the work. A background thread writes the snapshot
+    straight away and the clip once the post-event window has been captured,
+    then deletes the oldest recordings while the directory exceeds max_bytes.
+    The directory is scanned once; after that its size is tracked as files
+    are written and deleted.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "recordings",
+        pre_seconds: float = 5.0,
+        post_seconds: float = 5.0,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        snapshot_quality: int = 90
+    ):
+        """
+        Initialize the recorder.
+
+        Args:
+            output_dir: Directory for <alert_id>.jpg snapshots and <alert_id>.mp4 clips
+            pre_seconds: Seconds of video kept from before the alert
+            post_seconds: Seconds of video kept from after the alert
+            max_bytes: Disk budget for the directory; oldest recordings are removed first
+            snapshot_quality: JPEG quality of the snapshot
+        """
+        self.output_dir = output_dir
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.max_bytes = max_bytes
+        self.snapshot_quality = snapshot_quality
+        self.jobs: "queue.Queue" = queue.Queue()
+        self.clips_due: List[Tuple[float, str, ClipBuffer, float]] = []  # Heap of (due, alert_id, buffer, alert time)
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.snapshots_written = 0
+        self.clips_written = 0
+        self.files_deleted = 0
+        # Recordings oldest first as (path, size), and their total; loaded on first use
+        self.recordings: Optional[Deque[Tuple[str, int]]] = None
+        self.total_bytes = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.jobs.put(None)
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def record(
+        self,
+        alert_id: str,
+        alert_time: float,
+        frame: Optional[np.ndarray],
+        clip_buffer: Optional[ClipBuffer]
+    ):
+        """
+        Queue the recordings for an alert. Returns immediately.
+
+        Args:
+            alert_id: Alert the files are named after
+            alert_time: Alert timestamp (time.time()), the centre of the clip
+            frame: Annotated frame for the snapshot; must not be modified afterwards.
+                None for a clip only (e.g. one fetched from a detection node later)
+            clip_buffer: The camera's ClipBuffer, or None for a snapshot only
+        """
+        if not _SAFE_ID.match(alert_id):
+            raise ValueError(f"Unsafe alert id for a file name: {alert_id!r}")
+        self.jobs.put((alert_id, alert_time, frame, clip_buffer))
+
+    def path_for(self, alert_id: str, kind: str) -> Optional[str]:
+        """Existing snapshot ("snapshot") or clip ("clip") file for an alert, if any."""
+        if not _SAFE_ID.match(alert_id):
+            return None
+        extension = "jpg" if kind == "snapshot" else "mp4"
+        path = os.path.join(self.output_dir, f"{alert_id}.{extension}")
+        return path if os.path.isfile(path) else None
+
+    def _run(self):
+        while self.running or self.clips_due:
+            timeout = 0.5
+            if self.clips_due:
+                timeout = min(timeout, max(0.0, self.clips_due[0][0] - time.time()))
+            try:
+                job = self.jobs.get(timeout=timeout)
+            except queue.Empty:
+                job = None
+
+            if job is not None:
+                alert_id, alert_time, frame, clip_buffer = job
+                if frame is not None:
+                    self._write_snapshot(alert_id, frame)
+                if clip_buffer is not None:
+                    heapq.heappush(
+                        self.clips_due,
+                        (alert_time + self.post_seconds, alert_id, clip_buffer, alert_time)
+                    )
+            elif not self.running:
+                # Stopping: write pending clips with whatever has been captured so far
+                while self.clips_due:
+                    _, alert_id, clip_buffer, alert_time = heapq.heappop(self.clips_due)
+                    self._write_clip(alert_id, clip_buffer, alert_time)
+                break
+
+            while self.clips_due and self.clips_due[0][0] <= time.time():
+                _, alert_id, clip_buffer, alert_time = heapq.heappop(self.clips_due)
+                self._write_clip(alert_id, clip_buffer, alert_time)
+
+    def _write_snapshot(self, alert_id: str, frame: np.ndarray):
+        try:
+            path = os.path.join(self.output_dir, f"{alert_id}.jpg")
+            if cv2.imwrite(path, frame, [cv2.IMWRITE_JPEG_QUALITY, self.snapshot_quality]):
+                self.snapshots_written += 1
+                self._enforce_retention(path)
+        except Exception as e:
+            print(f"Snapshot error for {alert_id}: {e}")
+
+    def _write_clip(self, alert_id: str, clip_buffer: ClipBuffer, alert_time: float):
+        frames = clip_buffer.frames_between(alert_time - self.pre_seconds, alert_time + self.post_seconds)
+        if len(frames) < 2:
+            return
+        path = os.path.join(self.output_dir, f"{alert_id}.mp4")
+        temp_path = path + ".part.mp4"
+        writer = None
+        try:
+            # Play back at the rate the buffer actually captured
+            fps = (len(frames) - 1) / max(frames[-1][0] - frames[0][0], 1e-3)
+            for _, jpeg in frames:
+                image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    continue
+                if writer is None:
+                    height, width = image.shape[:2]
+                    writer = cv2.VideoWriter(temp_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+                elif image.shape[:2] != (height, width):
+                    image = cv2.resize(image, (width, height))
+                writer.write(image)
+            if writer is not None:
+                writer.release()
+                writer = None
+                os.replace(temp_path, path)
+                self.clips_written += 1
+                self._enforce_retention(path)
+        except Exception as e:
+            print(f"Clip error for {alert_id}: {e}")
+        finally:
+            if writer is not None:
+                writer.release()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _load_recordings(self):
+        """Scan the directory once for recordings left by earlier runs."""
+        entries = []
+        for entry in os.scandir(self.output_dir):
+            if entry.is_file() and not entry.name.endswith(".part.mp4"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        self.recordings = deque((path, size) for _, path, size in sorted(entries))
+        self.total_bytes = sum(size for _, size in self.recordings)
+
+    def _enforce_retention(self, new_path: str):
+        """Account for a newly written file, then delete the oldest recordings until the budget fits."""
+        if self.recordings is None:
+            self._load_recordings()  # Includes new_path
+        else:
+            try:
+                size = os.path.getsize(new_path)
+            except OSError:
+                return
+            self.recordings.append((new_path, size))
+            self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.recordings) > 1:
+            path, size = self.recordings.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+                self.files_deleted += 1
+            except OSError:
+                pass  # Already gone
+
+    def get_stats(self) -> dict:
+        return {
+            "snapshots_written": self.snapshots_written,
+            "clips_written": self.clips_written,
+            "clips_pending": len(self.clips_due),
+            "files_deleted": self.files_deleted,
+            "total_bytes": self.total_bytes
+        }
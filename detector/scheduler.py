@@ -0,0 +1,305 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from .yolo_detector import Detections, WeaponDetector
+
+
+@dataclass
+class BatchStats:
+    """Timing for one batched forward pass."""
+    timestamp: float
+    batch_size: int
+    queue_wait: float  # Seconds the oldest frame in the batch waited before inference
+    inference_time: float  # Seconds spent in detect_batch
+
+
+class _InferenceRequest:
+    """A single camera's frame waiting for a batch slot."""
+
+    __slots__ = ("camera_id", "frame", "submitted", "event", "result")
+
+    def __init__(self, camera_id: str, frame: np.ndarray):
+        self.camera_id = camera_id
+        self.frame = frame
+        self.submitted = time.perf_counter()
+        self.event = threading.Event()
+        self.result: Optional[Detections] = None
+
+    def complete(self, result: Optional[Detections]):
+        self.result = result
+        self.event.set()
+
+
+class InferenceScheduler:
+    """Collects the newest frame from each camera and runs them through the detector in batches."""
+
+    def __init__(
+        self,
+        detector: Optional[WeaponDetector] = None,
+        max_batch_size: int = 8,
+        max_latency: float = 0.02,
+        stats_window: int = 256,
+        active_window: float = 1.0,
+        detector_factory: Optional[Callable[[], WeaponDetector]] = None,
+        warmup: bool = True
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            detector: Shared detector used for every batch, or None to build it
+                with detector_factory
+            max_batch_size: Largest number of frames sent to the model at once
+            max_latency: Seconds the oldest queued frame may wait for the batch to fill
+            stats_window: Number of recent batches kept for timing statistics
+            active_window: Seconds since its last frame for a camera to still count
+                as active (idle or motion-gated cameras are not waited for)
+            detector_factory: Builds the detector on the batching thread once
+                started, so the model loads in the background
+            warmup: Run a blank batch before accepting frames
+        """
+        if detector is None and detector_factory is None:
+            raise ValueError("Either detector or detector_factory is required")
+        self.detector = detector
+        self.detector_factory = detector_factory
+        self.class_names = detector.class_names if detector is not None else {}
+        self.warmup = warmup
+        self.model_ready = threading.Event()  # Set once the model is loaded and warmed up
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.load_error: Optional[str] = None
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_latency = max_latency
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.condition = threading.Condition()
+        # One slot per camera: a newer frame replaces one that has not been batched yet
+        self.pending: "OrderedDict[str, _InferenceRequest]" = OrderedDict()
+        self.active_window = active_window
+        self.last_submit: Dict[str, float] = {}
+        self.batch_stats: Deque[BatchStats] = deque(maxlen=stats_window)
+        self.frames_processed = 0
+        self.frames_superseded = 0
+        self.frames_failed = 0  # Frames in batches where detect_batch raised
+        self.batches_failed = 0
+
+    def start(self):
+        """Start the batching loop in a background thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._batch_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the batching loop and release any waiting callers."""
+        with self.condition:
+            self.running = False
+            for request in self.pending.values():
+                request.complete(None)
+            self.pending.clear()
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def infer(
+        self,
+        camera_id: str,
+        frame: np.ndarray,
+        timeout: Optional[float] = None
+    ) -> Optional[Detections]:
+        """
+        Queue a frame for the next batch and wait for its detections.
+
+        Annotation is left to the caller (WeaponDetector.annotate) so drawing
+        happens on the camera threads rather than serialising on the batch thread.
+
+        Args:
+            camera_id: Camera the frame came from
+            frame: BGR image from OpenCV
+            timeout: Maximum seconds to wait for the result
+
+        Returns:
+            Detections, or None if the model is not ready yet, the frame
+            was superseded, timed out or the batch failed
+        """
+        if not self.model_ready.is_set():
+            return None
+        request = _InferenceRequest(camera_id, frame)
+        with self.condition:
+            if not self.running:
+                return None
+            self.last_submit[camera_id] = request.submitted
+            previous = self.pending.pop(camera_id, None)
+            if previous is not None:
+                self.frames_superseded += 1
+                previous.complete(None)
+            self.pending[camera_id] = request
+            self.condition.notify_all()
+
+        if not request.event.wait(timeout):
+            return None
+        return request.result
+
+    def _batch_ready(self, deadline: float) -> bool:
+        """Whether the queued frames should be flushed now."""
+        if len(self.pending) >= self.max_batch_size:
+            return True
+        # Every active camera is already waiting, so nothing else is likely to join
+        if len(self.pending) >= self._active_camera_count():
+            return True
+        return time.perf_counter() >= deadline
+
+    def _active_camera_count(self) -> int:
+        cutoff = time.perf_counter() - self.active_window
+        return sum(1 for submitted in self.last_submit.values() if submitted >= cutoff)
+
+    def _next_batch(self) -> List[_InferenceRequest]:
+        """Block until a batch is ready, then take it off the queue."""
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+            if not self.running:
+                return []
+
+            oldest = next(iter(self.pending.values()))
+            deadline = oldest.submitted + self.max_latency
+            while self.running and not self._batch_ready(deadline):
+                self.condition.wait(max(0.0, deadline - time.perf_counter()))
+
+            batch = []
+            while self.pending and len(batch) < self.max_batch_size:
+                _, request = self.pending.popitem(last=False)
+                batch.append(request)
+            return batch
+
+    @property
+    def ready(self) -> bool:
+        return self.model_ready.is_set()
+
+    @property
+    def failed(self) -> bool:
+        """True once the model failed to load; the scheduler never becomes ready after that."""
+        return self.load_error is not None
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model is loaded and warmed up."""
+        return self.model_ready.wait(timeout)
+
+    def _prepare_detector(self) -> bool:
+        """Load (if needed) and warm up the detector on the batching thread."""
+        try:
+            if self.detector is None:
+                load_start = time.perf_counter()
+                self.detector = self.detector_factory()
+                self.load_seconds = time.perf_counter() - load_start
+                self.class_names = self.detector.class_names
+            if self.warmup:
+                self.warmup_seconds = self.detector.warmup(self.max_batch_size)
+                print(f"Model warmed up in {self.warmup_seconds:.2f}s")
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"Model load failed: {e}")
+            return False
+        self.model_ready.set()
+        return True
+
+    def _batch_loop(self):
+        """Main batching loop running in background thread."""
+        if not self._prepare_detector():
+            return
+        while self.running:
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            start_time = time.perf_counter()
+            try:
+                results = self.detector.detect_batch([request.frame for request in batch])
+            except Exception as e:
+                print(f"Batch inference error: {e}")
+                for request in batch:
+                    request.complete(None)
+                self.frames_failed += len(batch)
+                self.batches_failed += 1
+                continue
+            end_time = time.perf_counter()
+
+            for request, result in zip(batch, results):
+                request.complete(result)
+
+            self.frames_processed += len(batch)
+            self.batch_stats.append(BatchStats(
+                timestamp=time.time(),
+                batch_size=len(batch),
+                queue_wait=start_time - min(request.submitted for request in batch),
+                inference_time=end_time - start_time
+            ))
+
+    def get_stats(self) -> dict:
+        """Get batch size and timing statistics over the recent window."""
+        stats = list(self.batch_stats)
+        summary = {
+            "ready": self.ready,
+            "max_batch_size": self.max_batch_size,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "cameras": len(self.last_submit),
+            "active_cameras": self._active_camera_count(),
+            "frames_processed": self.frames_processed,
+            "frames_superseded": self.frames_superseded,
+            "frames_failed": self.frames_failed,
+            "batches_failed": self.batches_failed,
+            "batches": len(stats),
+        }
+        if not stats:
+            return summary
+
+        inference_ms = sorted(s.inference_time * 1000 for s in stats)
+        wait_ms = sorted(s.queue_wait * 1000 for s in stats)
+        frames = sum(s.batch_size for s in stats)
+        busy_time = sum(s.inference_time for s in stats)
+        elapsed = stats[-1].timestamp - stats[0].timestamp
+
+        summary.update({
+            "avg_batch_size": round(frames / len(stats), 2),
+            "inference_ms_p50": round(_percentile(inference_ms, 50), 2),
+            "inference_ms_p95": round(_percentile(inference_ms, 95), 2),
+            "queue_wait_ms_p50": round(_percentile(wait_ms, 50), 2),
+            "queue_wait_ms_p95": round(_percentile(wait_ms, 95), 2),
+            "ms_per_frame": round(busy_time * 1000 / frames, 2),
+            "throughput_fps": round(frames / elapsed, 1) if elapsed > 0 else None,
+            "recent": [
+                {
+                    "batch_size": s.batch_size,
+                    "queue_wait_ms": round(s.queue_wait * 1000, 2),
+                    "inference_ms": round(s.inference_time * 1000, 2)
+                }
+                for s in stats[-20:]
+            ]
+        })
+        return summary
+
+    def get_readiness(self) -> dict:
+        """Model load and warm-up state, for health checks."""
+        return {
+            "ready": self.ready,
+            "failed": self.failed,
+            "load_seconds": _round(self.load_seconds),
+            "warmup_seconds": _round(self.warmup_seconds),
+            "error": self.load_error
+        }
+
+
+def _round(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds, 3) if seconds is not None else None
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
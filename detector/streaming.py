@@ -0,0 +1,439 @@
+import cv2
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from .metrics import PIPELINE_STAGE_SECONDS, STREAM_FRAMES_DROPPED
+
+
+class SubscriptionRegistry:
+    """Tracks which clients are watching which camera."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers: Dict[str, Set[str]] = {}  # camera_id -> client ids
+
+    def subscribe(self, client_id: str, camera_id: str) -> bool:
+        """Add a subscriber. Returns True if the client was not already subscribed."""
+        with self.lock:
+            clients = self.subscribers.setdefault(camera_id, set())
+            if client_id in clients:
+                return False
+            clients.add(client_id)
+            return True
+
+    def unsubscribe(self, client_id: str, camera_id: str) -> bool:
+        """Remove a subscriber. Returns True if the client was subscribed."""
+        with self.lock:
+            clients = self.subscribers.get(camera_id)
+            if not clients or client_id not in clients:
+                return False
+            clients.discard(client_id)
+            return True
+
+    def remove_client(self, client_id: str) -> List[str]:
+        """Drop a client from every camera. Returns the cameras it was watching."""
+        with self.lock:
+            cameras = [camera_id for camera_id, clients in self.subscribers.items() if client_id in clients]
+            for camera_id in cameras:
+                self.subscribers[camera_id].discard(client_id)
+            return cameras
+
+    def clients_for(self, camera_id: str) -> List[str]:
+        """Clients currently watching a camera."""
+        with self.lock:
+            return list(self.subscribers.get(camera_id, ()))
+
+    def count(self, camera_id: str) -> int:
+        """Number of clients currently watching a camera."""
+        return len(self.subscribers.get(camera_id, ()))
+
+    def get_stats(self) -> Dict[str, int]:
+        """Subscriber count per camera."""
+        with self.lock:
+            return {camera_id: len(clients) for camera_id, clients in self.subscribers.items()}
+
+
+# Delivery tiers from best to most degraded: (scale, JPEG quality, max FPS)
+QUALITY_TIERS = [
+    (1.0, 70, 15),
+    (0.75, 60, 10),
+    (0.5, 50, 6),
+    (0.5, 40, 3),
+    (0.35, 35, 1),
+]
+
+
+def encode_jpeg(frame: np.ndarray, scale: float = 1.0, quality: int = 70) -> bytes:
+    """Encode a BGR frame to JPEG, optionally downscaling it first."""
+    if scale < 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+class FrameCache:
+    """
+    Shared JPEG encodings of recent frames, keyed by camera, frame sequence and encoding.
+
+    However many WebSocket clients or MJPEG viewers want a frame at the same
+    scale and quality, it is encoded once; concurrent requests for a key that
+    is still being encoded wait for that encode instead of repeating it.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.jpegs: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.encoding: Dict[tuple, threading.Event] = {}
+        # Latest frame per camera (as its render callable), kept only while MJPEG viewers exist
+        self.latest: Dict[str, Tuple[int, Callable[[], np.ndarray]]] = {}
+        self.viewers: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def encode(
+        self,
+        camera_id: str,
+        seq: int,
+        render_frame: Callable[[], np.ndarray],
+        scale: float = 1.0,
+        quality: int = 70,
+        variant: str = "annotated"
+    ) -> bytes:
+        """
+        Get the JPEG for a frame, encoding it only if no one has yet.
+
+        Args:
+            camera_id: Camera the frame belongs to
+            seq: Frame sequence number from CameraStream
+            render_frame: Produces the frame if an encode is needed
+            scale: Downscale factor applied before encoding
+            quality: JPEG quality
+            variant: What render_frame draws ("annotated" or "raw"), so the
+                two renderings of one frame are cached separately
+
+        Returns:
+            Encoded JPEG bytes
+        """
+        key = (camera_id, seq, scale, quality, variant)
+        while True:
+            with self.lock:
+                jpeg = self.jpegs.get(key)
+                if jpeg is not None:
+                    self.jpegs.move_to_end(key)
+                    self.hits += 1
+                    return jpeg
+                in_progress = self.encoding.get(key)
+                if in_progress is None:
+                    in_progress = self.encoding[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Another thread is encoding this exact frame; wait and re-check
+            in_progress.wait(timeout=1.0)
+
+        try:
+            frame = render_frame()
+            encode_start = time.perf_counter()
+            jpeg = encode_jpeg(frame, scale, quality)
+            PIPELINE_STAGE_SECONDS.labels(camera=camera_id, stage="encode").observe(time.perf_counter() - encode_start)
+            with self.lock:
+                self.jpegs[key] = jpeg
+                while len(self.jpegs) > self.max_entries:
+                    self.jpegs.popitem(last=False)
+            return jpeg
+        finally:
+            with self.lock:
+                del self.encoding[key]
+            in_progress.set()
+
+    def add_viewer(self, camera_id: str):
+        with self.lock:
+            self.viewers[camera_id] = self.viewers.get(camera_id, 0) + 1
+
+    def remove_viewer(self, camera_id: str):
+        with self.lock:
+            self.viewers[camera_id] = max(0, self.viewers.get(camera_id, 0) - 1)
+            if self.viewers[camera_id] == 0:
+                self.latest.pop(camera_id, None)
+
+    def viewer_count(self, camera_id: str) -> int:
+        return self.viewers.get(camera_id, 0)
+
+    def publish(self, camera_id: str, seq: int, frame: np.ndarray):
+        """Make a rendered frame available to MJPEG viewers. The frame must not be modified afterwards."""
+        with self.frame_ready:
+            self.latest[camera_id] = (seq, lambda: frame)
+            self.frame_ready.notify_all()
+
+    def put(
+        self,
+        camera_id: str,
+        seq: int,
+        jpeg: bytes,
+        render_frame: Callable[[], np.ndarray],
+        quality: int = 70,
+        variant: str = "annotated"
+    ):
+        """
+        Add a frame that arrived already encoded (full scale, at the given quality).
+
+        Requests for that encoding are served the bytes as they are; other
+        scales and qualities call render_frame (e.g. decoding the JPEG) and
+        encode as usual. Annotated frames also go to MJPEG viewers.
+        """
+        with self.frame_ready:
+            self.jpegs[(camera_id, seq, 1.0, quality, variant)] = jpeg
+            while len(self.jpegs) > self.max_entries:
+                self.jpegs.popitem(last=False)
+            if variant == "annotated" and self.viewers.get(camera_id):
+                self.latest[camera_id] = (seq, render_frame)
+                self.frame_ready.notify_all()
+
+    def wait_for_jpeg(
+        self,
+        camera_id: str,
+        after_seq: int,
+        timeout: Optional[float] = None,
+        quality: int = 70
+    ) -> Tuple[int, Optional[bytes]]:
+        """
+        Block until a frame newer than after_seq is published, then return its JPEG.
+
+        Returns:
+            Tuple of (frame_seq, jpeg bytes), or (after_seq, None) on timeout
+        """
+        with self.frame_ready:
+            if not self.frame_ready.wait_for(
+                lambda: camera_id in self.latest and self.latest[camera_id][0] > after_seq,
+                timeout=timeout
+            ):
+                return after_seq, None
+            seq, render_frame = self.latest[camera_id]
+        return seq, self.encode(camera_id, seq, render_frame, quality=quality)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.jpegs),
+                "hits": self.hits,
+                "misses": self.misses,
+                "mjpeg_viewers": dict(self.viewers)
+            }
+
+
+class ClientLink:
+    """Delivery state for one connected client."""
+
+    __slots__ = (
+        "client_id", "tier", "rtt", "in_flight", "last_sent", "last_tier_change",
+        "frames_sent", "frames_dropped", "bytes_sent", "acks_missed"
+    )
+
+    def __init__(self, client_id: str, tier: int):
+        self.client_id = client_id
+        self.tier = tier
+        self.rtt: Optional[float] = None  # Smoothed acknowledgement latency in seconds
+        self.in_flight: Dict[str, Tuple[float, int]] = {}  # camera_id -> (sent_time, bytes)
+        self.last_sent: Dict[str, float] = {}
+        self.last_tier_change = time.monotonic()
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self.acks_missed = 0
+
+    def to_dict(self) -> dict:
+        scale, quality, max_fps = QUALITY_TIERS[self.tier]
+        return {
+            "tier": self.tier,
+            "scale": scale,
+            "quality": quality,
+            "max_fps": max_fps,
+            "rtt_ms": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            "in_flight": len(self.in_flight),
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "bytes_sent": self.bytes_sent,
+            "acks_missed": self.acks_missed
+        }
+
+
+class FrameDelivery:
+    """
+    Latest-frame-wins delivery of camera frames to each client.
+
+    Each client has at most one unacknowledged frame per camera. Frames that
+    arrive while a client is still busy (or ahead of its frame rate) are
+    dropped, never queued. Acknowledgement latency moves the client between
+    QUALITY_TIERS, and a global byte budget caps memory held by pending emits.
+    """
+
+    def __init__(
+        self,
+        socketio,
+        subscriptions: SubscriptionRegistry,
+        frame_cache: FrameCache,
+        max_pending_bytes: int = 32 * 1024 * 1024,
+        ack_timeout: float = 5.0,
+        slow_rtt: float = 0.25,
+        fast_rtt: float = 0.08,
+        tier_hold_seconds: float = 3.0
+    ):
+        """
+        Initialize frame delivery.
+
+        Args:
+            socketio: Flask-SocketIO instance used to emit frames
+            subscriptions: Registry of which clients watch which camera
+            frame_cache: Shared cache the JPEG encodings come from
+            max_pending_bytes: Cap on encoded bytes sent but not yet acknowledged
+            ack_timeout: Seconds before an unacknowledged frame is written off
+            slow_rtt: Smoothed ack latency (seconds) above which a client is degraded
+            fast_rtt: Smoothed ack latency (seconds) below which a client may upgrade
+            tier_hold_seconds: Minimum seconds between upgrades for one client
+        """
+        self.socketio = socketio
+        self.subscriptions = subscriptions
+        self.frame_cache = frame_cache
+        self.max_pending_bytes = max_pending_bytes
+        self.ack_timeout = ack_timeout
+        self.slow_rtt = slow_rtt
+        self.fast_rtt = fast_rtt
+        self.tier_hold_seconds = tier_hold_seconds
+        self.lock = threading.Lock()
+        self.clients: Dict[str, ClientLink] = {}
+        self.pending_bytes = 0
+        self.frames_dropped_budget = 0
+
+    def add_client(self, client_id: str):
+        with self.lock:
+            self.clients.setdefault(client_id, ClientLink(client_id, tier=0))
+
+    def remove_client(self, client_id: str):
+        with self.lock:
+            link = self.clients.pop(client_id, None)
+            if link:
+                self.pending_bytes -= sum(size for _, size in link.in_flight.values())
+
+    def _set_tier(self, link: ClientLink, tier: int, now: float):
+        tier = min(max(tier, 0), len(QUALITY_TIERS) - 1)
+        if tier != link.tier:
+            link.tier = tier
+            link.last_tier_change = now
+
+    def _ready(self, link: ClientLink, camera_id: str, now: float) -> bool:
+        """Whether a client can take a new frame for this camera right now (lock held)."""
+        pending = link.in_flight.get(camera_id)
+        if pending is not None:
+            sent_time, size = pending
+            if now - sent_time < self.ack_timeout:
+                return False
+            # Ack never came: write the frame off and back off the client
+            del link.in_flight[camera_id]
+            self.pending_bytes -= size
+            link.acks_missed += 1
+            self._set_tier(link, link.tier + 1, now)
+
+        max_fps = QUALITY_TIERS[link.tier][2]
+        return now - link.last_sent.get(camera_id, 0.0) >= 1.0 / max_fps
+
+    def publish(
+        self,
+        camera_id: str,
+        seq: int,
+        render_frame: Callable[[], np.ndarray],
+        meta: dict,
+        event: str,
+        variant: str = "annotated"
+    ):
+        """
+        Offer a new frame to every subscriber of a camera.
+
+        Args:
+            camera_id: Camera the frame belongs to
+            seq: Frame sequence number, used as the encode cache key
+            render_frame: Produces the frame to send; only called if at least one
+                client is ready, and the result is encoded once per tier in use
+            meta: Fields sent alongside the JPEG (JSON-serialisable or bytes)
+            event: Socket.IO event name
+            variant: Cache variant of render_frame's output (see FrameCache.encode)
+        """
+        now = time.monotonic()
+        ready: Dict[int, List[ClientLink]] = {}
+        with self.lock:
+            for client_id in self.subscriptions.clients_for(camera_id):
+                link = self.clients.get(client_id)
+                if link is None:
+                    continue
+                if self._ready(link, camera_id, now):
+                    ready.setdefault(link.tier, []).append(link)
+                else:
+                    link.frames_dropped += 1
+                    STREAM_FRAMES_DROPPED.labels(camera=camera_id, reason="busy").inc()
+
+        emit_seconds = PIPELINE_STAGE_SECONDS.labels(camera=camera_id, stage="emit")
+        for tier, links in ready.items():
+            scale, quality, _ = QUALITY_TIERS[tier]
+            jpeg = self.frame_cache.encode(camera_id, seq, render_frame, scale, quality, variant)
+            for link in links:
+                with self.lock:
+                    if link.client_id not in self.clients:
+                        continue
+                    if self.pending_bytes + len(jpeg) > self.max_pending_bytes:
+                        self.frames_dropped_budget += 1
+                        link.frames_dropped += 1
+                        STREAM_FRAMES_DROPPED.labels(camera=camera_id, reason="budget").inc()
+                        continue
+                    link.in_flight[camera_id] = (now, len(jpeg))
+                    link.last_sent[camera_id] = now
+                    link.frames_sent += 1
+                    link.bytes_sent += len(jpeg)
+                    self.pending_bytes += len(jpeg)
+
+                emit_start = time.perf_counter()
+                self.socketio.emit(
+                    event,
+                    dict(meta, frame=jpeg, tier=tier),
+                    to=link.client_id,
+                    callback=self._ack_callback(link.client_id, camera_id, now)
+                )
+                emit_seconds.observe(time.perf_counter() - emit_start)
+
+    def _ack_callback(self, client_id: str, camera_id: str, sent_time: float):
+        def on_ack(*_):
+            self._on_ack(client_id, camera_id, sent_time)
+        return on_ack
+
+    def _on_ack(self, client_id: str, camera_id: str, sent_time: float):
+        """Record a client's acknowledgement and adapt its tier."""
+        now = time.monotonic()
+        with self.lock:
+            link = self.clients.get(client_id)
+            if link is None:
+                return
+            pending = link.in_flight.get(camera_id)
+            if pending is None or pending[0] != sent_time:
+                return  # Already written off as timed out
+            del link.in_flight[camera_id]
+            self.pending_bytes -= pending[1]
+
+            rtt = now - sent_time
+            link.rtt = rtt if link.rtt is None else 0.8 * link.rtt + 0.2 * rtt
+            if link.rtt > self.slow_rtt:
+                if now - link.last_tier_change >= self.tier_hold_seconds / 3:
+                    self._set_tier(link, link.tier + 1, now)
+            elif link.rtt < self.fast_rtt and now - link.last_tier_change >= self.tier_hold_seconds:
+                self._set_tier(link, link.tier - 1, now)
+
+    def get_stats(self) -> dict:
+        """Per-client delivery state and the shared pending-bytes budget."""
+        with self.lock:
+            return {
+                "pending_bytes": self.pending_bytes,
+                "max_pending_bytes": self.max_pending_bytes,
+                "frames_dropped_budget": self.frames_dropped_budget,
+                "clients": {client_id: link.to_dict() for client_id, link in self.clients.items()}
+            }
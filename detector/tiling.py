@@ -0,0 +1,109 @@
+from typing import List, Tuple
+import numpy as np
+
+from .backends import BackendOutput, _empty_output
+from .ops import nms
+
+# Region of a frame in pixels: (x1, y1, x2, y2)
+Region = Tuple[int, int, int, int]
+
+
+def _starts(length: int, tile_size: int, stride: int) -> List[int]:
+    """Tile offsets along one axis, with the last tile flush against the edge."""
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, stride))
+    starts.append(length - tile_size)
+    return starts
+
+
+def grid_tiles(width: int, height: int, tile_size: int = 640, overlap: float = 0.2) -> List[Region]:
+    """
+    Overlapping square tiles covering the whole frame.
+
+    Args:
+        width, height: Frame size in pixels
+        tile_size: Tile side, normally the model input size so tiles run at native resolution
+        overlap: Fraction of a tile shared with its neighbour, so objects cut by
+            one tile edge appear whole in the next tile
+
+    Returns:
+        Tile regions, or an empty list if the frame already fits in one tile
+    """
+    if width <= tile_size and height <= tile_size:
+        return []
+    stride = max(1, int(tile_size * (1.0 - overlap)))
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in _starts(height, tile_size, stride)
+        for x in _starts(width, tile_size, stride)
+    ]
+
+
+def person_tiles(
+    person_boxes: np.ndarray,
+    width: int,
+    height: int,
+    tile_size: int = 640,
+    padding: float = 0.5
+) -> List[Region]:
+    """
+    Square regions around people, for finding what they are holding.
+
+    Each person box is padded by `padding` times its larger side on every side
+    (arms and hands reach outside the box) and grown to at least tile_size.
+    People already inside an earlier region share it.
+
+    Args:
+        person_boxes: (N, 4) xyxy person boxes in frame pixels
+        width, height: Frame size in pixels
+        tile_size: Minimum region side
+        padding: Extra margin as a fraction of the person's larger side
+
+    Returns:
+        Regions clipped to the frame, at most one per person
+    """
+    regions: List[Region] = []
+    for x1, y1, x2, y2 in np.asarray(person_boxes, dtype=np.float32).tolist():
+        reach = max(x2 - x1, y2 - y1) * padding
+        padded = (x1 - reach, y1 - reach, x2 + reach, y2 + reach)
+        if any(
+            rx1 <= max(padded[0], 0) and ry1 <= max(padded[1], 0)
+            and rx2 >= min(padded[2], width) and ry2 >= min(padded[3], height)
+            for rx1, ry1, rx2, ry2 in regions
+        ):
+            continue
+
+        side = max(tile_size, padded[2] - padded[0], padded[3] - padded[1])
+        center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+        region_width, region_height = min(side, width), min(side, height)
+        left = int(min(max(center_x - region_width / 2, 0), width - region_width))
+        top = int(min(max(center_y - region_height / 2, 0), height - region_height))
+        regions.append((left, top, int(left + region_width), int(top + region_height)))
+    return regions
+
+
+def shift_output(output: BackendOutput, offset_x: int, offset_y: int) -> BackendOutput:
+    """Move a tile's detections into full-frame coordinates."""
+    boxes, confidences, class_ids = output
+    if len(boxes) == 0:
+        return output
+    return boxes + np.array([offset_x, offset_y, offset_x, offset_y], dtype=boxes.dtype), confidences, class_ids
+
+
+def merge_outputs(
+    outputs: List[BackendOutput],
+    iou_threshold: float = 0.45,
+    max_detections: int = 300
+) -> BackendOutput:
+    """Combine full-frame and tile detections, removing cross-tile duplicates with class-aware NMS."""
+    outputs = [output for output in outputs if len(output[0])]
+    if not outputs:
+        return _empty_output()
+    if len(outputs) == 1:
+        return outputs[0]
+    boxes = np.concatenate([output[0] for output in outputs])
+    confidences = np.concatenate([output[1] for output in outputs])
+    class_ids = np.concatenate([output[2] for output in outputs])
+    keep = nms(boxes, confidences, class_ids, iou_threshold, max_detections)
+    return boxes[keep], confidences[keep], class_ids[keep]
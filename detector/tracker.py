@@ -0,0 +1,189 @@
+import itertools
+import time
+from typing import List
+import numpy as np
+
+from .ops import pairwise_iou
+from .yolo_detector import KIND_THREAT, Detections
+
+# Track ids are unique across every camera's tracker, so alerts can be correlated
+_track_ids = itertools.count(1)
+
+
+class Track:
+    """One object followed across frames."""
+
+    __slots__ = (
+        "track_id", "class_id", "class_name", "kind", "box", "confidence", "peak_confidence",
+        "history", "misses", "confirmed", "alerted", "first_seen", "last_seen"
+    )
+
+    def __init__(self, class_id: int, class_name: str, kind: int, box: np.ndarray, confidence: float):
+        self.track_id = next(_track_ids)
+        self.class_id = class_id
+        self.class_name = class_name
+        self.kind = kind
+        self.box = box
+        self.confidence = confidence
+        self.peak_confidence = confidence
+        self.history = 1  # Bit per recent frame, newest lowest: 1 = matched
+        self.misses = 0
+        self.confirmed = False
+        self.alerted = False  # Set by mark_alerted once an alert was actually raised for it
+        self.first_seen = self.last_seen = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "track_id": self.track_id,
+            "class_name": self.class_name,
+            "bbox": [int(v) for v in self.box],
+            "confidence": round(self.confidence, 3),
+            "confirmed": self.confirmed,
+            "alerted": self.alerted,
+            "age": round(self.last_seen - self.first_seen, 2)
+        }
+
+
+class ObjectTracker:
+    """
+    IoU tracker with K-of-N confirmation, for one camera.
+
+    Detections are matched to tracks of the same class by greedy IoU,
+    confident detections first (as in ByteTrack) so weak ones only extend
+    tracks that are left over. A track is confirmed once it was matched in
+    confirm_hits of the last confirm_window frames, which filters out
+    single-frame flickers before they reach alerting. A confirmed threat
+    track is offered for alerting on every frame it is seen until the caller
+    reports (mark_alerted) that an alert was raised, so one suppressed by the
+    alert cooldown still alerts once the cooldown has passed.
+
+    Tracks do not follow objects from one camera to another; alerts for the
+    same threat on several cameras are merged by AlertManager's site
+    correlation instead.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        confirm_hits: int = 3,
+        confirm_window: int = 5,
+        max_misses: int = 15,
+        high_confidence: float = 0.5
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            iou_threshold: Minimum overlap for a detection to continue a track
+            confirm_hits: Matched frames (K) needed to confirm a track
+            confirm_window: Recent frames (N) those hits are counted over
+            max_misses: Consecutive unmatched frames before a track is dropped
+            high_confidence: Detections at or above this are associated first
+        """
+        if not 1 <= confirm_hits <= confirm_window:
+            raise ValueError(
+                f"confirm_hits ({confirm_hits}) must be between 1 and confirm_window ({confirm_window}), "
+                "or no track could ever be confirmed"
+            )
+        self.iou_threshold = iou_threshold
+        self.confirm_hits = confirm_hits
+        self.window_mask = (1 << confirm_window) - 1
+        self.max_misses = max_misses
+        self.high_confidence = high_confidence
+        self.tracks: List[Track] = []
+        self.tracks_confirmed = 0
+
+    def _associate(self, iou: np.ndarray, candidates: np.ndarray, matches: dict, used_tracks: set):
+        """Greedily pair tracks with candidate detections, highest IoU first."""
+        track_indices, det_indices = np.nonzero((iou >= self.iou_threshold) & candidates[None, :])
+        if not len(track_indices):
+            return
+        order = np.argsort(-iou[track_indices, det_indices], kind="stable")
+        for track_index, det_index in zip(track_indices[order].tolist(), det_indices[order].tolist()):
+            if track_index in used_tracks or det_index in matches:
+                continue
+            matches[det_index] = track_index
+            used_tracks.add(track_index)
+
+    def update(self, detections: Detections) -> List[Track]:
+        """
+        Advance the tracker by one inferred frame.
+
+        Sets detections.track_ids to the track of every detection.
+
+        Returns:
+            Confirmed threat tracks matched in this frame that have not alerted yet
+        """
+        count = len(detections)
+        matches = {}  # detection index -> track index
+        if self.tracks and count:
+            track_boxes = np.array([track.box for track in self.tracks], dtype=np.float32)
+            track_classes = np.array([track.class_id for track in self.tracks], dtype=np.int32)
+            iou = pairwise_iou(track_boxes, detections.boxes.astype(np.float32))
+            iou[track_classes[:, None] != detections.class_ids[None, :]] = 0
+            high = detections.confidences >= self.high_confidence
+            used_tracks = set()
+            self._associate(iou, high, matches, used_tracks)
+            self._associate(iou, ~high, matches, used_tracks)
+
+        now = time.time()
+        matched_tracks = set(matches.values())
+        survivors = []
+        for index, track in enumerate(self.tracks):
+            if index in matched_tracks:
+                survivors.append(track)
+                continue
+            track.history = (track.history << 1) & self.window_mask
+            track.misses += 1
+            if track.misses <= self.max_misses:
+                survivors.append(track)
+
+        track_ids = np.empty(count, dtype=np.int64)
+        pending_alerts = []
+        for det_index in range(count):
+            confidence = float(detections.confidences[det_index])
+            track_index = matches.get(det_index)
+            if track_index is None:
+                class_id = int(detections.class_ids[det_index])
+                track = Track(
+                    class_id,
+                    detections.class_names[class_id],
+                    int(detections.kinds[det_index]),
+                    detections.boxes[det_index].astype(np.float32),
+                    confidence
+                )
+                survivors.append(track)
+            else:
+                track = self.tracks[track_index]
+                track.box = detections.boxes[det_index].astype(np.float32)
+                track.confidence = confidence
+                track.peak_confidence = max(track.peak_confidence, confidence)
+                track.history = ((track.history << 1) | 1) & self.window_mask
+                track.misses = 0
+                track.last_seen = now
+            track_ids[det_index] = track.track_id
+
+            if not track.confirmed and bin(track.history).count("1") >= self.confirm_hits:
+                track.confirmed = True
+                self.tracks_confirmed += 1
+            if track.confirmed and not track.alerted and track.kind == KIND_THREAT:
+                pending_alerts.append(track)
+
+        self.tracks = survivors
+        detections.track_ids = track_ids
+        return pending_alerts
+
+    def mark_alerted(self, track_id: int) -> bool:
+        """Stop offering a track for alerting. Returns False if it is no longer tracked."""
+        for track in self.tracks:
+            if track.track_id == track_id:
+                track.alerted = True
+                return True
+        return False
+
+    def get_stats(self) -> dict:
+        return {
+            "active_tracks": len(self.tracks),
+            "confirmed_tracks": sum(1 for track in self.tracks if track.confirmed),
+            "tracks_confirmed_total": self.tracks_confirmed
+        }
@@ -0,0 +1,427 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .yolo_detector import Detections, WeaponDetector
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment owned by the parent without adopting its lifetime."""
+    shm = shared_memory.SharedMemory(name=name)
+    # The parent creates and unlinks every segment; stop this process's resource
+    # tracker from unlinking it (and warning about a "leak") when we exit
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _worker_main(
+    worker_index: int,
+    model_path: str,
+    confidence_threshold: float,
+    backend: str,
+    imgsz: int,
+    max_batch_size: int,
+    detector_class: type,
+    detector_options: dict,
+    requests: mp.Queue,
+    results: mp.Queue
+):
+    """Entry point for a detection worker process."""
+    load_start = time.perf_counter()
+    try:
+        detector = detector_class(
+            model_path=model_path,
+            confidence_threshold=confidence_threshold,
+            backend=backend,
+            imgsz=imgsz,
+            **detector_options
+        )
+        load_seconds = time.perf_counter() - load_start
+        warmup_seconds = detector.warmup(max_batch_size)
+    except Exception as e:
+        # Report instead of dying silently; the pool restarts the worker after a backoff
+        results.put(("error", worker_index, f"{type(e).__name__}: {e}"))
+        return
+    results.put(("ready", worker_index, detector.class_names, load_seconds, warmup_seconds))
+
+    attached: Dict[str, shared_memory.SharedMemory] = {}  # camera_id -> current segment
+
+    def frame_view(camera_id: str, shm_name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        shm = attached.get(camera_id)
+        if shm is None or shm.name != shm_name:
+            if shm is not None:
+                shm.close()
+            shm = attached[camera_id] = _attach_shared_memory(shm_name)
+        return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+
+        # Batch whatever else is already waiting for this worker
+        batch = [request]
+        while len(batch) < max_batch_size:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                requests.put(None)
+                break
+            batch.append(request)
+
+        try:
+            frames = [frame_view(camera_id, shm_name, shape) for _, camera_id, shm_name, shape in batch]
+            detections = detector.detect_batch(frames)
+        except Exception as e:
+            print(f"[worker {worker_index}] Inference error: {e}")
+            detections = [None] * len(batch)
+
+        for (request_id, _, _, _), result in zip(batch, detections):
+            if result is None:
+                results.put(("result", request_id, None))
+            else:
+                results.put(("result", request_id, (result.boxes, result.confidences, result.class_ids)))
+
+    for shm in attached.values():
+        shm.close()
+
+
+class _CameraSlot:
+    """Shared-memory frame buffer for one camera."""
+
+    __slots__ = ("shm", "worker_index")
+
+    def __init__(self, worker_index: int):
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self.worker_index = worker_index
+
+
+class _PendingResult:
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[Detections] = None
+
+
+class DetectionWorkerPool:
+    """
+    Runs WeaponDetector instances in separate processes to escape the GIL.
+
+    Frames are copied once into a per-camera shared-memory segment and only
+    its name and shape cross the process boundary; detections come back as
+    small numpy arrays over a queue. Same infer()/get_stats() interface as
+    InferenceScheduler.
+
+    A worker that fails to load its model reports the error (shown by
+    get_readiness) and exits; workers that exit or crash are restarted with
+    an exponential backoff. The pool is ready while any worker is: cameras
+    assigned to a worker that is down get None from infer() until it is back.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        confidence_threshold: float,
+        backend: str = "ultralytics",
+        imgsz: int = 640,
+        num_workers: int = 2,
+        assignment: Optional[Dict[str, int]] = None,
+        max_batch_size: int = 8,
+        detector_class: type = WeaponDetector,
+        detector_options: Optional[dict] = None,
+        max_restart_delay: float = 60.0
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            model_path: YOLO model loaded by every worker
+            confidence_threshold: Minimum confidence for detections
+            backend: Inference backend each worker loads (see WeaponDetector)
+            imgsz: Inference size passed to the backend
+            num_workers: Number of worker processes
+            assignment: Optional camera_id -> worker index map; other cameras
+                are spread round-robin in the order they first submit frames
+            max_batch_size: Largest batch a worker assembles from its queue
+            detector_class: WeaponDetector or a subclass such as CascadeDetector
+            detector_options: Extra detector keyword arguments (e.g. tiling)
+            max_restart_delay: Longest wait before restarting a worker that keeps dying
+        """
+        self.model_path = model_path
+        self.confidence_threshold = confidence_threshold
+        self.backend = backend
+        self.imgsz = imgsz
+        self.num_workers = max(1, num_workers)
+        self.assignment = dict(assignment or {})
+        self.max_batch_size = max_batch_size
+        self.detector_class = detector_class
+        self.detector_options = dict(detector_options or {})
+        # Spawn rather than fork: the parent runs camera threads and must not share CUDA state
+        self.context = mp.get_context("spawn")
+        self.request_queues: List[mp.Queue] = []
+        self.result_queue: Optional[mp.Queue] = None
+        self.processes: List[mp.Process] = []
+        self.lock = threading.Lock()
+        self.slots: Dict[str, _CameraSlot] = {}
+        self.pending: Dict[int, _PendingResult] = {}
+        self.next_request_id = 0
+        self.next_worker = 0
+        self.worker_ready: List[bool] = [False] * self.num_workers
+        self.workers_ready = threading.Event()  # Set while every worker is ready (for wait_until_ready)
+        self.worker_errors: List[Optional[str]] = [None] * self.num_workers
+        self.worker_restarts: List[int] = [0] * self.num_workers
+        self.max_restart_delay = max_restart_delay
+        self.restart_delays: List[float] = [1.0] * self.num_workers
+        self.restart_due: List[Optional[float]] = [None] * self.num_workers
+        self.class_names: Dict[int, str] = {}
+        self.class_kinds: Optional[np.ndarray] = None
+        self.load_seconds: List[Optional[float]] = [None] * self.num_workers
+        self.warmup_seconds: List[Optional[float]] = [None] * self.num_workers
+        self.running = False
+        self.listener: Optional[threading.Thread] = None
+        self.monitor: Optional[threading.Thread] = None
+        self.frames_processed = 0
+        self.frames_timed_out = 0
+        self.worker_frames: List[int] = [0] * self.num_workers
+
+    def start(self):
+        """Start the worker processes and the result listener."""
+        if self.running:
+            return
+        self.running = True
+        self.result_queue = self.context.Queue()
+        self.request_queues = [None] * self.num_workers
+        self.processes = [None] * self.num_workers
+        for worker_index in range(self.num_workers):
+            self._start_worker(worker_index)
+        self.listener = threading.Thread(target=self._result_loop, daemon=True)
+        self.listener.start()
+        self.monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self.monitor.start()
+        print(f"Started {self.num_workers} detection worker processes")
+
+    def _start_worker(self, worker_index: int):
+        """Start (or replace) one worker process with a fresh request queue."""
+        requests = self.context.Queue()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(
+                worker_index,
+                self.model_path,
+                self.confidence_threshold,
+                self.backend,
+                self.imgsz,
+                self.max_batch_size,
+                self.detector_class,
+                self.detector_options,
+                requests,
+                self.result_queue
+            ),
+            daemon=True
+        )
+        process.start()
+        self.request_queues[worker_index] = requests
+        self.processes[worker_index] = process
+
+    def _monitor_loop(self):
+        """Restart workers that exited, waiting longer each time one keeps failing."""
+        while self.running:
+            time.sleep(1.0)
+            now = time.monotonic()
+            for worker_index, process in enumerate(self.processes):
+                if not self.running or process.is_alive():
+                    continue
+                if self.restart_due[worker_index] is None:
+                    with self.lock:
+                        self.worker_ready[worker_index] = False
+                        self.workers_ready.clear()
+                    delay = self.restart_delays[worker_index]
+                    self.restart_delays[worker_index] = min(delay * 2, self.max_restart_delay)
+                    self.restart_due[worker_index] = now + delay
+                    print(f"[worker {worker_index}] Exited with code {process.exitcode}, restarting in {delay:.0f}s")
+                elif now >= self.restart_due[worker_index]:
+                    self.restart_due[worker_index] = None
+                    self.worker_restarts[worker_index] += 1
+                    self._start_worker(worker_index)
+
+    def stop(self):
+        """Stop the workers and release shared memory."""
+        self.running = False
+        for requests in self.request_queues:
+            if requests is not None:
+                requests.put(None)
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self.result_queue is not None:
+            self.result_queue.put(None)
+        with self.lock:
+            for slot in self.slots.values():
+                if slot.shm is not None:
+                    slot.shm.close()
+                    slot.shm.unlink()
+            self.slots.clear()
+            for pending in self.pending.values():
+                pending.event.set()
+            self.pending.clear()
+
+    @property
+    def ready(self) -> bool:
+        """True while at least one worker has its model loaded and warm."""
+        return any(self.worker_ready)
+
+    @property
+    def failed(self) -> bool:
+        """True while no worker is ready and every one failed its last model load (restarts continue)."""
+        return not self.ready and all(error is not None for error in self.worker_errors)
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every worker has loaded and warmed up its model (startup and benchmarks)."""
+        return self.workers_ready.wait(timeout)
+
+    def get_readiness(self) -> dict:
+        """Model load and warm-up state, for health checks (times are the slowest worker's)."""
+        loaded = [seconds for seconds in self.load_seconds if seconds is not None]
+        warmed = [seconds for seconds in self.warmup_seconds if seconds is not None]
+        errors = {index: error for index, error in enumerate(self.worker_errors) if error is not None}
+        return {
+            "ready": self.ready,
+            "failed": self.failed,
+            "workers_ready": sum(self.worker_ready),
+            "workers": self.num_workers,
+            "load_seconds": round(max(loaded), 3) if loaded else None,
+            "warmup_seconds": round(max(warmed), 3) if warmed else None,
+            "error": next(iter(errors.values()), None),
+            "worker_errors": errors,
+            "worker_restarts": list(self.worker_restarts)
+        }
+
+    def _result_loop(self):
+        """Receive results from all workers and wake the waiting camera threads."""
+        while self.running:
+            message = self.result_queue.get()
+            if message is None:
+                break
+
+            kind = message[0]
+            if kind == "ready":
+                _, worker_index, class_names, load_seconds, warmup_seconds = message
+                self.class_names = class_names
+                self.class_kinds = WeaponDetector.build_class_kinds(class_names)
+                self.load_seconds[worker_index] = load_seconds
+                self.warmup_seconds[worker_index] = warmup_seconds
+                self.worker_errors[worker_index] = None
+                self.restart_delays[worker_index] = 1.0
+                print(f"[worker {worker_index}] Model loaded in {load_seconds:.2f}s, warmed up in {warmup_seconds:.2f}s")
+                with self.lock:
+                    self.worker_ready[worker_index] = True
+                    if all(self.worker_ready):
+                        self.workers_ready.set()
+                continue
+            if kind == "error":
+                _, worker_index, error = message
+                self.worker_errors[worker_index] = error
+                print(f"[worker {worker_index}] Model failed to load: {error}")
+                continue
+
+            _, request_id, arrays = message
+            with self.lock:
+                pending = self.pending.pop(request_id, None)
+            if pending is None:
+                continue  # Caller already gave up
+            if arrays is not None:
+                boxes, confidences, class_ids = arrays
+                pending.result = Detections(
+                    boxes=boxes,
+                    confidences=confidences,
+                    class_ids=class_ids,
+                    kinds=self.class_kinds[class_ids],
+                    class_names=self.class_names
+                )
+            pending.event.set()
+
+    def _slot_for(self, camera_id: str, nbytes: int) -> _CameraSlot:
+        """Get (or grow) the camera's shared-memory slot. Lock held."""
+        slot = self.slots.get(camera_id)
+        if slot is None:
+            worker_index = self.assignment.get(camera_id)
+            if worker_index is None:
+                worker_index = self.next_worker
+                self.next_worker = (self.next_worker + 1) % self.num_workers
+            slot = self.slots[camera_id] = _CameraSlot(worker_index % self.num_workers)
+            print(f"Camera {camera_id} assigned to detection worker {slot.worker_index}")
+
+        if slot.shm is None or slot.shm.size < nbytes:
+            if slot.shm is not None:
+                slot.shm.close()
+                slot.shm.unlink()
+            slot.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return slot
+
+    def infer(self, camera_id: str, frame: np.ndarray, timeout: Optional[float] = None) -> Optional[Detections]:
+        """
+        Run detection for one camera frame in its assigned worker.
+
+        Args:
+            camera_id: Camera the frame came from
+            frame: BGR uint8 image from OpenCV
+            timeout: Maximum seconds to wait for the result
+
+        Returns:
+            Detections, or None if the camera's worker is not ready, the request timed out or failed
+        """
+        if not self.running or self.class_kinds is None:
+            return None
+
+        pending = _PendingResult()
+        with self.lock:
+            slot = self._slot_for(camera_id, frame.nbytes)
+            if not self.worker_ready[slot.worker_index]:
+                return None  # Its worker is (re)starting
+            request_id = self.next_request_id
+            self.next_request_id += 1
+            self.pending[request_id] = pending
+
+        # One copy into shared memory instead of pickling the frame. Each camera has
+        # at most one request in flight, so the worker never sees a half-written
+        # frame unless a previous request was abandoned after a timeout
+        shared_frame = np.ndarray(frame.shape, dtype=np.uint8, buffer=slot.shm.buf)
+        np.copyto(shared_frame, frame)
+        self.request_queues[slot.worker_index].put((request_id, camera_id, slot.shm.name, frame.shape))
+
+        if not pending.event.wait(timeout):
+            with self.lock:
+                self.pending.pop(request_id, None)
+            self.frames_timed_out += 1
+            return None
+
+        if pending.result is not None:
+            self.frames_processed += 1
+            self.worker_frames[slot.worker_index] += 1
+        return pending.result
+
+    def get_stats(self) -> dict:
+        """Get worker health, camera assignment and frame counters."""
+        with self.lock:
+            assignment = {camera_id: slot.worker_index for camera_id, slot in self.slots.items()}
+        return {
+            "workers": self.num_workers,
+            "workers_ready": sum(self.worker_ready),
+            "workers_alive": sum(1 for process in self.processes if process is not None and process.is_alive()),
+            "worker_restarts": list(self.worker_restarts),
+            "assignment": assignment,
+            "frames_processed": self.frames_processed,
+            "frames_timed_out": self.frames_timed_out,
+            "frames_per_worker": list(self.worker_frames)
+        }
@@ -1,131 +1,394 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from typing import List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import time
 
+from .backends import BackendOutput, create_backend
+from .metrics import DETECTOR_CROPS, DETECTOR_SECONDS
+from .tiling import Region, grid_tiles, merge_outputs, person_tiles, shift_output
+
+# Per-class categories used by the class-id lookup table
+KIND_OTHER = 0
+KIND_PERSON = 1
+KIND_THREAT = 2
+
 
 class Detection:
     """Represents a single detection."""
 
-    def __init__(self, class_name: str, confidence: float, bbox: Tuple[int, int, int, int], is_threat: bool):
+    __slots__ = ("class_name", "confidence", "bbox", "is_threat", "timestamp", "track_id")
+
+    def __init__(
+        self,
+        class_name: str,
+        confidence: float,
+        bbox: Tuple[int, int, int, int],
+        is_threat: bool,
+        timestamp: Optional[float] = None,
+        track_id: Optional[int] = None
+    ):
         self.class_name = class_name
         self.confidence = confidence
         self.bbox = bbox  # (x1, y1, x2, y2)
         self.is_threat = is_threat
-        self.timestamp = time.time()
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.track_id = track_id  # Set when an ObjectTracker has seen the frame
+
+
+class Detections:
+    """
+    Array-backed detections for one frame.
+
+    Behaves like a sequence of Detection objects (built on access), while
+    counts and filters run as numpy masks over the underlying arrays.
+    """
+
+    __slots__ = ("boxes", "confidences", "class_ids", "kinds", "class_names", "timestamp", "track_ids")
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        confidences: np.ndarray,
+        class_ids: np.ndarray,
+        kinds: np.ndarray,
+        class_names: Dict[int, str],
+        timestamp: Optional[float] = None
+    ):
+        self.boxes = boxes  # (N, 4) int32, x1 y1 x2 y2
+        self.confidences = confidences  # (N,) float32
+        self.class_ids = class_ids  # (N,) int32
+        self.kinds = kinds  # (N,) uint8, KIND_* values
+        self.class_names = class_names
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.track_ids: Optional[np.ndarray] = None  # (N,) int64, filled in by ObjectTracker.update
+
+    @classmethod
+    def empty(cls, class_names: Dict[int, str]) -> "Detections":
+        return cls(
+            np.empty((0, 4), dtype=np.int32),
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.uint8),
+            class_names
+        )
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    def __getitem__(self, index: int) -> Detection:
+        x1, y1, x2, y2 = self.boxes[index].tolist()
+        return Detection(
+            class_name=self.class_names[int(self.class_ids[index])],
+            confidence=float(self.confidences[index]),
+            bbox=(x1, y1, x2, y2),
+            is_threat=bool(self.kinds[index] == KIND_THREAT),
+            timestamp=self.timestamp,
+            track_id=int(self.track_ids[index]) if self.track_ids is not None else None
+        )
+
+    def __iter__(self) -> Iterator[Detection]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def subset(self, mask: np.ndarray) -> "Detections":
+        """Detections selected by a boolean mask or index array."""
+        selected = Detections(
+            self.boxes[mask],
+            self.confidences[mask],
+            self.class_ids[mask],
+            self.kinds[mask],
+            self.class_names,
+            self.timestamp
+        )
+        if self.track_ids is not None:
+            selected.track_ids = self.track_ids[mask]
+        return selected
+
+    @property
+    def threat_mask(self) -> np.ndarray:
+        return self.kinds == KIND_THREAT
+
+    @property
+    def person_count(self) -> int:
+        return int(np.count_nonzero(self.kinds == KIND_PERSON))
+
+    def threats(self) -> "Detections":
+        return self.subset(self.threat_mask)
+
+    def pack_overlay(self) -> bytes:
+        """
+        Detections as a compact binary array for drawing overlays in the browser.
+
+        Returns:
+            Little-endian int16 rows of (x1, y1, x2, y2, class_id, kind,
+            confidence x 10000), 14 bytes per detection
+        """
+        packed = np.empty((len(self), 7), dtype="<i2")
+        packed[:, :4] = np.clip(self.boxes, -32768, 32767)
+        packed[:, 4] = self.class_ids
+        packed[:, 5] = self.kinds
+        packed[:, 6] = np.round(self.confidences * 10000)
+        return packed.tobytes()
+
+    def overlay_labels(self) -> Dict[int, str]:
+        """Names of the classes present, keyed by class id, to go with pack_overlay()."""
+        return {class_id: self.class_names[class_id] for class_id in set(self.class_ids.tolist())}
 
 
 class WeaponDetector:
-    """YOLOv8-based weapon and person detector."""
+    """YOLOv8-based weapon and person detector with a pluggable inference backend."""
 
     # Classes that are considered threats (knives, scissors, and any sharp objects)
     # Using lowercase for matching
     THREAT_CLASSES = {"knife", "scissors", "fork", "baseball bat"}
 
-    def __init__(self, model_path: str = "yolov8n.pt", confidence_threshold: float = 0.5):
+    def __init__(
+        self,
+        model_path: str = "yolov8n.pt",
+        confidence_threshold: float = 0.5,
+        backend: str = "ultralytics",
+        imgsz: int = 640,
+        tiling: Optional[str] = None,
+        tile_size: int = 640,
+        tile_overlap: float = 0.2,
+        verbose: bool = True
+    ):
         """
         Initialize the detector.
 
         Args:
-            model_path: Path to YOLO model or model name (yolov8n.pt, yolov8s.pt, etc.)
+            model_path: Path to YOLO model or model name (yolov8n.pt, yolov8s.pt, etc.),
+                or an exported model (.onnx file, OpenVINO directory) for those backends
             confidence_threshold: Minimum confidence for detections
+            backend: "ultralytics" (PyTorch), "onnx" (ONNX Runtime) or "openvino"
+            imgsz: Inference size for backends that support changing it
+            tiling: Sliced inference for small objects in large frames: "grid"
+                (overlapping tiles over the whole frame), "person" (tiles only
+                around people found by the full-frame pass) or None (off)
+            tile_size: Tile side in frame pixels
+            tile_overlap: Fraction of each grid tile shared with its neighbours
+            verbose: Print every threat detection (off for bulk offline scans)
         """
+        if tiling not in (None, "grid", "person"):
+            raise ValueError(f"Unknown tiling mode '{tiling}' (choose from grid, person)")
         self.confidence_threshold = confidence_threshold
-        print(f"Loading YOLO model: {model_path}")
-        self.model = YOLO(model_path)
-        self.class_names = self.model.names
+        self.tiling = tiling
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.verbose = verbose
+        print(f"Loading YOLO model: {model_path} ({backend} backend)")
+        self.backend = create_backend(backend, model_path, imgsz)
+        self.class_names = self.backend.names
         print(f"Model loaded with {len(self.class_names)} classes")
         # Print threat-related classes for debugging
         for idx, name in self.class_names.items():
             if any(threat in name.lower() for threat in ["knife", "scissors", "fork", "bat"]):
                 print(f"  Threat class found: {idx} = {name}")
 
-    def detect(self, frame: np.ndarray) -> Tuple[np.ndarray, List[Detection]]:
+        self.class_kinds = self.build_class_kinds(self.class_names)
+
+    @classmethod
+    def build_class_kinds(cls, class_names: Dict[int, str]) -> np.ndarray:
+        """Classify every class id once so results can be categorised with a single lookup."""
+        class_kinds = np.full(max(class_names) + 1, KIND_OTHER, dtype=np.uint8)
+        for idx, name in class_names.items():
+            class_lower = name.lower()
+            # A class is a threat if its name contains any threat word
+            if any(threat in class_lower for threat in cls.THREAT_CLASSES):
+                class_kinds[idx] = KIND_THREAT
+            elif class_lower == "person":
+                class_kinds[idx] = KIND_PERSON
+        return class_kinds
+
+    def warmup(self, batch_size: int = 1) -> float:
+        """
+        Run blank frames through the model, at batch size 1 and batch_size, so
+        lazy initialisation (CUDA context, kernel selection, graph compilation)
+        happens before the first real frame instead of during it.
+
+        Returns:
+            Seconds the warm-up took
+        """
+        start = time.perf_counter()
+        frame = np.zeros((self.backend.imgsz, self.backend.imgsz, 3), dtype=np.uint8)
+        for size in sorted({1, max(1, batch_size)}):
+            self._warmup_backends([frame] * size)
+        return time.perf_counter() - start
+
+    def _warmup_backends(self, frames: List[np.ndarray]):
+        self.backend.predict(frames, self.confidence_threshold)
+
+    def detect(self, frame: np.ndarray, annotate: bool = True) -> Tuple[np.ndarray, Detections]:
         """
         Run detection on a frame.
 
         Args:
-            frame: BGR image from OpenCV
+            frame: BGR image from OpenCV (may be a read-only view)
+            annotate: Draw detections on a copy of the frame; when False the
+                input frame is returned untouched and no copy is made
 
         Returns:
-            Tuple of (annotated_frame, list of detections)
+            Tuple of (annotated_frame, Detections)
         """
-        detections = []
+        detections = self.detect_batch([frame])[0]
+        if annotate:
+            return self.annotate(frame, detections), detections
+        return frame, detections
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        """
+        Run detection on several frames in a single forward pass.
+
+        Args:
+            frames: BGR images from OpenCV (may differ in size)
+
+        Returns:
+            One Detections per input frame, in order
+        """
+        if not frames:
+            return []
 
         # Run inference
-        results = self.model(frame, verbose=False, conf=self.confidence_threshold)
+        start = time.perf_counter()
+        outputs = self.backend.predict(frames, self.confidence_threshold)
+        inferred = time.perf_counter()
+
+        if self.tiling:
+            outputs = self._detect_tiles(frames, outputs)
+            DETECTOR_SECONDS.labels(phase="tiles").observe(time.perf_counter() - inferred)
+            inferred = time.perf_counter()
+
+        detections = [self._to_detections(*output) for output in outputs]
+        DETECTOR_SECONDS.labels(phase="inference").observe(inferred - start)
+        DETECTOR_SECONDS.labels(phase="postprocess").observe(time.perf_counter() - inferred)
+        return detections
+
+    def _detect_tiles(self, frames: List[np.ndarray], outputs: List[BackendOutput]) -> List[BackendOutput]:
+        """
+        Re-run the model on tiles of each frame and merge in the small threats it finds.
+
+        Tiles only contribute threat classes: people and large objects are already
+        found by the full-frame pass, and tile edges would cut them into fragments.
+        """
+        regions = []
+        for frame, (boxes, _, class_ids) in zip(frames, outputs):
+            height, width = frame.shape[:2]
+            if self.tiling == "person":
+                people = boxes[self.class_kinds[class_ids] == KIND_PERSON]
+                regions.append(person_tiles(people, width, height, self.tile_size))
+            else:
+                regions.append(grid_tiles(width, height, self.tile_size, self.tile_overlap))
+        found = self._detect_threats_in_regions(frames, regions, self.tile_size, mode=self.tiling)
+        return [merge_outputs([output] + threats) for output, threats in zip(outputs, found)]
+
+    def _detect_threats_in_regions(
+        self,
+        frames: List[np.ndarray],
+        regions: List[List[Region]],
+        imgsz: Optional[int],
+        mode: str
+    ) -> List[List[BackendOutput]]:
+        """
+        Run the model on crops of several frames in one batched forward pass.
 
-        # Process results
+        Args:
+            frames: Source frames
+            regions: Crop regions for each frame (may be empty)
+            imgsz: Inference size for the crops
+            mode: Label for the crop counter metric
+
+        Returns:
+            For each frame, the threat detections of its crops in frame coordinates
+        """
+        crops = []
+        owners = []
+        for index, (frame, frame_regions) in enumerate(zip(frames, regions)):
+            for x1, y1, x2, y2 in frame_regions:
+                crops.append(frame[y1:y2, x1:x2])
+                owners.append((index, x1, y1))
+        found: List[List[BackendOutput]] = [[] for _ in frames]
+        if not crops:
+            return found
+
+        DETECTOR_CROPS.labels(mode=mode).inc(len(crops))
+        crop_outputs = self.backend.predict(crops, self.confidence_threshold, imgsz=imgsz)
+        for (index, x1, y1), (boxes, confidences, class_ids) in zip(owners, crop_outputs):
+            threats = self.class_kinds[class_ids] == KIND_THREAT
+            if threats.any():
+                found[index].append(shift_output((boxes[threats], confidences[threats], class_ids[threats]), x1, y1))
+        return found
+
+    def _to_detections(self, boxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray) -> Detections:
+        """Wrap one frame's backend output as array-backed detections."""
+        if len(class_ids) == 0:
+            return Detections.empty(self.class_names)
+
+        detections = Detections(
+            boxes=boxes.astype(np.int32),
+            confidences=confidences,
+            class_ids=class_ids,
+            kinds=self.class_kinds[class_ids],
+            class_names=self.class_names
+        )
+
+        # Log threat detections
+        if not self.verbose:
+            return detections
+        for index in np.flatnonzero(detections.threat_mask):
+            class_name = self.class_names[int(class_ids[index])]
+            print(f"🚨 THREAT DETECTED: {class_name} (confidence: {confidences[index]:.2f})")
+
+        return detections
+
+    @staticmethod
+    def annotate(frame: np.ndarray, detections: Detections) -> np.ndarray:
+        """Draw detections on a copy of the frame (needs no model, so usable from any process)."""
         annotated_frame = frame.copy()
 
-        for result in results:
-            boxes = result.boxes
-            if boxes is None:
-                continue
-
-            for box in boxes:
-                # Get box coordinates
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                confidence = float(box.conf[0])
-                class_id = int(box.cls[0])
-                class_name = self.class_names[class_id]
-
-                # Determine if this is a threat (check if class name contains any threat word)
-                class_lower = class_name.lower()
-                is_threat = any(threat in class_lower for threat in self.THREAT_CLASSES)
-
-                # Log threat detections
-                if is_threat:
-                    print(f"🚨 THREAT DETECTED: {class_name} (confidence: {confidence:.2f})")
-
-                # Create detection object
-                detection = Detection(
-                    class_name=class_name,
-                    confidence=confidence,
-                    bbox=(x1, y1, x2, y2),
-                    is_threat=is_threat
-                )
-                detections.append(detection)
-
-                # Draw bounding box - RED for ALL threats
-                if is_threat:
-                    # Bright RED box for threats - thick and visible
-                    color = (0, 0, 255)  # BGR format - pure red
-                    thickness = 4
-                elif class_lower == "person":
-                    # Green box for people
-                    color = (0, 255, 0)
-                    thickness = 2
-                else:
-                    # Blue box for other objects
-                    color = (255, 200, 0)
-                    thickness = 1
-
-                cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, thickness)
-
-                # Draw label
-                label = f"{class_name}: {confidence:.2f}"
-                label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
-                cv2.rectangle(
-                    annotated_frame,
-                    (x1, y1 - label_size[1] - 10),
-                    (x1 + label_size[0], y1),
-                    color,
-                    -1
-                )
-                cv2.putText(
-                    annotated_frame,
-                    label,
-                    (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (255, 255, 255),
-                    2
-                )
-
-        return annotated_frame, detections
-
-    def get_threats(self, detections: List[Detection]) -> List[Detection]:
+        for (x1, y1, x2, y2), class_id, confidence, kind in zip(
+            detections.boxes.tolist(),
+            detections.class_ids.tolist(),
+            detections.confidences.tolist(),
+            detections.kinds.tolist()
+        ):
+            # Draw bounding box - RED for ALL threats
+            if kind == KIND_THREAT:
+                # Bright RED box for threats - thick and visible
+                color = (0, 0, 255)  # BGR format - pure red
+                thickness = 4
+            elif kind == KIND_PERSON:
+                # Green box for people
+                color = (0, 255, 0)
+                thickness = 2
+            else:
+                # Blue box for other objects
+                color = (255, 200, 0)
+                thickness = 1
+
+            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, thickness)
+
+            # Draw label
+            label = f"{detections.class_names[class_id]}: {confidence:.2f}"
+            label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
+            cv2.rectangle(
+                annotated_frame,
+                (x1, y1 - label_size[1] - 10),
+                (x1 + label_size[0], y1),
+                color,
+                -1
+            )
+            cv2.putText(
+                annotated_frame,
+                label,
+                (x1, y1 - 5),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (255, 255, 255),
+                2
+            )
+
+        return annotated_frame
+
+    def get_threats(self, detections: Detections) -> Detections:
         """Filter detections to only threats."""
-        return [d for d in detections if d.is_threat]
+        return detections.threats()
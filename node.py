@@ -0,0 +1,225 @@
+"""
+Detection node: runs the cameras a cluster coordinator assigns to it.
+
+The web server starts CLUSTER_LOCAL_NODES of these itself when
+CLUSTER_ENABLED is set; nodes on other machines (with the same config.py
+and CLUSTER_AUTHKEY) are started by hand:
+
+    python node.py --coordinator 10.0.0.5:6010 --node-id gpu-box-2
+
+Each node loads its own model, runs the same CameraPipeline as app.py does
+in single-process mode for its cameras, and sends frames, threats and
+status back to the coordinator (see detector/cluster.py).
+"""
+import argparse
+import socket
+import threading
+import time
+from functools import partial
+from typing import Dict, Optional, Union
+
+import config
+from detector import CameraPipeline, CameraStream, Detections, metrics
+from detector.cluster import CoordinatorLink, parse_address
+from detector.pipeline import frame_meta
+from detector.streaming import QUALITY_TIERS, encode_jpeg
+from builders import build_camera, build_inference, build_motion_gate, build_tracker
+
+THREAT_RESEND_SECONDS = 1.0  # How often a threat track (or, untracked, a threat type) is reported again
+
+
+class NodeCamera:
+    """One assigned camera, its pipeline and the thread running it."""
+
+    def __init__(self, cam_config: dict, variants):
+        self.camera_id = cam_config["id"]
+        self.camera: CameraStream = build_camera(cam_config)
+        self.variants = frozenset(variants)  # Renderings the coordinator wants ("raw", "annotated")
+        # Unalerted track id (or threat type, without a tracker) -> last time it was reported
+        self.threats_sent: Dict[Union[int, str], float] = {}
+        self.pipeline: Optional[CameraPipeline] = None
+        self.thread: Optional[threading.Thread] = None
+
+
+class DetectionNode:
+    """Serves a coordinator: starts and stops cameras on request and reports back."""
+
+    def __init__(self, node_id: str, address, authkey: bytes, reconnect: bool = True):
+        self.node_id = node_id
+        self.inference = build_inference()
+        self.lock = threading.Lock()
+        self.cameras: Dict[str, NodeCamera] = {}
+        self.frame_quality = QUALITY_TIERS[0][1]  # The coordinator serves its best tier as-is
+        self.link = CoordinatorLink(
+            node_id,
+            address,
+            authkey,
+            on_message=self.handle,
+            heartbeat=self.heartbeat,
+            on_disconnect=self.release_all,
+            heartbeat_interval=config.CLUSTER_HEARTBEAT_INTERVAL,
+            reconnect=reconnect
+        )
+
+    def run(self):
+        self.inference.start()
+        try:
+            self.link.run()
+        finally:
+            self.release_all()
+            self.inference.stop()
+
+    def handle(self, message: tuple):
+        """Apply one coordinator message."""
+        kind, camera_id = message[0], message[1]
+        if kind == "assign":
+            self.assign(message[1], message[2])
+        elif kind == "release":
+            self.release(camera_id)
+        elif kind == "watch":
+            with self.lock:
+                node_camera = self.cameras.get(camera_id)
+                if node_camera is not None:
+                    node_camera.variants = frozenset(message[2])
+        elif kind == "alerted":
+            with self.lock:
+                node_camera = self.cameras.get(camera_id)
+            if node_camera is not None and node_camera.pipeline.tracker is not None:
+                node_camera.pipeline.tracker.mark_alerted(message[2])
+        elif kind == "clip":
+            _, _, alert_id, alert_time = message
+            # Send once the post-event window has been captured
+            delay = max(0.0, alert_time + config.CLIP_POST_SECONDS - time.time())
+            timer = threading.Timer(delay, self.send_clip, args=(camera_id, alert_id, alert_time))
+            timer.daemon = True
+            timer.start()
+
+    def assign(self, cam_config: dict, variants):
+        with self.lock:
+            if cam_config["id"] in self.cameras:
+                self.cameras[cam_config["id"]].variants = frozenset(variants)
+                return
+            node_camera = NodeCamera(cam_config, variants)
+            node_camera.pipeline = CameraPipeline(
+                node_camera.camera,
+                self.inference,
+                on_threat=partial(self.send_threat, node_camera),
+                on_frame=partial(self.send_frame, node_camera),
+                gate=build_motion_gate(cam_config),
+                tracker=build_tracker(),
+                max_fps=config.MAX_PROCESSING_FPS
+            )
+            self.cameras[cam_config["id"]] = node_camera
+        node_camera.camera.start()
+        node_camera.thread = threading.Thread(target=node_camera.pipeline.run, daemon=True)
+        node_camera.thread.start()
+        print(f"Node {self.node_id}: started camera {node_camera.camera_id}")
+
+    def release(self, camera_id: str):
+        with self.lock:
+            node_camera = self.cameras.pop(camera_id, None)
+        if node_camera is None:
+            return
+        node_camera.pipeline.stop()
+        if node_camera.thread:
+            node_camera.thread.join(timeout=5)
+        node_camera.camera.stop()
+        print(f"Node {self.node_id}: stopped camera {camera_id}")
+
+    def release_all(self):
+        for camera_id in list(self.cameras):
+            self.release(camera_id)
+
+    def heartbeat(self) -> tuple:
+        statuses = []
+        with self.lock:
+            node_cameras = list(self.cameras.values())
+        for node_camera in node_cameras:
+            status = node_camera.camera.get_status()
+            if node_camera.pipeline.gate is not None:
+                status["motion_gate"] = node_camera.pipeline.gate.get_stats()
+            if node_camera.pipeline.tracker is not None:
+                status["tracker"] = node_camera.pipeline.tracker.get_stats()
+            statuses.append(status)
+        return ("heartbeat", statuses, self.inference.get_readiness(), metrics.REGISTRY.snapshot())
+
+    def send_clip(self, camera_id: str, alert_id: str, alert_time: float):
+        with self.lock:
+            node_camera = self.cameras.get(camera_id)
+        if node_camera is None or node_camera.camera.clip_buffer is None:
+            return
+        frames = node_camera.camera.clip_buffer.frames_between(
+            alert_time - config.CLIP_PRE_SECONDS, alert_time + config.CLIP_POST_SECONDS
+        )
+        self.link.send(("clip", camera_id, alert_id, alert_time, frames))
+
+    def send_threat(self, node_camera: NodeCamera, render, threat_type: str, confidence: float, track_id) -> bool:
+        """
+        Report a threat to the coordinator, which applies the alert cooldown.
+
+        Each track (or, without a tracker, each threat type on the camera) is
+        reported at most once per THREAT_RESEND_SECONDS, so a threat in view
+        does not send a snapshot every frame.
+
+        Returns:
+            Always False: only the coordinator knows whether an alert was raised,
+            and it answers "alerted" for the track when one was
+        """
+        now = time.monotonic()
+        key = track_id if track_id is not None else threat_type
+        if now - node_camera.threats_sent.get(key, -THREAT_RESEND_SECONDS) < THREAT_RESEND_SECONDS:
+            return False
+        node_camera.threats_sent[key] = now
+        if track_id is not None:
+            live = {track.track_id for track in node_camera.pipeline.tracker.tracks}
+            for sent_id in [sent_id for sent_id in node_camera.threats_sent if sent_id not in live]:
+                del node_camera.threats_sent[sent_id]
+        snapshot = encode_jpeg(render(), 1.0, config.CLIP_JPEG_QUALITY)
+        self.link.send(("threat", node_camera.camera_id, threat_type, confidence, track_id, time.time(), snapshot))
+        return False
+
+    def send_frame(self, node_camera: NodeCamera, seq: int, frame, detections: Detections, render):
+        """Encode the renderings the coordinator's viewers need and send them."""
+        # Nobody is watching this camera: no encode, nothing sent
+        variants = node_camera.variants
+        if not variants:
+            return
+        meta = frame_meta(node_camera.camera_id, frame, detections, "raw" in variants)
+        jpegs = {}
+        if "raw" in variants:
+            jpegs["raw"] = encode_jpeg(frame, 1.0, self.frame_quality)
+        if "annotated" in variants:
+            jpegs["annotated"] = encode_jpeg(render(), 1.0, self.frame_quality)
+        self.link.send(("frame", node_camera.camera_id, jpegs, meta))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a detection node for a cluster coordinator")
+    parser.add_argument(
+        "--coordinator", default=f"{config.CLUSTER_HOST}:{config.CLUSTER_PORT}",
+        help="Coordinator host:port (default CLUSTER_HOST:CLUSTER_PORT)"
+    )
+    parser.add_argument("--node-id", default=socket.gethostname(), help="Name unique within the cluster")
+    parser.add_argument(
+        "--exit-on-disconnect", action="store_true",
+        help="Exit when the coordinator goes away instead of reconnecting (used for local nodes)"
+    )
+    args = parser.parse_args(argv)
+    if not config.CLUSTER_AUTHKEY:
+        parser.error("CLUSTER_AUTHKEY must be set to the coordinator's shared secret")
+
+    node = DetectionNode(
+        args.node_id,
+        parse_address(args.coordinator, config.CLUSTER_PORT),
+        config.CLUSTER_AUTHKEY.encode(),
+        reconnect=not args.exit_on_disconnect
+    )
+    try:
+        node.run()
+    except KeyboardInterrupt:
+        pass
+    print(f"Node {args.node_id}: stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+Offline forensic scan of recorded footage for threats.
+
+Decodes video files with frame-stride sampling, batches the sampled frames
+through the same WeaponDetector used live, applies the AlertManager cooldown
+on the recording's own clock, and writes every threat detection as JSONL or
+CSV. Files are sharded across a process pool. Progress is checkpointed next
+to the output, so an interrupted scan resumes where it stopped, including
+part-way through a file. Per-detection and per-alert logging is off unless
+--verbose is given; the scan prints one line per finished file.
+
+Usage:
+    python scan.py /mnt/nvr/2024-05-14/ --output incident.jsonl
+    python scan.py cam3.mp4 cam4.mp4 --sample-fps 2 --jobs 4 --output incident.csv
+    python scan.py /mnt/nvr/ --output incident.jsonl --restart   # Ignore earlier progress
+"""
+import argparse
+import csv
+import io
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+
+import config
+from detector import AlertManager, CascadeDetector, WeaponDetector
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".ts", ".h264", ".h265")
+FIELDS = [
+    "file", "frame", "video_time", "timestamp", "threat_type", "confidence",
+    "x1", "y1", "x2", "y2", "alert"
+]
+
+# Per-process scan state, set by _init_worker
+_detector: Optional[WeaponDetector] = None
+_alert_manager: Optional[AlertManager] = None
+_options: dict = {}
+_emit: Callable[[tuple], None] = print
+
+
+def find_videos(paths: List[str]) -> List[str]:
+    """Video files named directly or found (recursively) in directories, sorted."""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                videos.extend(
+                    os.path.join(root, name) for name in names if name.lower().endswith(VIDEO_EXTENSIONS)
+                )
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            raise SystemExit(f"No such file or directory: {path}")
+    return sorted(os.path.abspath(video) for video in videos)
+
+
+class _UnrecordedAlerts:
+    """AlertManager store that numbers alerts but keeps none: the scan's CSV is the record."""
+
+    def __init__(self):
+        self.last_seq = 0
+
+    def next_sequence(self) -> int:
+        self.last_seq += 1
+        return self.last_seq
+
+    def add(self, alert, seq: int):
+        pass
+
+
+def _init_worker(detector_class: type, detector_kwargs: dict, options: dict, emit):
+    """Load the model once per process. emit is a queue's put (pool) or a callback (in-process)."""
+    global _detector, _alert_manager, _options, _emit
+    _detector = detector_class(**detector_kwargs)
+    # Only the cooldown is needed, so no history database (or writer thread) per worker
+    _alert_manager = AlertManager(
+        cooldown_seconds=options["cooldown"], store=_UnrecordedAlerts(), verbose=options["verbose"]
+    )
+    _options = options
+    _emit = emit
+
+
+def _read_sampled(cap: cv2.VideoCapture, start_frame: int, stride: int, frames: queue.Queue, stop: threading.Event):
+    """
+    Decode thread: queue (frame index, frame) for every stride-th frame.
+
+    Frames in between are only grabbed, never retrieved, which skips their
+    colour conversion and copy. The queue is bounded, so decoding runs at
+    most a couple of batches ahead of inference.
+    """
+    index = start_frame
+    try:
+        while not stop.is_set() and cap.grab():
+            if index % stride == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    frames.put((index, frame))
+            index += 1
+    finally:
+        frames.put((index, None))  # End marker carries the number of frames decoded
+
+
+def _scan_job(job: Tuple[str, int, Dict[str, float]]):
+    """Scan one file from start_frame, emitting ("rows", ...) per batch and ("done", ...) at the end."""
+    path, start_frame, cooldown = job
+    try:
+        _scan_file(path, start_frame, cooldown)
+    except Exception as e:
+        _emit(("error", path, str(e)))
+
+
+def _scan_file(path: str, start_frame: int, cooldown: Dict[str, float]):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        _emit(("error", path, "could not open"))
+        return
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    stride = _options["stride"] or max(1, round(fps / _options["sample_fps"]))
+    # NVR exports are written as they record, so the file's mtime marks its end
+    start_time = os.path.getmtime(path) - total_frames / fps if total_frames else None
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    alert_manager = _alert_manager
+    # Cooldowns start from this file's checkpoint (empty unless resuming part-way through)
+    alert_manager.last_alert_time = dict(cooldown)
+    camera_name = os.path.basename(path)
+    batch_size = _options["batch_size"]
+    frames: queue.Queue = queue.Queue(maxsize=batch_size * 2)
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_sampled, args=(cap, start_frame, stride, frames, stop), daemon=True)
+
+    scan_start = time.perf_counter()
+    sampled = 0
+    decoded_to = start_frame
+    reader.start()
+    try:
+        batch = []
+        finished = False
+        while not finished:
+            index, frame = frames.get()
+            if frame is None:
+                finished = True
+                decoded_to = index
+            else:
+                batch.append((index, frame))
+            if not batch or (len(batch) < batch_size and not finished):
+                continue
+
+            results = _detector.detect_batch([frame for _, frame in batch])
+            rows = []
+            for (index, _), detections in zip(batch, results):
+                video_time = index / fps
+                timestamp = start_time + video_time if start_time is not None else None
+                for threat in detections.threats():
+                    alert = alert_manager.check_and_alert(
+                        camera_id=path,
+                        camera_name=camera_name,
+                        threat_type=threat.class_name,
+                        confidence=threat.confidence,
+                        timestamp=timestamp if timestamp is not None else video_time
+                    )
+                    x1, y1, x2, y2 = threat.bbox
+                    rows.append({
+                        "file": path,
+                        "frame": index,
+                        "video_time": round(video_time, 3),
+                        "timestamp": round(timestamp, 3) if timestamp is not None else None,
+                        "threat_type": threat.class_name,
+                        "confidence": round(float(threat.confidence), 4),
+                        "x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2),
+                        "alert": alert is not None
+                    })
+            sampled += len(batch)
+            _emit(("rows", path, rows, batch[-1][0] + 1, dict(alert_manager.last_alert_time)))
+            batch = []
+    finally:
+        stop.set()
+        # Unblock the reader if it is waiting on a full queue
+        while reader.is_alive():
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                reader.join(timeout=0.1)
+        cap.release()
+
+    _emit(("done", path, {
+        "frames_decoded": decoded_to - start_frame,
+        "frames_sampled": sampled,
+        "video_seconds": (decoded_to - start_frame) / fps,
+        "wall_seconds": time.perf_counter() - scan_start
+    }))
+
+
+class ScanOutput:
+    """
+    Appends detections to the output file and checkpoints progress beside it.
+
+    After each batch's rows are written and flushed, a line recording the
+    file's next frame, its alert cooldown state and the output size is
+    appended to <output>.progress.
+    On resume the output is truncated back to the last checkpoint, so a batch
+    written but not checkpointed before a crash is not duplicated.
+    """
+
+    def __init__(self, path: str, fmt: str, restart: bool):
+        self.path = path
+        self.fmt = fmt
+        self.progress_path = path + ".progress"
+        self.next_frame: Dict[str, int] = {}
+        self.done: Dict[str, bool] = {}
+        self.cooldown: Dict[str, Dict[str, float]] = {}  # File -> AlertManager.last_alert_time
+        offset = 0
+        if restart:
+            for stale in (path, self.progress_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        elif os.path.exists(self.progress_path):
+            with open(self.progress_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn last line from a crash
+                    self.next_frame[entry["file"]] = entry["next_frame"]
+                    self.done[entry["file"]] = entry["done"]
+                    self.cooldown[entry["file"]] = entry.get("cooldown", {})
+                    offset = entry["offset"]
+
+        self.output = open(path, "a+b")
+        self.output.truncate(offset)
+        self.output.seek(offset)
+        self.progress = open(self.progress_path, "a")
+        if offset == 0 and fmt == "csv":
+            self._write_rows([dict(zip(FIELDS, FIELDS))])
+
+    def pending_jobs(self, videos: List[str]) -> List[Tuple[str, int, Dict[str, float]]]:
+        """(file, start frame, cooldown state) for every file not yet finished."""
+        return [
+            (video, self.next_frame.get(video, 0), self.cooldown.get(video, {}))
+            for video in videos if not self.done.get(video)
+        ]
+
+    def _write_rows(self, rows: List[dict]):
+        if self.fmt == "csv":
+            text = io.StringIO()
+            writer = csv.DictWriter(text, FIELDS)
+            writer.writerows(rows)
+            data = text.getvalue()
+        else:
+            data = "".join(json.dumps(row) + "\n" for row in rows)
+        self.output.write(data.encode())
+
+    def checkpoint(
+        self,
+        video: str,
+        rows: List[dict],
+        next_frame: int,
+        cooldown: Optional[Dict[str, float]] = None,
+        done: bool = False
+    ):
+        if rows:
+            self._write_rows(rows)
+        self.output.flush()
+        os.fsync(self.output.fileno())
+        self.next_frame[video] = next_frame
+        self.done[video] = done
+        if cooldown is not None:
+            self.cooldown[video] = cooldown
+        self.progress.write(json.dumps({
+            "file": video, "next_frame": next_frame, "done": done,
+            "cooldown": self.cooldown.get(video, {}), "offset": self.output.tell()
+        }) + "\n")
+        self.progress.flush()
+
+    def close(self):
+        self.output.close()
+        self.progress.close()
+
+
+def run_scan(args, videos: List[str]) -> dict:
+    """Scan the videos, returning totals for the throughput report."""
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    output = ScanOutput(args.output, fmt, args.restart)
+    jobs = output.pending_jobs(videos)
+    skipped = len(videos) - len(jobs)
+    if skipped:
+        print(f"Resuming: {skipped} of {len(videos)} files already scanned")
+
+    totals = {"files": 0, "failed": 0, "detections": 0, "frames_decoded": 0, "frames_sampled": 0,
+              "video_seconds": 0.0}
+    next_frames = {video: start_frame for video, start_frame, _ in jobs}
+
+    def handle(message: tuple):
+        kind, video = message[0], message[1]
+        if kind == "rows":
+            _, _, rows, next_frame, cooldown = message
+            next_frames[video] = next_frame
+            totals["detections"] += len(rows)
+            output.checkpoint(video, rows, next_frame, cooldown)
+            return False
+        if kind == "done":
+            stats = message[2]
+            output.checkpoint(video, [], next_frames[video], done=True)
+            totals["files"] += 1
+            for key in ("frames_decoded", "frames_sampled", "video_seconds"):
+                totals[key] += stats[key]
+            wall = max(stats["wall_seconds"], 1e-6)
+            print(f"[{totals['files'] + totals['failed']}/{len(jobs)}] {video}: "
+                  f"{stats['frames_sampled'] / wall:.1f} inferred FPS, "
+                  f"{stats['video_seconds'] / wall:.1f}x real time")
+        else:
+            totals["failed"] += 1
+            print(f"[{totals['files'] + totals['failed']}/{len(jobs)}] {video}: failed ({message[2]})")
+        return True
+
+    detector_class = CascadeDetector if args.mode == "cascade" else WeaponDetector
+    detector_kwargs = {
+        "model_path": args.model,
+        "confidence_threshold": args.conf,
+        "backend": args.backend,
+        "imgsz": args.imgsz,
+        "verbose": args.verbose
+    }
+    if args.mode == "cascade":
+        detector_kwargs["person_model_path"] = args.person_model
+    else:
+        detector_kwargs["tiling"] = args.tiling
+    options = {
+        "stride": args.stride,
+        "sample_fps": args.sample_fps,
+        "batch_size": args.batch_size,
+        "cooldown": args.cooldown,
+        "verbose": args.verbose
+    }
+
+    start = time.perf_counter()
+    try:
+        if args.jobs <= 1 or len(jobs) <= 1:
+            _init_worker(detector_class, detector_kwargs, options, handle)
+            start = time.perf_counter()  # Model load is not scan throughput
+            for job in jobs:
+                _scan_job(job)
+        else:
+            context = mp.get_context("spawn")
+            messages = context.Queue()
+            with context.Pool(
+                min(args.jobs, len(jobs)),
+                initializer=_init_worker,
+                initargs=(detector_class, detector_kwargs, options, messages.put)
+            ) as pool:
+                result = pool.map_async(_scan_job, jobs, chunksize=1)
+                remaining = len(jobs)
+                closed = False
+                while remaining:
+                    try:
+                        message = messages.get(timeout=1.0)
+                    except queue.Empty:
+                        if not result.ready():
+                            continue
+                        if closed:
+                            break  # A worker died without reporting; its files stay resumable
+                        # Every job has returned, but its last messages may still be buffered
+                        # in the workers' queue feeders: let the workers exit (which flushes
+                        # them) and keep reading until the queue stays empty
+                        pool.close()
+                        closed = True
+                        continue
+                    if handle(message):
+                        remaining -= 1
+    finally:
+        output.close()
+
+    totals["wall_seconds"] = time.perf_counter() - start
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan recorded footage for threats")
+    parser.add_argument("paths", nargs="+", help="Video files or directories (searched recursively)")
+    parser.add_argument("--output", required=True, help="Detections file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format (default: from the extension)")
+    parser.add_argument("--sample-fps", type=float, default=5.0, help="Frames inferred per second of video")
+    parser.add_argument("--stride", type=int, default=0, help="Infer every Nth frame (overrides --sample-fps)")
+    parser.add_argument("--batch-size", type=int, default=config.INFERENCE_BATCH_SIZE)
+    parser.add_argument("--jobs", type=int, default=1, help="Processes scanning files in parallel")
+    parser.add_argument("--cooldown", type=float, default=config.ALERT_COOLDOWN,
+                        help="Alert cooldown in recording seconds (sets the alert column)")
+    parser.add_argument("--restart", action="store_true", help="Discard earlier output and progress")
+    parser.add_argument("--verbose", action="store_true", help="Print every threat detection and alert")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--backend", default=config.DETECTION_BACKEND)
+    parser.add_argument("--imgsz", type=int, default=config.INFERENCE_IMGSZ)
+    parser.add_argument("--conf", type=float, default=config.DETECTION_CONFIDENCE)
+    parser.add_argument("--tiling", choices=["grid", "person"], default=config.DETECTION_TILING or None)
+    parser.add_argument("--mode", choices=["full", "cascade"], default=config.DETECTION_MODE)
+    parser.add_argument("--person-model", default=config.PERSON_MODEL_PATH, help="Person model for --mode cascade")
+    args = parser.parse_args(argv)
+
+    if args.sample_fps <= 0 and args.stride <= 0:
+        parser.error("--sample-fps or --stride must be positive")
+    videos = find_videos(args.paths)
+    if not videos:
+        raise SystemExit("No video files found")
+
+    totals = run_scan(args, videos)
+    wall = max(totals["wall_seconds"], 1e-6)
+    print(
+        f"Scanned {totals['files']} files ({totals['failed']} failed), "
+        f"{totals['video_seconds'] / 3600:.2f} h of video in {wall:.1f}s: "
+        f"{totals['frames_decoded'] / wall:.1f} decoded FPS, {totals['frames_sampled'] / wall:.1f} inferred FPS, "
+        f"{totals['video_seconds'] / wall:.1f}x real time, {totals['detections']} threat detections -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import pytest
+
+from detector.alert import Alert
+from detector.alert_store import AlertStore
+
+
+def add_alert(store: AlertStore, alert_id: str, timestamp: float, camera_id: str = "cam1") -> Alert:
+    alert = Alert(
+        id=alert_id,
+        camera_id=camera_id,
+        camera_name=camera_id,
+        threat_type="knife",
+        confidence=0.8,
+        timestamp=timestamp
+    )
+    store.add(alert, store.next_sequence())
+    return alert
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "alerts.db")
+
+
+def test_query_filters_by_time_and_camera(db_path):
+    store = AlertStore(db_path)
+    add_alert(store, "a1", 100.0, "cam1")
+    add_alert(store, "a2", 200.0, "cam2")
+    add_alert(store, "a3", 300.0, "cam1")
+
+    assert [a["id"] for a in store.query()] == ["a3", "a2", "a1"]
+    assert [a["id"] for a in store.query(camera_id="cam1")] == ["a3", "a1"]
+    assert [a["id"] for a in store.query(since=150.0, until=300.0)] == ["a2"]
+    assert [a["id"] for a in store.query(limit=1)] == ["a3"]
+    store.close()
+
+
+def test_acknowledgement_survives_restart(db_path):
+    store = AlertStore(db_path)
+    add_alert(store, "a1", 100.0)
+    add_alert(store, "a2", 200.0)
+    assert store.acknowledge("a1")
+    assert not store.acknowledge("missing")
+    assert store.get_stats()["unacknowledged"] == 1
+    store.close()
+
+    reopened = AlertStore(db_path)
+    assert reopened.get("a1").acknowledged
+    assert not reopened.get("a2").acknowledged
+    assert reopened.get_stats()["unacknowledged"] == 1
+    assert reopened.next_sequence() == 3
+    reopened.close()
+
+
+@pytest.mark.parametrize("reopen", [False, True], ids=["pending", "committed"])
+def test_pagination_keeps_alerts_sharing_a_timestamp(db_path, reopen):
+    store = AlertStore(db_path)
+    # Five alerts in the same second straddle the page boundary
+    for i in range(5):
+        add_alert(store, f"b{i}", 500.0)
+    add_alert(store, "a0", 400.0)
+    if reopen:
+        store.close()
+        store = AlertStore(db_path)
+
+    seen = []
+    page = store.query(limit=2)
+    while page:
+        seen.extend(alert["id"] for alert in page)
+        last = page[-1]
+        page = store.query(until=last["timestamp"], before_id=last["id"], limit=2)
+
+    assert seen == ["b4", "b3", "b2", "b1", "b0", "a0"]
+    store.close()
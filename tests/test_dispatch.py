@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from detector.alert import Alert
+from detector.dispatch import AlertDispatcher, CallbackSink, WebhookSink
+
+
+def make_alert(alert_id: str) -> Alert:
+    return Alert(alert_id, "cam1", "Main Entrance", "knife", 0.9, time.time())
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def stand_in():
+    """Local webhook receiver answering 503 to its first `failures` requests and sleeping `delay` per request."""
+    state = {"failures": 0, "delay": 0.0, "requests": 0, "received": []}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(state["delay"])
+            with lock:
+                state["requests"] += 1
+                failed = state["requests"] <= state["failures"]
+                if not failed:
+                    state["received"].append(json.loads(body))
+            self.send_response(503 if failed else 200)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/alerts"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_failed_deliveries_and_ignores_duplicates(stand_in):
+    stand_in["failures"] = 2
+    dispatcher = AlertDispatcher([WebhookSink(stand_in["url"], name="webhook")], backoff=0.01)
+    dispatcher.start()
+    try:
+        for index in range(3):
+            assert dispatcher.dispatch(make_alert(f"alert_{index}"))
+            assert not dispatcher.dispatch(make_alert(f"alert_{index}"))
+        assert wait_for(lambda: len(stand_in["received"]) == 3)
+    finally:
+        dispatcher.stop()
+
+    assert sorted(alert["id"] for alert in stand_in["received"]) == ["alert_0", "alert_1", "alert_2"]
+    stats = dispatcher.get_stats()
+    assert stats["duplicates"] == 3
+    assert stats["pending_retries"] == 0
+    webhook = stats["sinks"]["webhook"]
+    assert (webhook["sent"], webhook["retried"], webhook["failed"], webhook["dropped"]) == (3, 2, 0, 0)
+    assert webhook["queued"] == 0
+
+
+def test_gives_up_after_max_retries(stand_in):
+    stand_in["failures"] = 100
+    dispatcher = AlertDispatcher([WebhookSink(stand_in["url"], name="webhook")], max_retries=2, backoff=0.01)
+    dispatcher.start()
+    try:
+        dispatcher.dispatch(make_alert("alert_1"))
+        assert wait_for(lambda: dispatcher.get_stats()["sinks"]["webhook"]["failed"] == 1)
+    finally:
+        dispatcher.stop()
+
+    assert stand_in["requests"] == 3
+    webhook = dispatcher.get_stats()["sinks"]["webhook"]
+    assert (webhook["sent"], webhook["retried"], webhook["failed"]) == (0, 2, 1)
+
+
+def test_hanging_webhook_does_not_delay_other_sinks(stand_in):
+    stand_in["delay"] = 1.0
+    delivered = []
+    dispatcher = AlertDispatcher(
+        [WebhookSink(stand_in["url"], name="webhook"), CallbackSink("socketio", delivered.append)],
+        workers=2
+    )
+    dispatcher.start()
+    try:
+        start = time.monotonic()
+        for index in range(8):
+            dispatcher.dispatch(make_alert(f"alert_{index}"))
+        assert wait_for(lambda: len(delivered) == 8, timeout=0.5)
+        assert time.monotonic() - start < 0.5
+        assert dispatcher.get_stats()["sinks"]["webhook"]["sent"] == 0
+    finally:
+        dispatcher.stop(timeout=0.1)
+
+
+def test_full_queue_drops_only_for_that_sink():
+    release = threading.Event()
+    delivered = []
+    dispatcher = AlertDispatcher(
+        [CallbackSink("stuck", lambda alert: release.wait()), CallbackSink("socketio", delivered.append)],
+        workers=1,
+        queue_size=2
+    )
+    dispatcher.start()
+    try:
+        for index in range(6):
+            dispatcher.dispatch(make_alert(f"alert_{index}"))
+            # The healthy sink keeps up, one alert at a time
+            assert wait_for(lambda: len(delivered) == index + 1)
+        stats = dispatcher.get_stats()["sinks"]
+        # One delivery in progress and two queued; the rest are dropped
+        assert stats["stuck"]["dropped"] == 3
+        assert stats["socketio"]["dropped"] == 0
+    finally:
+        release.set()
+        dispatcher.stop()
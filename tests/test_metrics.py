@@ -0,0 +1,38 @@
+from detector.metrics import MetricsRegistry
+
+
+def make_registry():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames", ["camera"])
+    latency = registry.histogram("latency_seconds", "Latency", ["camera"], buckets=(0.1, 1.0))
+    lag = registry.gauge("lag_seconds", "Lag", ["camera"])
+    return registry, frames, latency, lag
+
+
+def test_render_adds_node_snapshots_to_local_values():
+    coordinator, frames, latency, _ = make_registry()
+    node, node_frames, node_latency, node_lag = make_registry()
+    frames.labels(camera="cam1").inc(2)
+    latency.labels(camera="cam1").observe(0.05)
+    node_frames.labels(camera="cam1").inc(3)
+    node_frames.labels(camera="cam2").inc()
+    node_latency.labels(camera="cam1").observe(0.5)
+    node_lag.labels(camera="cam1").set(4.0)
+
+    text = coordinator.render([node.snapshot()])
+
+    assert 'frames_total{camera="cam1"} 5' in text
+    assert 'frames_total{camera="cam2"} 1' in text
+    assert 'latency_seconds_bucket{camera="cam1",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{camera="cam1",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{camera="cam1"} 2' in text
+    assert 'latency_seconds_sum{camera="cam1"} 0.55' in text
+    # Gauges describe the present and are not forwarded
+    assert "lag_seconds{" not in text
+
+
+def test_snapshot_skips_gauges_and_unused_metrics():
+    registry, frames, _, lag = make_registry()
+    frames.labels(camera="cam1").inc()
+    lag.labels(camera="cam1").set(1.0)
+    assert registry.snapshot() == {"frames_total": {("cam1",): 1}}
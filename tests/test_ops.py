@@ -0,0 +1,44 @@
+import numpy as np
+
+from detector.ops import box_iou, nms, pairwise_iou
+
+
+def test_pairwise_iou_matches_box_iou():
+    a = np.array([[0, 0, 10, 10], [5, 5, 15, 15]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [10, 10, 20, 20], [0, 0, 5, 10]], dtype=np.float32)
+    matrix = pairwise_iou(a, b)
+
+    assert matrix.shape == (2, 3)
+    for row, box in enumerate(a):
+        np.testing.assert_allclose(matrix[row], box_iou(box, b))
+    np.testing.assert_allclose(matrix[0], [1.0, 0.0, 0.5])
+    np.testing.assert_allclose(matrix[1, 0], 25 / 175)
+
+
+def test_pairwise_iou_of_empty_arrays():
+    boxes = np.array([[0, 0, 10, 10]], dtype=np.float32)
+    assert pairwise_iou(np.empty((0, 4), dtype=np.float32), boxes).shape == (0, 1)
+
+
+def test_nms_keeps_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.6, 0.9, 0.7], dtype=np.float32)
+    class_ids = np.zeros(3, dtype=np.int32)
+
+    assert nms(boxes, scores, class_ids).tolist() == [1, 2]
+
+
+def test_nms_is_class_aware():
+    boxes = np.array([[0, 0, 10, 10], [0, 0, 10, 10]], dtype=np.float32)
+    scores = np.array([0.9, 0.8], dtype=np.float32)
+
+    assert nms(boxes, scores, np.array([0, 1])).tolist() == [0, 1]
+    assert nms(boxes, scores, np.array([1, 1])).tolist() == [0]
+
+
+def test_nms_limits_and_handles_empty_input():
+    boxes = np.array([[i * 20, 0, i * 20 + 10, 10] for i in range(5)], dtype=np.float32)
+    scores = np.linspace(0.5, 0.9, 5).astype(np.float32)
+
+    assert nms(boxes, scores, np.zeros(5), max_detections=2).tolist() == [4, 3]
+    assert nms(np.empty((0, 4)), np.empty(0), np.empty(0)).size == 0
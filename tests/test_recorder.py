@@ -0,0 +1,30 @@
+from detector.recorder import ClipBuffer
+
+
+def test_clip_buffer_drops_frames_older_than_its_window():
+    buffer = ClipBuffer(seconds=2.0, max_bytes=1024)
+    for i in range(10):
+        buffer.add(100.0 + i * 0.5, b"x" * 10)
+
+    stats = buffer.get_stats()
+    assert stats == {"frames": 5, "bytes": 50, "seconds": 2.0}
+    assert [t for t, _ in buffer.frames_between(0, 1000)] == [102.5, 103.0, 103.5, 104.0, 104.5]
+
+
+def test_clip_buffer_stays_under_its_byte_budget():
+    buffer = ClipBuffer(seconds=60.0, max_bytes=100)
+    for i in range(10):
+        buffer.add(100.0 + i, b"x" * 30)
+
+    stats = buffer.get_stats()
+    assert stats["bytes"] <= 100
+    assert stats["frames"] == 3
+    # The newest frames are the ones kept
+    assert [t for t, _ in buffer.frames_between(0, 1000)] == [107.0, 108.0, 109.0]
+
+
+def test_frames_between_is_inclusive():
+    buffer = ClipBuffer(seconds=10.0)
+    for i in range(5):
+        buffer.add(float(i), bytes([i]))
+    assert buffer.frames_between(1.0, 3.0) == [(1.0, b"\x01"), (2.0, b"\x02"), (3.0, b"\x03")]
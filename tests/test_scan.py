@@ -0,0 +1,101 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+import scan
+from detector.yolo_detector import KIND_THREAT, Detections
+
+CLASS_NAMES = {0: "person", 1: "knife"}
+
+
+class KnifeEverywhere:
+    """Detector stand-in that sees a knife in every frame."""
+
+    def __init__(self):
+        self.class_names = CLASS_NAMES
+
+    def detect_batch(self, frames):
+        return [
+            Detections(
+                boxes=np.array([[10, 10, 30, 30]], dtype=np.int32),
+                confidences=np.array([0.9], dtype=np.float32),
+                class_ids=np.array([1], dtype=np.int32),
+                kinds=np.array([KIND_THREAT], dtype=np.uint8),
+                class_names=CLASS_NAMES
+            )
+            for _ in frames
+        ]
+
+
+@pytest.fixture
+def video(tmp_path):
+    """Two seconds of 10 fps video."""
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(20):
+        writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def messages():
+    received = []
+    options = {"stride": 1, "sample_fps": 10, "batch_size": 4, "cooldown": 1.0, "verbose": False}
+    scan._init_worker(KnifeEverywhere, {}, options, received.append)
+    return received
+
+
+def alert_frames(messages, path):
+    return [row["frame"] for m in messages if m[0] == "rows" and m[1] == path for row in m[2] if row["alert"]]
+
+
+def test_cooldown_follows_video_time(video, messages):
+    scan._scan_file(video, 0, {})
+    assert alert_frames(messages, video) == [0, 10]
+    assert messages[-1][0] == "done"
+    assert messages[-1][2]["frames_sampled"] == 20
+
+
+def test_worker_cooldown_is_reset_per_file(video, messages):
+    scan._scan_file(video, 0, {})
+    first = alert_frames(messages, video)
+    messages.clear()
+    # The worker's alert manager is reused, but each file starts from its own checkpoint
+    scan._scan_file(video, 0, {})
+    assert alert_frames(messages, video) == first
+
+
+def test_resume_restores_cooldown(video, messages):
+    scan._scan_file(video, 0, {})
+    checkpoint = next(m for m in messages if m[0] == "rows" and m[3] == 8)
+    messages.clear()
+    scan._scan_file(video, 8, checkpoint[4])
+    # The alert at frame 0 still holds its cooldown, so only frame 10 alerts
+    assert alert_frames(messages, video) == [10]
+
+
+def test_scan_output_resume_drops_uncheckpointed_rows(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    row = {"file": "a.mp4", "frame": 0, "alert": True}
+    output = scan.ScanOutput(path, "jsonl", restart=False)
+    output.checkpoint("a.mp4", [row], 5, {"a.mp4_knife": 1.0})
+    output.checkpoint("b.mp4", [], 0, done=True)
+    # Rows written without a checkpoint, as if the scan crashed mid-batch
+    output._write_rows([dict(row, frame=5)])
+    output.close()
+
+    resumed = scan.ScanOutput(path, "jsonl", restart=False)
+    assert resumed.pending_jobs(["a.mp4", "b.mp4", "c.mp4"]) == [
+        ("a.mp4", 5, {"a.mp4_knife": 1.0}),
+        ("c.mp4", 0, {})
+    ]
+    resumed.close()
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == [row]
+
+    restarted = scan.ScanOutput(path, "jsonl", restart=True)
+    assert len(restarted.pending_jobs(["a.mp4", "b.mp4"])) == 2
+    restarted.close()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from detector.scheduler import InferenceScheduler
+
+
+class FailingDetector:
+    class_names = {0: "person"}
+
+    def detect_batch(self, frames):
+        raise RuntimeError("out of memory")
+
+
+def test_failed_batches_are_not_counted_as_processed():
+    scheduler = InferenceScheduler(FailingDetector(), warmup=False, max_latency=0.0)
+    scheduler.start()
+    try:
+        assert scheduler.wait_until_ready(2.0)
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        assert scheduler.infer("cam1", frame, timeout=2.0) is None
+        assert scheduler.infer("cam1", frame, timeout=2.0) is None
+    finally:
+        scheduler.stop()
+
+    stats = scheduler.get_stats()
+    assert stats["frames_processed"] == 0
+    assert stats["frames_failed"] == 2
+    assert stats["batches_failed"] == 2
+    assert stats["batches"] == 0
+
+
+def test_model_load_failure_is_an_error_state():
+    def build_detector():
+        raise FileNotFoundError("yolov8s.pt")
+
+    scheduler = InferenceScheduler(detector_factory=build_detector)
+    scheduler.start()
+    scheduler.thread.join(timeout=2.0)
+    try:
+        assert not scheduler.ready
+        assert scheduler.failed
+        readiness = scheduler.get_readiness()
+        assert readiness["failed"] and readiness["error"] == "yolov8s.pt"
+    finally:
+        scheduler.stop()
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from detector import streaming
+from detector.streaming import QUALITY_TIERS, FrameCache, FrameDelivery, SubscriptionRegistry
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingSocketIO:
+    """Socket.IO stand-in that keeps each emit and its ack callback."""
+
+    def __init__(self):
+        self.emits = []
+
+    def emit(self, event, payload, to=None, callback=None):
+        self.emits.append((event, payload, to, callback))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(streaming.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def socketio():
+    return RecordingSocketIO()
+
+
+def make_delivery(socketio, **kwargs) -> FrameDelivery:
+    subscriptions = SubscriptionRegistry()
+    subscriptions.subscribe("client", "cam1")
+    delivery = FrameDelivery(socketio, subscriptions, FrameCache(), **kwargs)
+    delivery.add_client("client")
+    return delivery
+
+
+def publish(delivery: FrameDelivery, seq: int):
+    delivery.publish("cam1", seq, lambda: FRAME, {"camera_id": "cam1"}, event="frame_cam1")
+
+
+def test_busy_client_drops_instead_of_queueing(clock, socketio):
+    delivery = make_delivery(socketio)
+    publish(delivery, 1)
+    clock.now += 1.0
+    publish(delivery, 2)  # First frame not acknowledged yet
+
+    assert len(socketio.emits) == 1
+    stats = delivery.get_stats()["clients"]["client"]
+    assert stats["frames_sent"] == 1
+    assert stats["frames_dropped"] == 1
+    assert delivery.pending_bytes == stats["bytes_sent"] > 0
+
+
+def test_ack_frees_the_slot_and_budget(clock, socketio):
+    delivery = make_delivery(socketio)
+    publish(delivery, 1)
+    clock.now += 0.05
+    socketio.emits[-1][3]()
+    assert delivery.pending_bytes == 0
+
+    clock.now += 1.0 / QUALITY_TIERS[0][2]
+    publish(delivery, 2)
+    assert len(socketio.emits) == 2
+    assert delivery.get_stats()["clients"]["client"]["rtt_ms"] == 50.0
+
+
+def test_slow_acks_degrade_and_fast_acks_recover(clock, socketio):
+    delivery = make_delivery(socketio, slow_rtt=0.25, fast_rtt=0.08, tier_hold_seconds=3.0)
+    clock.now += 5.0
+    publish(delivery, 1)
+    clock.now += 0.5
+    socketio.emits[-1][3]()
+    assert delivery.clients["client"].tier == 1
+
+    # Fast acknowledgements pull the smoothed latency down, then the client upgrades after the hold
+    for seq in range(2, 30):
+        clock.now += 1.0
+        publish(delivery, seq)
+        clock.now += 0.01
+        socketio.emits[-1][3]()
+    assert delivery.clients["client"].tier == 0
+    assert [payload["tier"] for _, payload, _, _ in socketio.emits[:2]] == [0, 1]
+
+
+def test_missed_ack_is_written_off(clock, socketio):
+    delivery = make_delivery(socketio, ack_timeout=5.0)
+    publish(delivery, 1)
+    clock.now += 6.0
+    publish(delivery, 2)
+
+    assert len(socketio.emits) == 2
+    link = delivery.clients["client"]
+    assert link.acks_missed == 1
+    assert link.tier == 1
+    # A late ack for the written-off frame does not clear the one now in flight
+    socketio.emits[0][3]()
+    assert link.in_flight["cam1"][0] == clock.now
+
+
+def test_pending_byte_budget_drops_frames(clock, socketio):
+    delivery = make_delivery(socketio, max_pending_bytes=10)
+    publish(delivery, 1)
+
+    assert socketio.emits == []
+    assert delivery.get_stats()["frames_dropped_budget"] == 1
+
+
+def test_unsubscribed_and_removed_clients_get_nothing(clock, socketio):
+    delivery = make_delivery(socketio)
+    delivery.subscriptions.subscribe("other", "cam2")
+    delivery.remove_client("client")
+    publish(delivery, 1)
+    assert socketio.emits == []
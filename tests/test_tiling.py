@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from detector.tiling import grid_tiles, merge_outputs, person_tiles, shift_output
+
+
+def output(boxes, confidences, class_ids):
+    return (
+        np.array(boxes, dtype=np.float32).reshape(-1, 4),
+        np.array(confidences, dtype=np.float32),
+        np.array(class_ids, dtype=np.int32)
+    )
+
+
+def test_grid_tiles_cover_the_frame_with_overlap():
+    tiles = grid_tiles(1920, 1080, tile_size=640, overlap=0.2)
+
+    assert all(x2 - x1 == 640 and y2 - y1 == 640 for x1, y1, x2, y2 in tiles)
+    assert max(x2 for _, _, x2, _ in tiles) == 1920
+    assert max(y2 for _, _, _, y2 in tiles) == 1080
+    xs = sorted({x1 for x1, _, _, _ in tiles})
+    assert all(b - a <= 640 * 0.8 for a, b in zip(xs, xs[1:]))
+
+
+def test_small_frame_needs_no_tiles():
+    assert grid_tiles(640, 480, tile_size=640) == []
+
+
+def test_person_tiles_pad_clip_and_share_regions():
+    people = np.array([[900, 400, 1000, 700], [920, 420, 980, 680], [10, 10, 60, 110]], dtype=np.float32)
+    regions = person_tiles(people, 1920, 1080, tile_size=640)
+
+    # The second person is inside the first one's region
+    assert len(regions) == 2
+    for x1, y1, x2, y2 in regions:
+        assert 0 <= x1 < x2 <= 1920 and 0 <= y1 < y2 <= 1080
+        assert x2 - x1 >= 640 and y2 - y1 >= 640
+    x1, y1, x2, y2 = regions[0]
+    assert x1 <= 900 - 150 and x2 >= 1000 + 150
+
+
+def test_tile_detections_merge_into_frame_coordinates():
+    full_frame = output([[100, 100, 140, 140]], [0.6], [1])
+    # The same knife seen by a tile offset (80, 90), plus one only the tile found
+    tile = shift_output(output([[20, 10, 60, 50], [300, 300, 320, 320]], [0.8, 0.5], [1, 1]), 80, 90)
+
+    boxes, confidences, class_ids = merge_outputs([full_frame, tile])
+
+    assert boxes.tolist() == [[100, 100, 140, 140], [380, 390, 400, 410]]
+    assert confidences.tolist() == pytest.approx([0.8, 0.5])
+    assert class_ids.tolist() == [1, 1]
+
+
+def test_merge_of_empty_outputs():
+    empty = output([], [], [])
+    assert len(merge_outputs([empty, shift_output(empty, 10, 10)])[0]) == 0
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from detector.alert import AlertManager
+from detector.tracker import ObjectTracker
+from detector.yolo_detector import KIND_OTHER, KIND_THREAT, Detections
+
+CLASS_NAMES = {0: "person", 1: "knife"}
+
+
+def knife_at(x: int, confidence: float = 0.8) -> Detections:
+    return Detections(
+        boxes=np.array([[x, 100, x + 40, 140]], dtype=np.int32),
+        confidences=np.array([confidence], dtype=np.float32),
+        class_ids=np.array([1], dtype=np.int32),
+        kinds=np.array([KIND_THREAT], dtype=np.uint8),
+        class_names=CLASS_NAMES
+    )
+
+
+def nothing() -> Detections:
+    return Detections.empty(CLASS_NAMES)
+
+
+def test_threat_confirms_after_k_of_n_frames():
+    tracker = ObjectTracker(confirm_hits=3, confirm_window=5)
+    assert tracker.update(knife_at(100)) == []
+    assert tracker.update(nothing()) == []
+    assert tracker.update(knife_at(104)) == []
+    confirmed = tracker.update(knife_at(108))
+    assert len(confirmed) == 1
+    assert confirmed[0].class_name == "knife"
+    assert tracker.get_stats()["tracks_confirmed_total"] == 1
+
+
+def test_single_frame_flicker_never_confirms():
+    tracker = ObjectTracker(confirm_hits=3, confirm_window=5)
+    tracker.update(knife_at(100))
+    for _ in range(6):
+        assert tracker.update(nothing()) == []
+    assert tracker.get_stats()["tracks_confirmed_total"] == 0
+
+
+def test_hits_outside_the_window_do_not_count():
+    tracker = ObjectTracker(confirm_hits=2, confirm_window=3)
+    tracker.update(knife_at(100))
+    tracker.update(nothing())
+    tracker.update(nothing())
+    assert tracker.update(knife_at(100)) == []
+
+
+def test_confirmed_track_is_offered_until_marked_alerted():
+    tracker = ObjectTracker(confirm_hits=1, confirm_window=1)
+    first = tracker.update(knife_at(100))
+    assert len(first) == 1
+    track_id = first[0].track_id
+    # Still offered while the cooldown suppresses its alert
+    assert [track.track_id for track in tracker.update(knife_at(102))] == [track_id]
+    assert tracker.mark_alerted(track_id)
+    assert tracker.update(knife_at(104)) == []
+    assert not tracker.mark_alerted(track_id + 1000)
+
+
+def test_detections_get_their_track_ids():
+    tracker = ObjectTracker(confirm_hits=1, confirm_window=1)
+    detections = knife_at(100)
+    track = tracker.update(detections)[0]
+    assert detections.track_ids.tolist() == [track.track_id]
+
+
+def test_non_threats_are_tracked_but_not_offered():
+    tracker = ObjectTracker(confirm_hits=1, confirm_window=1)
+    person = Detections(
+        boxes=np.array([[0, 0, 50, 150]], dtype=np.int32),
+        confidences=np.array([0.9], dtype=np.float32),
+        class_ids=np.array([0], dtype=np.int32),
+        kinds=np.array([KIND_OTHER], dtype=np.uint8),
+        class_names=CLASS_NAMES
+    )
+    assert tracker.update(person) == []
+    assert tracker.get_stats()["confirmed_tracks"] == 1
+
+
+def test_confirm_hits_must_fit_the_window():
+    with pytest.raises(ValueError):
+        ObjectTracker(confirm_hits=6, confirm_window=5)
+    with pytest.raises(ValueError):
+        ObjectTracker(confirm_hits=0, confirm_window=5)
+
+
+def test_site_correlation_merges_alerts_across_cameras():
+    manager = AlertManager(cooldown_seconds=30, verbose=False)
+    first = manager.check_and_alert("cam1", "Hallway", "knife", 0.8, timestamp=100.0, site="main")
+    assert first is not None
+    assert manager.check_and_alert("cam2", "Stairs", "knife", 0.8, timestamp=110.0, site="main") is None
+    assert manager.check_and_alert("cam3", "Annex", "knife", 0.8, timestamp=110.0, site="annex") is not None
+    # Without a site, cameras keep independent cooldowns
+    assert manager.check_and_alert("cam2", "Stairs", "knife", 0.8, timestamp=110.0) is not None
+    manager.store.close()